@@ -1,3 +1,5 @@
+import logging
+
 from django.apps import AppConfig
 
 
@@ -5,3 +7,12 @@ class FinanceAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "finance_app"
     verbose_name = "财务应用"
+
+    def ready(self):
+        # 进程启动时加载并校验 t_Schema，有问题尽早记录，不影响启动
+        from .services.excel_processor import SCHEMA_CACHE
+
+        try:
+            SCHEMA_CACHE.get()
+        except ValueError as e:
+            logging.getLogger("finance_app").error(str(e))
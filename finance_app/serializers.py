@@ -1,5 +1,8 @@
 from rest_framework import serializers
 from .models import FinanceRecord, ProcessingLog
+from .services.text_export import TEXT_FORMATS
+from .services.workbook import detect_file_format
+from .services.xls_reader import XLS_SUPPORTED
 
 
 class FinanceRecordSerializer(serializers.ModelSerializer):
@@ -90,15 +93,37 @@ class FileUploadSerializer(serializers.Serializer):
         choices=[("payment", "排单处理"), ("reimbursement", "报销处理")],
         default="payment",
     )
+    reader_engine = serializers.ChoiceField(
+        choices=[("openpyxl", "openpyxl"), ("native", "原生XML解析")],
+        required=False,
+    )
+    output_format = serializers.ChoiceField(
+        choices=[("xlsx", "Excel凭证导入文件")]
+        + [(name, text_format.label) for name, text_format in TEXT_FORMATS.items()],
+        default="xlsx",
+    )
 
     def validate_file(self, value):
         """验证上传的文件"""
         # 检查文件扩展名
-        if not value.name.lower().endswith((".xlsx", ".xls")):
-            raise serializers.ValidationError("只支持Excel文件格式 (.xlsx, .xls)")
+        if not value.name.lower().endswith((".xlsx", ".xls", ".zip")):
+            raise serializers.ValidationError(
+                "只支持Excel文件格式 (.xlsx, .xls) 或CSV压缩包 (.zip)"
+            )
 
         # 检查文件大小 (50MB)
         if value.size > 50 * 1024 * 1024:
             raise serializers.ValidationError("文件大小不能超过50MB")
 
+        # 按文件头检查实际格式，处理时据此选择读取引擎
+        file_format = detect_file_format(value)
+        if file_format is None:
+            raise serializers.ValidationError("文件内容不是有效的Excel文件")
+        if value.name.lower().endswith(".zip") and file_format != "csv":
+            raise serializers.ValidationError("压缩包中没有CSV文件")
+        if file_format == "xls" and not XLS_SUPPORTED:
+            raise serializers.ValidationError(
+                "暂不支持 .xls 文件，请另存为 .xlsx 后上传"
+            )
+
         return value
@@ -0,0 +1,110 @@
+"""
+CSV压缩包读取引擎 - 读取由多个 CSV/TSV 文件组成的 zip 包
+
+每个文件对应一个工作表，文件名（去掉扩展名）即工作表名，例如
+"付款(每日).csv"、"核算项目_供应商.csv"。文件内容与工作表逐行对应
+（表头所在行号相同），按 UTF-8 读取（允许带 BOM），.tsv 文件以制表符分隔。
+
+单元格的值保持为字符串，空单元格为 None；不需要解压和解析 XLSX 的XML，
+读取速度比 xlsx 快得多。
+"""
+
+import csv
+import io
+import posixpath
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 支持的文件扩展名及对应的分隔符
+CSV_DELIMITERS = {".csv": ",", ".tsv": "\t"}
+
+
+def _member_name(info: zipfile.ZipInfo) -> str:
+    """
+    取压缩包内的文件名
+
+    未设置 UTF-8 标志的文件名会被 zipfile 按 cp437 解码，
+    Windows 中文系统打包的文件名实际是 GBK 编码，需要还原。
+    """
+    if info.flag_bits & 0x800:
+        return info.filename
+    raw = info.filename.encode("cp437")
+    for encoding in ("utf-8", "gbk"):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return info.filename
+
+
+def _sheet_name(filename: str) -> Tuple[Optional[str], Optional[str]]:
+    """由文件名得到 (工作表名, 分隔符)，不是 CSV/TSV 文件时返回 (None, None)"""
+    base, ext = posixpath.splitext(posixpath.basename(filename))
+    delimiter = CSV_DELIMITERS.get(ext.lower())
+    if delimiter is None or not base or filename.startswith("__MACOSX/"):
+        return None, None
+    return base, delimiter
+
+
+def is_csv_bundle(names: Iterable[str]) -> bool:
+    """判断压缩包是否为CSV包（含 CSV/TSV 文件且不是 xlsx 工作簿）"""
+    names = list(names)
+    if "[Content_Types].xml" in names:
+        return False
+    return any(_sheet_name(name)[0] for name in names)
+
+
+class CsvBundleReader:
+    """CSV压缩包读取器"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self._members: Dict[str, Tuple[zipfile.ZipInfo, str]] = {}
+
+        for info in self.archive.infolist():
+            if info.is_dir():
+                continue
+            sheet_name, delimiter = _sheet_name(_member_name(info))
+            if sheet_name is not None:
+                self._members[sheet_name] = (info, delimiter)
+
+    @property
+    def sheetnames(self) -> List[str]:
+        """工作表名称列表"""
+        return list(self._members)
+
+    def iter_rows(
+        self, sheet_name: str, min_row: int = 1, max_col: Optional[int] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """按行返回单元格的值，每行补齐（或截断）到 max_col 列"""
+        if sheet_name not in self._members:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+        info, delimiter = self._members[sheet_name]
+        row_count = 0
+
+        with self.archive.open(info) as raw:
+            text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+            for row_count, cells in enumerate(
+                csv.reader(text, delimiter=delimiter), start=1
+            ):
+                if row_count < min_row:
+                    continue
+                width = max_col or len(cells)
+                values = [cell if cell != "" else None for cell in cells[:width]]
+                if len(values) < width:
+                    values.extend([None] * (width - len(values)))
+                yield tuple(values)
+
+        # 与 openpyxl 一致：空工作表视为只有一行空行
+        if row_count == 0 and min_row <= 1:
+            yield (None,) * (max_col or 0)
+
+    def max_row(self, sheet_name: str) -> Optional[int]:
+        """CSV 文件不记录总行数"""
+        return None
+
+    def close(self) -> None:
+        """关闭压缩包"""
+        self.archive.close()
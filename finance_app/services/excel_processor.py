@@ -4,14 +4,52 @@ Excel处理服务 - 从原始main.py移植的核心业务逻辑
 
 import os
 import datetime
-import openpyxl
+from concurrent.futures import Future
+from itertools import chain, islice
 import xlsxwriter
-import json
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import (
+    List,
+    Dict,
+    Any,
+    Callable,
+    Collection,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    Union,
+)
 from django.conf import settings
 from django.contrib.auth.models import User
 from ..utils import get_prepared_by_display_name
+from .fee_types import FeeTypeResolver
+from .job_context import JobContext
+from .money import to_cents
+from .parallel_parse import SheetParsePool
+from .payment_columns import PaymentColumns
+from .pipeline import Counted, chunked
+from .posting_rules import emit_payment_vouchers
+from .schema import SCHEMA_HEADERS, SchemaCache, SchemaRows
+from .sheet_specs import SheetSpec, iter_mapped_rows
+from .suggest import NgramIndex
+from .text_export import (
+    TEXT_FORMATS,
+    entry_from_cells,
+    format_for_path,
+    iter_text,
+    read_text,
+    write_text,
+)
+from .voucher_entry import (
+    AMOUNT_FOR_INDEX,
+    EXCEL_HEADERS,
+    VoucherEntry,
+    output_row,
+)
+from .voucher_header import VoucherHeaderTemplate
+from .workbook import WorkbookSession
+from .xlsx_writer import Sheet, iter_workbook, render_rows, write_workbook
 
 
 # 配置常量
@@ -24,7 +62,17 @@ BANK_ACCOUNT_MAPPING = {
 }
 
 DEFAULT_BANK_ACCOUNT = "1002.16"
+# 输出格式：xlsx 凭证导入工作簿，或 TEXT_FORMATS 中的文本格式
+OUTPUT_FORMATS = ("xlsx",) + tuple(TEXT_FORMATS)
 DEFAULT_SHEET_NAME = "付款(每日)"
+# 找不到供应商/项目时给出的相近简称个数
+SUGGESTION_LIMIT = 3
+REIMBURSEMENT_SHEET_NAME = "报销  (每日)"
+# 报销明细的起始行（顶部信息和表头之后）
+REIMBURSEMENT_DETAIL_START_ROW = 4
+# 预检读取表头的列数：超出 max_col 的表头也能报告实际所在列，
+# 又不必为确定整表列宽而扫描全部单元格
+PREFLIGHT_HEADER_COLUMNS = 32
 
 KEY_MAPPINGS = {
     "pay": {
@@ -56,80 +104,112 @@ KEY_MAPPINGS = {
     "feeType": {"别称": "alias", "科目名称": "name", "科目代码": "code"},
 }
 
-EXCEL_HEADERS = [
-    "FDate",
-    "FYear",
-    "FPeriod",
-    "FGroupID",
-    "FNumber",
-    "FAccountNum",
-    "FAccountName",
-    "FCurrencyNum",
-    "FCurrencyName",
-    "FAmountFor",
-    "FDebit",
-    "FCredit",
-    "FPreparerID",
-    "FCheckerID",
-    "FApproveID",
-    "FCashierID",
-    "FHandler",
-    "FSettleTypeID",
-    "FSettleNo",
-    "FExplanation",
-    "FQuantity",
-    "FMeasureUnitID",
-    "FUnitPrice",
-    "FReference",
-    "FTransDate",
-    "FTransNo",
-    "FAttachments",
-    "FSerialNum",
-    "FObjectName",
-    "FParameter",
-    "FExchangeRate",
-    "FEntryID",
-    "FItem",
-    "FPosted",
-    "FInternalInd",
-    "FCashFlow",
-]
-
-SCHEMA_HEADERS = [
-    "FType",
-    "FKey",
-    "FFieldName",
-    "FCaption",
-    "FValueType",
-    "FNeedSave",
-    "FColIndex",
-    "FSrcTableName",
-    "FSrcFieldName",
-    "FExpFieldName",
-    "FImpFieldName",
-    "FDefaultVal",
-    "FSearch",
-    "FItemPageName",
-    "FTrueType",
-    "FPrecision",
-    "FSearchName",
-    "FIsShownList",
-    "FViewMask",
-    "FPage",
-]
+# 排单文件中各工作表的规格
+SHEET_SPECS = {
+    "pay": SheetSpec(
+        DEFAULT_SHEET_NAME,
+        KEY_MAPPINGS["pay"],
+        max_col=12,
+        start_row=3,
+        header_row=2,
+    ),
+    "feeType": SheetSpec("核算项目_费用代码", KEY_MAPPINGS["feeType"], max_col=3),
+    "project": SheetSpec("核算项目_项目", KEY_MAPPINGS["project"]),
+    "supplier": SheetSpec("核算项目_供应商", KEY_MAPPINGS["supplier"]),
+}
+
+# 进程内共用的 t_Schema 缓存，文件修改后自动重新加载
+SCHEMA_CACHE = SchemaCache(
+    os.path.join(os.path.dirname(__file__), "..", "..", "t_Schema.json")
+)
 
 
 class ExcelProcessingError(Exception):
-    """Excel处理异常"""
+    """
+    Excel处理异常
+
+    errors 为结构化的错误列表（如预检发现的问题），
+    每项为 {"sheet", "row", "field", "message"}，
+    找不到供应商/项目时另有 "suggestions"（相近的简称列表）
+    """
 
-    pass
+    def __init__(self, message: str = "", errors: Optional[List[Dict]] = None):
+        super().__init__(message)
+        self.errors = errors or []
 
 
 class ExcelProcessor:
     """Excel处理器"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        read_only: Optional[bool] = None,
+        engine: Optional[str] = None,
+        empty_row_limit: Optional[int] = None,
+        parallel: Optional[bool] = None,
+        preflight_rows: Optional[int] = None,
+        chunk_rows: Optional[int] = None,
+        writer_engine: Optional[str] = None,
+    ):
         self.logger = logging.getLogger("finance_app")
+        # 只读流式模式：按行读取工作表，内存占用不随行数增长
+        if read_only is None:
+            read_only = getattr(settings, "FINANCE_EXCEL_READ_ONLY", False)
+        self.read_only = read_only
+        # 读取引擎："openpyxl" 或 "native"（直接解析工作表XML）
+        if engine is None:
+            engine = getattr(settings, "FINANCE_EXCEL_READER_ENGINE", "openpyxl")
+        self.engine = engine
+        # 连续空行达到该数量即视为数据结束，0 表示读到工作表末尾
+        if empty_row_limit is None:
+            empty_row_limit = getattr(settings, "FINANCE_EMPTY_ROW_LIMIT", 0)
+        self.empty_row_limit = empty_row_limit
+        # 在进程池中并行解析排单文件的主数据工作表
+        if parallel is None:
+            parallel = getattr(settings, "FINANCE_PARALLEL_MASTER_SHEETS", False)
+        self.parallel = parallel
+        # 预检时每个工作表读取的数据行数，0 表示不做预检
+        if preflight_rows is None:
+            preflight_rows = getattr(settings, "FINANCE_PREFLIGHT_ROWS", 0)
+        self.preflight_rows = preflight_rows
+        # 流水线每块的行数，决定各阶段之间缓冲的数据量
+        if chunk_rows is None:
+            chunk_rows = getattr(settings, "FINANCE_PIPELINE_CHUNK_ROWS", 5000)
+        self.chunk_rows = chunk_rows
+        # 写出引擎："xlsxwriter" 或 "native"（直接生成 SpreadsheetML，可流式输出）
+        if writer_engine is None:
+            writer_engine = getattr(
+                settings, "FINANCE_EXCEL_WRITER_ENGINE", "xlsxwriter"
+            )
+        self.writer_engine = writer_engine
+        # 最近一次流式处理的记录数，流结束后由调用方读取
+        self.record_count = 0
+        # 需要写入处理日志（ProcessingLog）的信息: [(级别, 内容)]
+        self.job_logs: List[Tuple[str, str]] = []
+
+    def add_job_log(self, level: str, message: str) -> None:
+        """记录一条任务日志，由视图写入 ProcessingLog"""
+        self.job_logs.append((level, message))
+        self.logger.log(logging.getLevelName(level), message)
+
+    def _new_session(self, path: str) -> WorkbookSession:
+        """按处理器配置打开工作簿会话"""
+        return WorkbookSession(
+            path,
+            read_only=self.read_only,
+            engine=self.engine,
+            empty_row_limit=self.empty_row_limit,
+        )
+
+    def _log_skipped_rows(self, session: WorkbookSession) -> None:
+        """记录因连续空行而提前结束读取的工作表"""
+        for sheet_name, skipped in session.skipped_rows.items():
+            skipped_text = f" {skipped} 行" if skipped is not None else "剩余"
+            self.add_job_log(
+                "WARNING",
+                f"工作表 '{sheet_name}' 连续 {session.empty_row_limit} 行为空，"
+                f"视为数据结束，跳过其后{skipped_text}空白行",
+            )
 
     def get_real_date(self, month_day: Any) -> datetime.datetime:
         """将月日格式转换为完整日期"""
@@ -150,52 +230,48 @@ class ExcelProcessor:
         except Exception as e:
             raise ExcelProcessingError(f"日期解析错误: {str(e)}")
 
-    def parse_excel(
+    def _open_session(self, source: Union[str, WorkbookSession]) -> WorkbookSession:
+        """传入会话时直接复用，传入路径时临时打开工作簿"""
+        if isinstance(source, WorkbookSession):
+            return source
+        return self._new_session(source)
+
+    def _release_session(
+        self, source: Union[str, WorkbookSession], session: Optional[WorkbookSession]
+    ) -> None:
+        """关闭由路径临时打开的工作簿，共享会话由调用方负责关闭"""
+        if session is not None and session is not source:
+            session.close()
+
+    def iter_parse_sheet(
         self,
-        path: str,
-        sheet_name: str,
-        key_map: Dict[str, str],
-        max_col: int = 4,
-        start_row: int = 2,
-        header_row: int = 1,
-    ) -> List[Dict[str, Any]]:
-        """解析Excel文件"""
+        source: Union[str, WorkbookSession],
+        spec: SheetSpec,
+        check_list: Optional[Collection[Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """按工作表规格逐行解析，表头只读取并编译一次"""
+        session = None
         try:
-            result = []
-            wb = openpyxl.load_workbook(path, data_only=True)
+            session = self._open_session(source)
 
-            if sheet_name not in wb.sheetnames:
-                raise ExcelProcessingError(f"工作表 '{sheet_name}' 不存在")
+            if not session.has_sheet(spec.sheet_name):
+                raise ExcelProcessingError(f"工作表 '{spec.sheet_name}' 不存在")
 
-            sheet = wb[sheet_name]
+            yield from iter_mapped_rows(session, spec, check_list)
+
+        finally:
+            self._release_session(source, session)
+
+    def parse_sheet(
+        self, source: Union[str, WorkbookSession], spec: SheetSpec
+    ) -> List[Dict[str, Any]]:
+        """按工作表规格解析Excel文件"""
+        try:
+            mapped_result = list(self.iter_parse_sheet(source, spec))
+
+            if len(mapped_result) == 0:
+                self.logger.warning(f"工作表 '{spec.sheet_name}' 中没有数据")
 
-            for row in sheet.iter_rows(
-                min_row=start_row, values_only=True, max_col=max_col
-            ):
-                if row[0] is None:
-                    continue
-                result.append(row)
-
-            if len(result) == 0:
-                self.logger.warning(f"工作表 '{sheet_name}' 中没有数据")
-                return []
-
-            # 映射字段名
-            mapped_result = []
-            header_cells = list(sheet[header_row])
-
-            for i in range(len(result)):
-                row = result[i]
-                new_row = {}
-                for j in range(len(row)):
-                    if j >= len(header_cells):
-                        break
-                    header_value = header_cells[j].value
-                    if header_value in key_map:
-                        new_row[key_map[header_value]] = row[j]
-                mapped_result.append(new_row)
-
-            wb.close()
             return mapped_result
 
         except Exception as e:
@@ -203,86 +279,49 @@ class ExcelProcessor:
 
     def supplier_parse_helper(
         self,
-        path: str,
+        source: Union[str, WorkbookSession],
         sheet_name: str,
         key_map: Dict[str, str],
-        check_list: List[str],
+        check_list: Optional[Collection[Any]],
         start_row: int = 2,
         header_row: int = 1,
     ) -> List[Dict[str, Any]]:
         """供应商数据解析辅助函数"""
         try:
-            max_col = 4
-            result = []
-            wb = openpyxl.load_workbook(path, data_only=True)
+            spec = SheetSpec(sheet_name, key_map, 4, start_row, header_row)
+            mapped_result = list(self.iter_parse_sheet(source, spec, check_list))
 
-            if sheet_name not in wb.sheetnames:
-                raise ExcelProcessingError(f"工作表 '{sheet_name}' 不存在")
-
-            sheet = wb[sheet_name]
-
-            for row in sheet.iter_rows(
-                min_row=start_row, values_only=True, max_col=max_col
-            ):
-                item = row[0]
-                if item is None or item not in check_list:
-                    continue
-                result.append(row)
-
-            if len(result) == 0:
+            if len(mapped_result) == 0:
                 self.logger.warning(f"供应商工作表 '{sheet_name}' 中没有匹配的数据")
-                return []
-
-            # 映射字段名
-            mapped_result = []
-            header_cells = list(sheet[header_row])
-
-            for i in range(len(result)):
-                row = result[i]
-                new_row = {}
-                for j in range(len(row)):
-                    if j >= len(header_cells):
-                        break
-                    header_value = header_cells[j].value
-                    if header_value in key_map:
-                        new_row[key_map[header_value]] = row[j]
-                mapped_result.append(new_row)
-
-            wb.close()
+
             return mapped_result
 
         except Exception as e:
             raise ExcelProcessingError(f"解析供应商数据错误: {str(e)}")
 
-    def get_real_tax(self, row: Dict[str, Any]) -> float:
-        """计算实际税额"""
-        payment_type = row.get("paymentType", "")
-        remark2 = row.get("remark2", "")
-        tax = row.get("tax", 0)
-        real_tax = 0
-
-        if payment_type == "partial":
-            real_tax = self.get_fee_by_remark2(remark2)
-        else:
-            real_tax = tax
-
-        if not real_tax:
-            real_tax = 0
-
-        return float(real_tax)
-
-    def get_fee_code(self, fee_type_data: List[Dict[str, Any]], fee_type: str) -> str:
-        """获取费用代码"""
-        for item in fee_type_data:
-            if item.get("name") == fee_type:
-                return str(item.get("code", ""))
-            if fee_type == item.get("name", "") + "费":
-                return str(item.get("code", ""))
-            if fee_type == item.get("alias", ""):
-                return str(item.get("code", ""))
-            if fee_type == item.get("alias", "") + "费":
-                return str(item.get("code", ""))
-        return ""
+    def build_fee_resolver(
+        self, fee_type_data: List[Dict[str, Any]]
+    ) -> FeeTypeResolver:
+        """建立本次任务的费用类型解析器，并记录有歧义的写法"""
+        resolver = FeeTypeResolver(fee_type_data)
+        for variant, codes in resolver.ambiguous.items():
+            self.add_job_log(
+                "WARNING",
+                f"费用类型 '{variant}' 对应多个科目代码 {', '.join(codes)}，"
+                f"使用 {codes[0]}",
+            )
+        return resolver
+
+    def _log_fee_misses(self, resolver: FeeTypeResolver) -> None:
+        """记录未能解析出科目代码的费用类型"""
+        misses = resolver.miss_summary()
+        if not misses:
+            return
+        details = ", ".join(f"'{fee_type}' {count} 行" for fee_type, count in misses)
+        self.add_job_log(
+            "WARNING",
+            f"{sum(count for _, count in misses)} 行费用类型未找到科目代码: {details}",
+        )
 
     def get_fee_by_remark2(self, remark2: str) -> float:
         """从备注2中提取费用"""
@@ -298,346 +337,326 @@ class ExcelProcessor:
         except ValueError:
             raise ExcelProcessingError(f"备注2格式错误: {remark2}")
 
-    def append_data(
+    def index_by_short_name(
+        self, master_data: List[Dict[str, Any]]
+    ) -> Dict[Any, Dict[str, Any]]:
+        """按简称建立主数据索引，简称重复时保留第一条（与顺序查找结果一致）"""
+        index = {}
+        for item in master_data:
+            index.setdefault(item.get("shortName"), item)
+        return index
+
+    def transform_payment_columns(
+        self, base_data: List[Dict[str, Any]], start: int = 0
+    ) -> PaymentColumns:
+        """按列计算 FDate/FYear/FPeriod、归一后的付款方式及以分表示的金额"""
+        return PaymentColumns(
+            base_data, self.get_real_date, self.get_fee_by_remark2, start
+        )
+
+    def _unknown_master_errors(
         self,
-        base_data: List[Dict[str, Any]],
+        missing: Dict[Tuple[str, Any], None],
         supplier_data: List[Dict[str, Any]],
         project_data: List[Dict[str, Any]],
-        fee_type_data: List[Dict[str, Any]],
     ) -> List[Dict[str, Any]]:
-        """合并和处理数据"""
-        cannot_find = []
-
-        for i in range(len(base_data)):
-            row = base_data[i]
-            row["supplierStr"] = ""
-            row["projectStr"] = ""
-
-            # 查找供应商信息
-            for supplier in supplier_data:
-                if supplier.get("shortName") == row.get("supplier"):
-                    row["supplierStr"] = (
-                        "供应商---"
-                        + str(supplier.get("code", ""))
-                        + "---"
-                        + supplier.get("name", "")
-                    )
-                    break
-
-            # 查找项目信息
-            for project in project_data:
-                if project.get("shortName") == row.get("project"):
-                    row["projectStr"] = (
-                        "项目---"
-                        + str(project.get("code", ""))
-                        + "---"
-                        + project.get("name", "")
-                    )
-                    break
-
-            # 检查是否找到匹配项
-            if not row["supplierStr"]:
-                error_string = f"找不到供应商: {row.get('supplier', '')}"
-                cannot_find.append(error_string)
+        """
+        为找不到的供应商/项目生成错误明细，附带主数据中相近的简称
 
-            if not row["projectStr"]:
-                cannot_find.append(f"找不到项目: {row.get('project', '')}")
+        supplier_data 须是完整的供应商表：按基础数据过滤后的列表只含精确匹配的供应商，
+        拼错的简称在其中找不到原本的条目。
+        """
+        labels = {"supplier": "供应商", "project": "项目"}
+        master_data = {"supplier": supplier_data, "project": project_data}
+        # 只在出错时建立索引，正常处理不增加开销
+        indexes: Dict[str, NgramIndex] = {}
+
+        errors = []
+        for field, short_name in missing:
+            if field not in indexes:
+                indexes[field] = NgramIndex(
+                    item.get("shortName") for item in master_data[field]
+                )
+            suggestions = [
+                name
+                for name, _ in indexes[field].suggest(
+                    short_name, limit=SUGGESTION_LIMIT
+                )
+            ]
 
-            if len(cannot_find) > 0:
-                continue
+            message = f"找不到{labels[field]}: {short_name}"
+            if suggestions:
+                message += f"，是否为: {'、'.join(suggestions)}"
+            self.add_job_log("ERROR", message)
 
-            row["depStr"] = "部门---02---采购部"
-            row["depProjectStr"] = row["depStr"] + "," + row["projectStr"]
-            row["supplierProjectStr"] = row["supplierStr"] + "," + row["projectStr"]
+            error = self._preflight_error(DEFAULT_SHEET_NAME, message, field=field)
+            error["suggestions"] = suggestions
+            errors.append(error)
+        return errors
 
-            # 设置银行账户
-            pay_company = row.get("company", "")
-            row["FAccountNum_Bank"] = BANK_ACCOUNT_MAPPING.get(
-                pay_company, DEFAULT_BANK_ACCOUNT
+    def _join_payment_row(
+        self,
+        row: Dict[str, Any],
+        supplier_index: Dict[Any, Dict[str, Any]],
+        project_index: Dict[Any, Dict[str, Any]],
+        fee_resolver: FeeTypeResolver,
+        cannot_find: List[str],
+        missing: Dict[Tuple[str, Any], None],
+    ) -> None:
+        """关联一行数据的供应商、项目、银行账户与费用代码，找不到的记入 cannot_find"""
+        row["supplierStr"] = ""
+        row["projectStr"] = ""
+
+        # 查找供应商信息
+        supplier = supplier_index.get(row.get("supplier"))
+        if supplier is not None:
+            row["supplierStr"] = (
+                "供应商---"
+                + str(supplier.get("code", ""))
+                + "---"
+                + supplier.get("name", "")
             )
 
-            row["feeCode"] = self.get_fee_code(fee_type_data, row.get("feeType", ""))
-            real_date = self.get_real_date(row.get("date"))
-            row["FDate"] = real_date.strftime("%Y-%m-%d")
-            row["FYear"] = real_date.strftime("%Y")
-            row["FPeriod"] = real_date.strftime("%m")
+        # 查找项目信息
+        project = project_index.get(row.get("project"))
+        if project is not None:
+            row["projectStr"] = (
+                "项目---"
+                + str(project.get("code", ""))
+                + "---"
+                + project.get("name", "")
+            )
 
-            payment_type = row.get("paymentType", "")
-            if "定金" in payment_type:
-                row["paymentType"] = "partial"
-            if "全款" in payment_type:
-                row["paymentType"] = "full"
+        # 检查是否找到匹配项
+        if not row["supplierStr"]:
+            error_string = f"找不到供应商: {row.get('supplier', '')}"
+            cannot_find.append(error_string)
+            missing.setdefault(("supplier", row.get("supplier", "")))
 
-            real_tax = self.get_real_tax(row)
-            row["realTax"] = real_tax
-            row["remain"] = float(row.get("totalAmount", 0)) - real_tax
+        if not row["projectStr"]:
+            cannot_find.append(f"找不到项目: {row.get('project', '')}")
+            missing.setdefault(("project", row.get("project", "")))
 
         if len(cannot_find) > 0:
-            raise ExcelProcessingError(
-                f"请检查项目或供应商是否正确: {', '.join(cannot_find)}"
-            )
+            return
 
-        return base_data
+        row["depStr"] = "部门---02---采购部"
+        row["depProjectStr"] = row["depStr"] + "," + row["projectStr"]
+        row["supplierProjectStr"] = row["supplierStr"] + "," + row["projectStr"]
 
-    def gen_excel_row(
-        self, row: Dict[str, Any], index: int, user: User = None
-    ) -> List[Dict[str, Any]]:
-        """生成Excel行数据"""
-        # 通用数据
-        common_data = {
-            "FDate": row["FDate"],
-            "FYear": row["FYear"],
-            "FPeriod": row["FPeriod"],
-            "FGroupID": "记",
-            "FNumber": index,
-            "FCurrencyNum": "RMB",
-            "FCurrencyName": "人民币",
-            "FPreparerID": get_prepared_by_display_name(user),
-            "FCheckerID": "NONE",
-            "FApproveID": "NONE",
-            "FCashierID": "NONE",
-            "FHandler": "",
-            "FSettleTypeID": "*",
-            "FSettleNo": "",
-            "FExplanation": row.get("FExplanation", ""),
-            "FQuantity": 0,
-            "FMeasureUnitID": "*",
-            "FUnitPrice": 0,
-            "FReference": "",
-            "FTransDate": row["FDate"],
-            "FTransNo": "",
-            "FAttachments": 0,
-            "FSerialNum": index,
-            "FObjectName": "",
-            "FParameter": "",
-            "FExchangeRate": 1,
-            "FPosted": 0,
-            "FInternalInd": "",
-            "FCashFlow": "",
-        }
+        # 设置银行账户
+        pay_company = row.get("company", "")
+        row["FAccountNum_Bank"] = BANK_ACCOUNT_MAPPING.get(
+            pay_company, DEFAULT_BANK_ACCOUNT
+        )
 
-        payment_type = row.get("paymentType", "")
-        real_tax = row.get("realTax", 0)
-        total_amount = float(row.get("totalAmount", 0))
-        remain = row.get("remain", 0)
-
-        # 根据支付类型生成不同的行数据
-        if payment_type == "partial":
-            unique_data = [
-                {
-                    "FAccountNum": row.get("feeCode", ""),
-                    "FAccountName": row.get("feeType", ""),
-                    "FAmountFor": real_tax,
-                    "FDebit": real_tax,
-                    "FCredit": 0,
-                    "FEntryID": 0,
-                    "FItem": row.get("depProjectStr", ""),
-                },
-                {
-                    "FAccountNum": "1402",
-                    "FAccountName": "在途物资",
-                    "FAmountFor": remain,
-                    "FDebit": remain,
-                    "FCredit": 0,
-                    "FEntryID": 1,
-                    "FItem": "",
-                },
-                {
-                    "FAccountNum": "2202.01",
-                    "FAccountName": "应付供应商",
-                    "FAmountFor": total_amount,
-                    "FDebit": 0,
-                    "FCredit": total_amount,
-                    "FEntryID": 2,
-                    "FItem": row.get("supplierProjectStr", ""),
-                },
-                {
-                    "FAccountNum": "2202.01",
-                    "FAccountName": "应付供应商",
-                    "FAmountFor": real_tax,
-                    "FDebit": real_tax,
-                    "FCredit": 0,
-                    "FEntryID": 3,
-                    "FItem": row.get("supplierProjectStr", ""),
-                },
-                {
-                    "FAccountNum": row.get("FAccountNum_Bank", ""),
-                    "FAccountName": "银行",
-                    "FAmountFor": real_tax,
-                    "FDebit": 0,
-                    "FCredit": real_tax,
-                    "FEntryID": 4,
-                    "FItem": "",
-                },
-            ]
-        elif payment_type == "full":
-            if real_tax == 0:
-                # 全款不含税
-                unique_data = [
-                    {
-                        "FAccountNum": row.get("feeCode", ""),
-                        "FAccountName": row.get("feeType", ""),
-                        "FAmountFor": remain,
-                        "FDebit": remain,
-                        "FCredit": 0,
-                        "FEntryID": 0,
-                        "FItem": row.get("depProjectStr", ""),
-                    },
-                    {
-                        "FAccountNum": "2202.01",
-                        "FAccountName": "应付供应商",
-                        "FAmountFor": total_amount,
-                        "FDebit": 0,
-                        "FCredit": total_amount,
-                        "FEntryID": 1,
-                        "FItem": row.get("supplierProjectStr", ""),
-                    },
-                    {
-                        "FAccountNum": "2202.01",
-                        "FAccountName": "应付供应商",
-                        "FAmountFor": total_amount,
-                        "FDebit": total_amount,
-                        "FCredit": 0,
-                        "FEntryID": 2,
-                        "FItem": row.get("supplierProjectStr", ""),
-                    },
-                    {
-                        "FAccountNum": row.get("FAccountNum_Bank", ""),
-                        "FAccountName": "银行",
-                        "FAmountFor": total_amount,
-                        "FDebit": 0,
-                        "FCredit": total_amount,
-                        "FEntryID": 3,
-                        "FItem": "",
-                    },
-                ]
-            else:
-                # 全款含税
-                unique_data = [
-                    {
-                        "FAccountNum": row.get("feeCode", ""),
-                        "FAccountName": row.get("feeType", ""),
-                        "FAmountFor": remain,
-                        "FDebit": remain,
-                        "FCredit": 0,
-                        "FEntryID": 0,
-                        "FItem": row.get("depProjectStr", ""),
-                    },
-                    {
-                        "FAccountNum": "2221.01.01",
-                        "FAccountName": "进项税额",
-                        "FAmountFor": real_tax,
-                        "FDebit": real_tax,
-                        "FCredit": 0,
-                        "FEntryID": 1,
-                        "FItem": "",
-                    },
-                    {
-                        "FAccountNum": "2202.01",
-                        "FAccountName": "应付供应商",
-                        "FAmountFor": total_amount,
-                        "FDebit": 0,
-                        "FCredit": total_amount,
-                        "FEntryID": 2,
-                        "FItem": row.get("supplierProjectStr", ""),
-                    },
-                    {
-                        "FAccountNum": "2202.01",
-                        "FAccountName": "应付供应商",
-                        "FAmountFor": total_amount,
-                        "FDebit": total_amount,
-                        "FCredit": 0,
-                        "FEntryID": 3,
-                        "FItem": row.get("supplierProjectStr", ""),
-                    },
-                    {
-                        "FAccountNum": row.get("FAccountNum_Bank", ""),
-                        "FAccountName": "银行",
-                        "FAmountFor": total_amount,
-                        "FDebit": 0,
-                        "FCredit": total_amount,
-                        "FEntryID": 4,
-                        "FItem": "",
-                    },
-                ]
-        else:
-            unique_data = []
+        row["feeCode"] = fee_resolver.resolve(row.get("feeType", "")) or ""
 
-        # 合并数据
-        result = []
-        for item in unique_data:
-            result.append({**item, **common_data})
+    def _unknown_master_error(
+        self,
+        cannot_find: List[str],
+        missing: Dict[Tuple[str, Any], None],
+        supplier_data: List[Dict[str, Any]],
+        project_data: List[Dict[str, Any]],
+    ) -> ExcelProcessingError:
+        """找不到供应商/项目时的异常"""
+        return ExcelProcessingError(
+            f"请检查项目或供应商是否正确: {', '.join(cannot_find)}",
+            errors=self._unknown_master_errors(missing, supplier_data, project_data),
+        )
 
-        return result
+    def iter_payment_chunks(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        supplier_data: List[Dict[str, Any]],
+        project_data: List[Dict[str, Any]],
+        fee_type_data: List[Dict[str, Any]],
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        流水线的关联阶段：按块关联主数据并计算日期、付款方式和金额
 
-    def gen_excel_data(
-        self, data: List[Dict[str, Any]], user: User = None
-    ) -> List[List[Dict[str, Any]]]:
-        """生成所有Excel数据"""
-        excel_data = []
-        index = 0
+        出现找不到的供应商/项目后不再产出数据，但继续读完剩余行，
+        以便一次报告所有找不到的简称。supplier_data 为完整的供应商表
+        （见 load_payment_master_data），相近简称直接从中查找。
+        """
+        cannot_find: List[str] = []
+        missing: Dict[Tuple[str, Any], None] = {}
+
+        supplier_index = self.index_by_short_name(supplier_data)
+        project_index = self.index_by_short_name(project_data)
+        fee_resolver = self.build_fee_resolver(fee_type_data)
+
+        start = 0
+        for chunk in chunked(rows, self.chunk_rows):
+            for row in chunk:
+                self._join_payment_row(
+                    row,
+                    supplier_index,
+                    project_index,
+                    fee_resolver,
+                    cannot_find,
+                    missing,
+                )
+            if not cannot_find:
+                try:
+                    columns = self.transform_payment_columns(chunk, start)
+                except ValueError as e:
+                    raise ExcelProcessingError(str(e))
+                columns.write_back(chunk)
+                yield chunk
+            start += len(chunk)
 
-        for row in data:
-            index = index + 1
-            excel_data.append(self.gen_excel_row(row, index, user))
+        if len(cannot_find) > 0:
+            raise self._unknown_master_error(
+                cannot_find, missing, supplier_data, project_data
+            )
+        if start == 0:
+            raise ExcelProcessingError("基础数据为空")
+        self._log_fee_misses(fee_resolver)
+
+    def new_voucher_template(
+        self, user: User = None, context: Optional[JobContext] = None, **fields: Any
+    ) -> VoucherHeaderTemplate:
+        """生成本批次的凭证表头模板（有任务上下文时直接使用其中的制单人）"""
+        if context is not None:
+            preparer = context.preparer
+        else:
+            preparer = get_prepared_by_display_name(user)
+        return VoucherHeaderTemplate(preparer, **fields)
 
-        return excel_data
+    def _payment_header_for(
+        self, template: VoucherHeaderTemplate
+    ) -> Callable[[Dict[str, Any]], List[Any]]:
+        """排单行 → 凭证表头"""
+        return lambda row: template.for_date(row["FDate"], row["FYear"], row["FPeriod"])
 
-    def write_excel(self, excel_file: str, data: List[List[Dict[str, Any]]]) -> None:
-        """写入Excel文件"""
+    def iter_payment_vouchers(
+        self,
+        chunks: Iterable[List[Dict[str, Any]]],
+        context: JobContext,
+    ) -> Iterator[List[VoucherEntry]]:
+        """流水线的生成阶段：按块生成凭证，逐张产出"""
+        template = self.new_voucher_template(context.user, context)
+        header_for = self._payment_header_for(template)
+
+        number = 1
+        for chunk in chunks:
+            vouchers = emit_payment_vouchers(chunk, header_for, start=number)
+            number += len(chunk)
+            yield from vouchers
+
+    def write_excel(
+        self,
+        excel_file: str,
+        data: Iterable[List[VoucherEntry]],
+        output_format: str = "xlsx",
+    ) -> None:
+        """写入Excel文件（data 可以是流水线上游的生成器）"""
         try:
-            workbook = xlsxwriter.Workbook(excel_file)
+            if output_format in TEXT_FORMATS:
+                write_text(
+                    excel_file, chain.from_iterable(data), TEXT_FORMATS[output_format]
+                )
+                return
+            self._write_voucher_workbook(excel_file, self._payment_output_rows(data))
+
+        except ExcelProcessingError:
+            # 上游阶段的错误原样抛出，工作簿不关闭，不会留下不完整的文件
+            raise
+        except Exception as e:
+            raise ExcelProcessingError(f"写入Excel文件错误: {str(e)}")
 
-            # 写入schema工作表
-            worksheet = workbook.add_worksheet("t_Schema")
+    def load_schema(self) -> SchemaRows:
+        """t_Schema 各行（按 SCHEMA_HEADERS 列顺序），文件不存在时为空"""
+        try:
+            rows = SCHEMA_CACHE.get()
+        except ValueError as e:
+            raise ExcelProcessingError(str(e))
 
-            # 尝试读取schema文件
-            schema_file_path = os.path.join(
-                os.path.dirname(__file__), "..", "..", "t_Schema.json"
+        if SCHEMA_CACHE.missing:
+            self.logger.warning("t_Schema.json 文件未找到，使用空schema")
+        if SCHEMA_CACHE.error:
+            self.logger.warning(
+                f"t_Schema.json 重新加载失败，继续使用上一次的内容: {SCHEMA_CACHE.error}"
             )
-            try:
-                with open(schema_file_path, "r", encoding="utf-8") as f:
-                    schema = json.load(f)
-            except FileNotFoundError:
-                self.logger.warning("t_Schema.json 文件未找到，使用空schema")
-                schema = []
-
-            # 写入schema表头
-            for i, header in enumerate(SCHEMA_HEADERS):
-                worksheet.write(0, i, header)
-
-            # 写入schema数据
-            for i, schema_item in enumerate(schema):
-                for j, header in enumerate(SCHEMA_HEADERS):
-                    if header in schema_item:
-                        worksheet.write(i + 1, j, schema_item[header])
-
-            # 写入数据工作表
-            worksheet = workbook.add_worksheet("Page1")
-
-            # 写入数据表头
-            for i, header in enumerate(EXCEL_HEADERS):
-                worksheet.write(0, i, header)
-
-            # 写入数据
-            sum_row = 0
-            for i in range(len(data)):
-                for j in range(len(data[i])):
-                    sum_row = sum_row + 1
-                    for k, header in enumerate(EXCEL_HEADERS):
-                        if header in data[i][j]:
-                            worksheet.write(sum_row, k, data[i][j][header])
-
-            workbook.close()
+        if SCHEMA_CACHE.ignored:
+            self.logger.warning(
+                f"t_Schema.json 中的未知列已忽略: {', '.join(SCHEMA_CACHE.ignored)}"
+            )
+        return rows
+
+    def _payment_output_rows(
+        self, data: Iterable[List[VoucherEntry]]
+    ) -> Iterator[List[Any]]:
+        """排单分录的输出行（按列顺序，金额列由分换算为元）"""
+        for entries in data:
+            for entry in entries:
+                yield output_row(entry)
+
+    def _voucher_sheets(self, rows: Iterable[List[Any]]) -> List[Sheet]:
+        """原生写出引擎的两个工作表，t_Schema 的XML按 schema 内容缓存"""
+        schema_rows = (tuple(SCHEMA_HEADERS),) + tuple(self.load_schema())
+        return [
+            ("t_Schema", render_rows(schema_rows)),
+            ("Page1", chain([EXCEL_HEADERS], rows)),
+        ]
+
+    def _write_voucher_workbook(
+        self, excel_file: str, rows: Iterable[List[Any]]
+    ) -> None:
+        """
+        写出凭证导入文件：t_Schema 工作表和 Page1 分录工作表
 
-        except Exception as e:
-            raise ExcelProcessingError(f"写入Excel文件错误: {str(e)}")
+        使用 constant_memory 模式，每写完一行即刷到临时文件，内存占用与行数无关；
+        该模式要求按行号递增写入，两个工作表依次整行写出。
+        rows 在写入过程中才生成，出错时工作簿同样关闭（临时文件随之删除），
+        不完整的输出文件由 _remove_output 删除。
+        """
+        try:
+            if self.writer_engine == "native":
+                write_workbook(excel_file, self._voucher_sheets(rows))
+                return
+
+            workbook = xlsxwriter.Workbook(excel_file, {"constant_memory": True})
+            try:
+                # 写入schema工作表：各行已按 SCHEMA_HEADERS 列顺序排好
+                worksheet = workbook.add_worksheet("t_Schema")
+                worksheet.write_row(0, 0, SCHEMA_HEADERS)
+                for i, values in enumerate(self.load_schema(), start=1):
+                    worksheet.write_row(i, 0, values)
+
+                # 写入数据工作表
+                worksheet = workbook.add_worksheet("Page1")
+                worksheet.write_row(0, 0, EXCEL_HEADERS)
+                for i, values in enumerate(rows, start=1):
+                    worksheet.write_row(i, 0, values)
+            finally:
+                workbook.close()
+        except Exception:
+            self._remove_output(excel_file)
+            raise
+
+    def new_output_path(
+        self, process_type: str = "payment", output_format: str = "xlsx"
+    ) -> str:
+        """生成输出文件路径（MEDIA_ROOT/outputs/排单_时间戳.xlsx），并确保目录存在"""
+        prefix = "报销" if process_type == "reimbursement" else "排单"
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = ".xlsx"
+        if output_format in TEXT_FORMATS:
+            extension = TEXT_FORMATS[output_format].extension
+        output_path = os.path.join(
+            settings.MEDIA_ROOT, "outputs", f"{prefix}_{timestamp}{extension}"
+        )
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        return output_path
 
     def process_excel_file(
         self,
         file_path: str,
         process_type: str = "payment",
         user: User = None,
+        output_format: str = "xlsx",
     ) -> Tuple[str, int]:
         """
         处理Excel文件的主要方法
@@ -646,137 +665,574 @@ class ExcelProcessor:
             file_path: 输入Excel文件路径
             process_type: 处理类型 ("payment" 或 "reimbursement")
             user: Django用户对象，用于获取制单人信息
+            output_format: 输出格式，见 OUTPUT_FORMATS（xlsx、csv 或金蝶引入文本 txt）
 
         Returns:
             tuple: (输出文件路径, 处理的记录数)
         """
         self.logger.info(f"开始处理Excel文件: {file_path}, 处理类型: {process_type}")
+        self.job_logs = []
+        self._check_output_format(output_format)
+
+        # 完整解析之前先预检，有问题直接拒绝
+        self._check_preflight(file_path, process_type)
 
+        # 制单人等任务级信息只解析一次
+        context = JobContext.for_user(user)
         if process_type == "reimbursement":
-            return self.process_reimbursement_file(file_path, user)
+            return self.process_reimbursement_file(
+                file_path, context.user, context, output_format
+            )
         else:
-            return self.process_payment_file(file_path, user)
+            return self.process_payment_file(
+                file_path, context.user, context, output_format
+            )
 
-    def process_payment_file(
-        self, file_path: str, user: User = None
-    ) -> Tuple[str, int]:
-        """处理排单文件"""
-        self.logger.info(f"开始处理排单Excel文件: {file_path}")
+    def stream_excel_file(
+        self,
+        file_path: str,
+        process_type: str = "payment",
+        user: User = None,
+        output_path: Optional[str] = None,
+        output_format: str = "xlsx",
+    ) -> Iterator[bytes]:
+        """
+        处理Excel文件，以字节流逐段产出输出文件（xlsx 使用 native 写出引擎）
 
+        预检、主数据加载等能提前发现的问题都在产出第一段字节之前抛出，
+        调用方可以先取第一段再开始发送。流结束后 record_count 为处理的记录数。
+
+        Args:
+            output_path: 不为None时同时把输出写入该文件（需要保留历史文件时使用），
+                处理失败或流未读完时删除该文件
+            output_format: 输出格式，见 OUTPUT_FORMATS
+        """
+        self.logger.info(
+            f"开始流式处理Excel文件: {file_path}, 处理类型: {process_type}"
+        )
+        self.job_logs = []
+        self.record_count = 0
+        self._check_output_format(output_format)
+        self._check_preflight(file_path, process_type)
+        context = JobContext.for_user(user)
+        label = "报销" if process_type == "reimbursement" else "排单"
+
+        session = None
+        persisted = None
+        completed = False
         try:
-            # 解析基础数据
-            base_data = self.parse_excel(
-                file_path,
-                DEFAULT_SHEET_NAME,
-                key_map=KEY_MAPPINGS["pay"],
-                max_col=12,
-                start_row=3,
-                header_row=2,
+            session = self._new_session(file_path)
+            if process_type == "reimbursement":
+                entries = self._reimbursement_entries(session, context)
+                rows = self._reimbursement_output_rows(entries)
+                counter = None
+                self.record_count = len(entries)
+            else:
+                counter, vouchers = self._payment_vouchers(session, context)
+                # 先取出第一张凭证：第一块数据的关联错误在发送任何字节之前抛出
+                vouchers = chain(list(islice(vouchers, 1)), vouchers)
+                entries = chain.from_iterable(vouchers)
+                rows = map(output_row, entries)
+
+            if output_format in TEXT_FORMATS:
+                chunks = iter_text(entries, TEXT_FORMATS[output_format])
+            else:
+                chunks = iter_workbook(self._voucher_sheets(rows))
+
+            if output_path is not None:
+                persisted = open(output_path, "wb")
+            for chunk in chunks:
+                if persisted is not None:
+                    persisted.write(chunk)
+                yield chunk
+
+            if counter is not None:
+                self._log_skipped_rows(session)
+                self.record_count = counter.count
+            completed = True
+            self.logger.info(f"{label}Excel文件流式处理完成: {file_path}")
+
+        except Exception as e:
+            self.logger.error(f"处理{label}Excel文件时发生错误: {str(e)}")
+            raise ExcelProcessingError(
+                f"处理{label}Excel文件失败: {str(e)}", errors=getattr(e, "errors", None)
             )
 
-            if not base_data:
-                raise ExcelProcessingError("基础数据为空")
+        finally:
+            if persisted is not None:
+                persisted.close()
+                if not completed:
+                    self._remove_output(output_path)
+            if session is not None:
+                session.close()
 
-            # 提取供应商列表
-            supplier_check_list = [
-                item.get("supplier", "") for item in base_data if item.get("supplier")
-            ]
+    def convert_output(self, output_path: str, output_format: str) -> Iterator[bytes]:
+        """
+        把已保存的输出文件转换为文本格式，逐段产出字节（下载时选择格式）
 
-            # 解析辅助数据
-            fee_type_data = self.parse_excel(
-                file_path,
-                "核算项目_费用代码",
-                max_col=3,
-                key_map=KEY_MAPPINGS["feeType"],
+        xlsx 输出从 Page1 工作表读回分录；文本格式之间直接转换。
+        文本格式不记录单元格类型，不能再转换回 xlsx。
+        """
+        text_format = TEXT_FORMATS.get(output_format)
+        if text_format is None:
+            raise ExcelProcessingError(
+                f"只能转换为文本格式: {', '.join(TEXT_FORMATS)}，xlsx 请重新导出"
             )
-            project_data = self.parse_excel(
-                file_path, "核算项目_项目", key_map=KEY_MAPPINGS["project"]
+        try:
+            yield from iter_text(self.iter_output_entries(output_path), text_format)
+        except Exception as e:
+            self.logger.error(f"转换输出文件时发生错误: {str(e)}")
+            raise ExcelProcessingError(f"转换输出文件失败: {str(e)}")
+
+    def iter_output_entries(self, output_path: str) -> Iterator[List[Any]]:
+        """已保存的输出文件中的分录（按列顺序，金额列为分）"""
+        source_format = format_for_path(output_path)
+        if source_format in TEXT_FORMATS:
+            yield from read_text(output_path, TEXT_FORMATS[source_format])
+            return
+        with WorkbookSession(
+            output_path, read_only=True, engine=self.engine
+        ) as session:
+            for cells in session.iter_rows(
+                "Page1", min_row=2, max_col=len(EXCEL_HEADERS)
+            ):
+                yield entry_from_cells(cells, derive_amount=True)
+
+    def _check_output_format(self, output_format: str) -> None:
+        if output_format not in OUTPUT_FORMATS:
+            raise ExcelProcessingError(
+                f"不支持的输出格式: {output_format}，可选: {', '.join(OUTPUT_FORMATS)}"
             )
-            supplier_data = self.supplier_parse_helper(
-                file_path,
-                "核算项目_供应商",
-                key_map=KEY_MAPPINGS["supplier"],
-                check_list=supplier_check_list,
+
+    def _check_preflight(self, file_path: str, process_type: str) -> None:
+        """按配置预检文件，有问题时抛出带错误明细的异常"""
+        if not self.preflight_rows:
+            return
+        errors = self.preflight(file_path, process_type)
+        if errors:
+            for error in errors:
+                self.add_job_log("ERROR", self._format_preflight_error(error))
+            raise ExcelProcessingError(
+                f"文件预检未通过，共 {len(errors)} 个问题", errors=errors
             )
 
-            # 处理数据
-            processed_data = self.append_data(
-                base_data, supplier_data, project_data, fee_type_data
+    def preflight(
+        self, file_path: str, process_type: str = "payment"
+    ) -> List[Dict[str, Any]]:
+        """
+        预检上传文件
+
+        只读取各必需工作表开头的几行，检查工作表是否存在、表头位置是否与
+        KEY_MAPPINGS 一致以及日期格式，不做完整解析。
+
+        Returns:
+            错误列表，每项为 {"sheet", "row", "field", "message"}，为空表示通过
+        """
+        errors = []
+        session = None
+        try:
+            session = WorkbookSession(file_path, read_only=True, engine=self.engine)
+            if process_type == "reimbursement":
+                self._preflight_reimbursement(session, errors)
+            else:
+                self._preflight_payment(session, errors)
+        except Exception as e:
+            errors.append(self._preflight_error(None, f"无法读取文件: {str(e)}"))
+        finally:
+            if session is not None:
+                session.close()
+
+        return errors
+
+    def _preflight_error(
+        self,
+        sheet: Optional[str],
+        message: str,
+        row: Optional[int] = None,
+        field: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """构造一条预检错误"""
+        return {"sheet": sheet, "row": row, "field": field, "message": message}
+
+    def _format_preflight_error(self, error: Dict[str, Any]) -> str:
+        """预检错误的文字描述"""
+        location = ""
+        if error["sheet"]:
+            location += f"工作表 '{error['sheet']}' "
+        if error["row"]:
+            location += f"第 {error['row']} 行 "
+        return location + error["message"]
+
+    def _read_head_rows(
+        self,
+        session: WorkbookSession,
+        sheet_name: str,
+        count: int,
+        max_col: int,
+    ) -> List[Tuple[Any, ...]]:
+        """读取工作表开头的若干行（只读前 max_col 列）"""
+        rows = session.iter_rows(sheet_name, min_row=1, max_col=max_col)
+        try:
+            return list(islice(rows, count))
+        finally:
+            rows.close()
+
+    def _preflight_payment(
+        self, session: WorkbookSession, errors: List[Dict[str, Any]]
+    ) -> None:
+        """预检排单文件：工作表、表头位置，以及基础数据的日期"""
+        for key in ("pay", "feeType", "project", "supplier"):
+            spec = SHEET_SPECS[key]
+            if not session.has_sheet(spec.sheet_name):
+                errors.append(
+                    self._preflight_error(None, f"缺少工作表 '{spec.sheet_name}'")
+                )
+                continue
+
+            head_rows = self._read_head_rows(
+                session,
+                spec.sheet_name,
+                spec.start_row - 1 + self.preflight_rows,
+                max_col=max(spec.max_col, PREFLIGHT_HEADER_COLUMNS),
             )
-            excel_data = self.gen_excel_data(processed_data, user)
+            self._preflight_headers(spec, head_rows, errors)
 
-            # 生成输出文件路径
-            now = datetime.datetime.now()
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
-            output_filename = f"排单_{timestamp}.xlsx"
-            output_path = os.path.join(settings.MEDIA_ROOT, "outputs", output_filename)
+            if key == "pay":
+                self._preflight_payment_dates(spec, head_rows, errors)
 
-            # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    def _preflight_headers(
+        self,
+        spec: SheetSpec,
+        head_rows: List[Tuple[Any, ...]],
+        errors: List[Dict[str, Any]],
+    ) -> None:
+        """检查 key_map 中的表头是否都在表头行的前 max_col 列内"""
+        header = ()
+        if len(head_rows) >= spec.header_row:
+            header = head_rows[spec.header_row - 1]
 
-            # 写入Excel文件
-            self.write_excel(output_path, excel_data)
+        for header_value, field in spec.key_map.items():
+            if header_value in header[: spec.max_col]:
+                continue
+
+            row_number = spec.header_row
+            if header_value in header:
+                column = header.index(header_value) + 1
+                message = (
+                    f"表头 '{header_value}' 应在前 {spec.max_col} 列内，"
+                    f"实际在第 {column} 列"
+                )
+            else:
+                found_row = next(
+                    (
+                        index
+                        for index, row in enumerate(head_rows, start=1)
+                        if header_value in row
+                    ),
+                    None,
+                )
+                if found_row is not None:
+                    row_number = found_row
+                    message = f"表头 '{header_value}' 应在第 {spec.header_row} 行"
+                else:
+                    message = f"缺少表头 '{header_value}'"
+
+            errors.append(
+                self._preflight_error(
+                    spec.sheet_name, message, row=row_number, field=field
+                )
+            )
+
+    def _preflight_payment_dates(
+        self,
+        spec: SheetSpec,
+        head_rows: List[Tuple[Any, ...]],
+        errors: List[Dict[str, Any]],
+    ) -> None:
+        """检查前几行基础数据的日期能否解析"""
+        if len(head_rows) < spec.header_row:
+            return
+        header = head_rows[spec.header_row - 1][: spec.max_col]
+        if "日期" not in header:
+            return
+        column = header.index("日期")
+
+        data_rows = head_rows[spec.start_row - 1 :]
+        for row_number, row in enumerate(data_rows, start=spec.start_row):
+            # 与解析时一致，第一列为空的行不处理
+            if not row or row[0] is None:
+                continue
+            value = row[column] if column < len(row) else None
+            try:
+                self.get_real_date(value)
+            except ExcelProcessingError as e:
+                errors.append(
+                    self._preflight_error(
+                        spec.sheet_name, str(e), row=row_number, field="date"
+                    )
+                )
+
+    def _preflight_reimbursement(
+        self, session: WorkbookSession, errors: List[Dict[str, Any]]
+    ) -> None:
+        """预检报销文件：工作表、顶部信息行及其日期"""
+        sheet_name = REIMBURSEMENT_SHEET_NAME
+        if not session.has_sheet(sheet_name):
+            errors.append(self._preflight_error(None, f"缺少工作表 '{sheet_name}'"))
+            return
+
+        head_rows = self._read_head_rows(
+            session,
+            sheet_name,
+            REIMBURSEMENT_DETAIL_START_ROW - 1 + self.preflight_rows,
+            max_col=16,
+        )
+        for row_number, row in enumerate(head_rows, start=1):
+            if row[0] != "日期":
+                continue
+            # 报销分录统一使用第一条顶部信息的日期
+            try:
+                self.get_real_date(row[1])
+            except ExcelProcessingError as e:
+                errors.append(
+                    self._preflight_error(
+                        sheet_name, str(e), row=row_number, field="date"
+                    )
+                )
+            return
+
+        errors.append(
+            self._preflight_error(sheet_name, "未找到以“日期”开头的报销人信息行")
+        )
+
+    def process_payment_file(
+        self,
+        file_path: str,
+        user: User = None,
+        context: Optional[JobContext] = None,
+        output_format: str = "xlsx",
+    ) -> Tuple[str, int]:
+        """
+        处理排单文件
+
+        主数据整表加载后，基础数据按块流经 解析 → 关联 → 生成 → 写出，
+        内存中只保留主数据和少量数据块；任一行出错时任务失败并删除未完成的输出文件。
+        非只读的 openpyxl 读取会把整个工作簿载入内存，此时峰值内存仍随行数增长。
+        """
+        self.logger.info(f"开始处理排单Excel文件: {file_path}")
+
+        session = None
+        output_path = None
+        try:
+            # 整个任务只加载一次工作簿，各工作表共用
+            session = self._new_session(file_path)
+
+            if context is None:
+                context = JobContext.for_user(user)
+            rows, vouchers = self._payment_vouchers(session, context)
+
+            # 边读边写
+            output_path = self.new_output_path("payment", output_format)
+            self.write_excel(output_path, vouchers, output_format)
+            self._log_skipped_rows(session)
 
             self.logger.info(f"排单Excel文件处理完成: {output_path}")
-            return output_path, len(processed_data)
+            return output_path, rows.count
 
         except Exception as e:
+            self._remove_output(output_path)
             self.logger.error(f"处理排单Excel文件时发生错误: {str(e)}")
-            raise ExcelProcessingError(f"处理排单Excel文件失败: {str(e)}")
+            raise ExcelProcessingError(
+                f"处理排单Excel文件失败: {str(e)}", errors=getattr(e, "errors", None)
+            )
 
-    def process_reimbursement_file(
-        self, file_path: str, user: User = None
-    ) -> Tuple[str, int]:
-        """处理报销文件"""
-        self.logger.info(f"开始处理报销Excel文件: {file_path}")
+        finally:
+            if session is not None:
+                session.close()
+
+    def _payment_vouchers(
+        self, session: WorkbookSession, context: JobContext
+    ) -> Tuple[Counted, Iterator[List[VoucherEntry]]]:
+        """
+        组装排单流水线
+
+        主数据是流水线中唯一需要整表读入的部分，在这里加载；
+        返回 (计数的基础数据行, 惰性产出的凭证)，解析、关联、生成各阶段串联。
+        """
+        fee_type_data, project_data, supplier_data = self.load_payment_master_data(
+            session
+        )
+        rows = Counted(self.iter_payment_rows(session))
+        chunks = self.iter_payment_chunks(
+            rows, supplier_data, project_data, fee_type_data
+        )
+        return rows, self.iter_payment_vouchers(chunks, context)
+
+    def _remove_output(self, output_path: Optional[str]) -> None:
+        """删除处理失败时未完成的输出文件"""
+        if output_path and os.path.exists(output_path):
+            try:
+                os.remove(output_path)
+            except OSError as e:
+                self.logger.warning(f"删除未完成的输出文件失败: {output_path}, {e}")
 
+    def iter_payment_rows(self, session: WorkbookSession) -> Iterator[Dict[str, Any]]:
+        """流水线的解析阶段：逐行读取基础数据"""
         try:
-            # 解析费用代码映射表
-            fee_type_mapping = self.parse_reimbursement_fee_mapping(file_path)
+            yield from self.iter_parse_sheet(session, SHEET_SPECS["pay"])
+        except ExcelProcessingError:
+            raise
+        except Exception as e:
+            raise ExcelProcessingError(f"解析Excel文件错误: {str(e)}")
 
-            # 解析顶部信息（报销人、日期、银行等）
-            top_infos = self.parse_reimbursement_top_info(file_path)
+    def load_supplier_candidates(
+        self, source: Union[str, WorkbookSession]
+    ) -> List[Dict[str, Any]]:
+        """完整的供应商表（不按基础数据过滤），用于推荐相近的供应商简称"""
+        supplier_spec = SHEET_SPECS["supplier"]
+        return self.supplier_parse_helper(
+            source,
+            supplier_spec.sheet_name,
+            key_map=supplier_spec.key_map,
+            check_list=None,
+        )
 
-            # 解析基础报销数据
-            base_data = self.parse_reimbursement_base_data(file_path, len(top_infos))
+    def load_payment_master_data(self, session: WorkbookSession) -> Tuple[List, ...]:
+        """
+        加载主数据工作表（费用代码、项目、供应商）
+
+        供应商表整表加载，不再按基础数据中出现的供应商过滤，基础数据因此只需读一遍。
+        """
+        if self.parallel:
+            return self._load_payment_master_data_parallel(session)
+
+        fee_type_data = self.parse_sheet(session, SHEET_SPECS["feeType"])
+        project_data = self.parse_sheet(session, SHEET_SPECS["project"])
+        supplier_data = self.load_supplier_candidates(session)
+        return fee_type_data, project_data, supplier_data
+
+    def _load_payment_master_data_parallel(
+        self, session: WorkbookSession
+    ) -> Tuple[List, ...]:
+        """在进程池中同时解析各主数据工作表"""
+        session_options = {
+            "read_only": self.read_only,
+            "engine": self.engine,
+            "empty_row_limit": self.empty_row_limit,
+        }
+        with SheetParsePool(session.path, session_options) as pool:
+            fee_type_future = pool.submit(SHEET_SPECS["feeType"])
+            project_future = pool.submit(SHEET_SPECS["project"])
+            supplier_future = pool.submit(SHEET_SPECS["supplier"])
 
-            # 处理报销数据，按报销人分组生成会计分录
-            result_data = self.process_reimbursement_data(
-                top_infos, base_data, fee_type_mapping, user
+            fee_type_data = self._collect_sheet_result(
+                session, fee_type_future, SHEET_SPECS["feeType"]
+            )
+            project_data = self._collect_sheet_result(
+                session, project_future, SHEET_SPECS["project"]
+            )
+            supplier_data = self._collect_sheet_result(
+                session, supplier_future, SHEET_SPECS["supplier"], supplier=True
             )
 
-            # 生成输出文件路径
-            now = datetime.datetime.now()
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
-            output_filename = f"报销_{timestamp}.xlsx"
-            output_path = os.path.join(settings.MEDIA_ROOT, "outputs", output_filename)
+        return fee_type_data, project_data, supplier_data
 
-            # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    def _collect_sheet_result(
+        self,
+        session: WorkbookSession,
+        future: Future,
+        spec: SheetSpec,
+        supplier: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """取回子进程的解析结果，错误和提示与顺序解析保持一致"""
+        try:
+            rows, skipped_rows = future.result()
+        except Exception as e:
+            if supplier:
+                raise ExcelProcessingError(f"解析供应商数据错误: {str(e)}")
+            raise ExcelProcessingError(f"解析Excel文件错误: {str(e)}")
+
+        session.skipped_rows.update(skipped_rows)
+        if not rows:
+            if supplier:
+                self.logger.warning(
+                    f"供应商工作表 '{spec.sheet_name}' 中没有匹配的数据"
+                )
+            else:
+                self.logger.warning(f"工作表 '{spec.sheet_name}' 中没有数据")
+        return rows
+
+    def process_reimbursement_file(
+        self,
+        file_path: str,
+        user: User = None,
+        context: Optional[JobContext] = None,
+        output_format: str = "xlsx",
+    ) -> Tuple[str, int]:
+        """处理报销文件"""
+        self.logger.info(f"开始处理报销Excel文件: {file_path}")
+
+        session = None
+        output_path = None
+        try:
+            # 整个任务只加载一次工作簿，各解析步骤共用
+            session = self._new_session(file_path)
+            if context is None:
+                context = JobContext.for_user(user)
+            result_data = self._reimbursement_entries(session, context)
 
             # 写入Excel文件
-            self.write_reimbursement_excel(output_path, result_data)
+            output_path = self.new_output_path("reimbursement", output_format)
+            self.write_reimbursement_excel(output_path, result_data, output_format)
 
             self.logger.info(f"报销Excel文件处理完成: {output_path}")
             return output_path, len(result_data)
 
         except Exception as e:
+            self._remove_output(output_path)
             self.logger.error(f"处理报销Excel文件时发生错误: {str(e)}")
-            raise ExcelProcessingError(f"处理报销Excel文件失败: {str(e)}")
+            raise ExcelProcessingError(
+                f"处理报销Excel文件失败: {str(e)}", errors=getattr(e, "errors", None)
+            )
+
+        finally:
+            if session is not None:
+                session.close()
+
+    def _reimbursement_entries(
+        self, session: WorkbookSession, context: JobContext
+    ) -> List[VoucherEntry]:
+        """解析报销文件并生成会计分录（需按报销人分组，整表读入）"""
+        # 解析费用代码映射表
+        fee_type_mapping = self.parse_reimbursement_fee_mapping(session)
+
+        # 一次遍历解析顶部信息（报销人、日期、银行等）和基础报销数据
+        top_infos, base_data = self.parse_reimbursement_sheet(session)
+
+        self._log_skipped_rows(session)
+        session.close()
 
-    def parse_reimbursement_fee_mapping(self, file_path: str) -> Dict[str, str]:
+        # 处理报销数据，按报销人分组生成会计分录
+        result_data = self.process_reimbursement_data(
+            top_infos, base_data, fee_type_mapping, context.user, context
+        )
+        return result_data
+
+    def parse_reimbursement_fee_mapping(
+        self, source: Union[str, WorkbookSession]
+    ) -> Dict[str, str]:
         """解析报销文件中的费用代码映射表"""
+        session = None
         try:
             mapping = {}
-            wb = openpyxl.load_workbook(file_path, data_only=True)
+            session = self._open_session(source)
 
             # 读取主费用代码表
             sheet_name = "核算项目_费用代码"
-            if sheet_name in wb.sheetnames:
-                sheet = wb[sheet_name]
+            if session.has_sheet(sheet_name):
                 # 解析费用代码映射关系：费用代码 -> 科目名称
-                for row in sheet.iter_rows(
-                    min_row=2, values_only=True, max_col=3
+                for row in session.iter_rows(
+                    sheet_name, min_row=2, max_col=3
                 ):  # 跳过表头
                     if row[2] and row[1]:  # 费用代码和科目名称都不为空
                         fee_code = str(row[2]).strip()
@@ -785,11 +1241,10 @@ class ExcelProcessor:
 
             # 读取无项目费用代码表
             sheet_name_no_project = "核算项目_费用代码无项目"
-            if sheet_name_no_project in wb.sheetnames:
-                sheet = wb[sheet_name_no_project]
+            if session.has_sheet(sheet_name_no_project):
                 # 解析费用代码映射关系：费用代码 -> 科目名称
-                for row in sheet.iter_rows(
-                    min_row=2, values_only=True, max_col=3
+                for row in session.iter_rows(
+                    sheet_name_no_project, min_row=2, max_col=3
                 ):  # 跳过表头
                     if row[2] and row[1]:  # 费用代码和科目名称都不为空
                         fee_code = str(row[2]).strip()
@@ -798,7 +1253,6 @@ class ExcelProcessor:
                         if fee_code not in mapping:
                             mapping[fee_code] = fee_name
 
-            wb.close()
             self.logger.info(f"成功加载费用代码映射表，共 {len(mapping)} 项")
             return mapping
 
@@ -808,99 +1262,109 @@ class ExcelProcessor:
             )
             return {}
 
-    def parse_reimbursement_top_info(self, file_path: str) -> List[Dict[str, Any]]:
-        """解析报销文件顶部信息"""
-        try:
-            result = []
-            wb = openpyxl.load_workbook(file_path, data_only=True)
+        finally:
+            self._release_session(source, session)
 
-            # 报销文件的工作表名
-            sheet_name = "报销  (每日)"
-            if sheet_name not in wb.sheetnames:
-                raise ExcelProcessingError(f"工作表 '{sheet_name}' 不存在")
-
-            sheet = wb[sheet_name]
-
-            # 解析顶部信息行（以"日期"开头的行）
-            for row in sheet.iter_rows(min_row=1, values_only=True, max_col=16):
-                if row[0] == "日期":
-                    data = {
-                        "date": row[1],
-                        "person": row[3],
-                        "bank": row[5],
-                        "bankCode": row[7],
-                        "summary": row[9],
-                    }
-                    result.append(data)
-                else:
-                    if result:  # 如果已经找到了数据，遇到非"日期"行就停止
-                        break
-
-            wb.close()
-            return result
+    def parse_reimbursement_sheet(
+        self, source: Union[str, WorkbookSession]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        一次遍历报销工作表，同时解析顶部信息和基础报销数据
 
-        except Exception as e:
-            raise ExcelProcessingError(f"解析报销顶部信息错误: {str(e)}")
+        解析分两个状态：顶部信息状态收集以"日期"开头的行，遇到其后的
+        第一个非"日期"行切换到明细状态，明细从第4行开始解析。
 
-    def parse_reimbursement_base_data(
-        self, file_path: str, top_count: int
-    ) -> List[Dict[str, Any]]:
-        """解析报销基础数据"""
+        Returns:
+            (顶部信息列表, 基础报销数据列表)
+        """
+        session = None
         try:
-            result = []
-            wb = openpyxl.load_workbook(file_path, data_only=True)
+            top_infos = []
+            base_data = []
+            session = self._open_session(source)
 
-            sheet_name = "报销  (每日)"
-            sheet = wb[sheet_name]
+            sheet_name = REIMBURSEMENT_SHEET_NAME
+            if not session.has_sheet(sheet_name):
+                raise ExcelProcessingError(f"工作表 '{sheet_name}' 不存在")
 
-            # 从第4行开始解析基础数据（第3行是表头）
-            start_row = 4
+            in_top_block = True
+            rows = session.iter_rows(sheet_name, min_row=1, max_col=16)
+            for row_index, row in enumerate(rows, start=1):
+                if in_top_block:
+                    if row[0] == "日期":
+                        top_infos.append(self._parse_reimbursement_top_row(row))
+                        continue
+                    # 顶部信息之前的空行继续等待，最晚在明细起始行切换状态
+                    if top_infos or row_index >= REIMBURSEMENT_DETAIL_START_ROW:
+                        in_top_block = False
 
-            for row in sheet.iter_rows(min_row=start_row, values_only=True, max_col=16):
-                # 解析报销明细：报销人、部门代码、项目简称、备注、费用别称、备注、费用别称、费用类型、费用代码、金额、摘要、部门+项目
-                if row[0] is None:  # 如果报销人为空，跳过
+                if in_top_block or row_index < REIMBURSEMENT_DETAIL_START_ROW:
                     continue
 
-                dic = {
-                    "person": row[0],  # 报销人
-                    "department": row[1],  # 部门代码
-                    "project": row[2],  # 项目简称
-                    "remark": row[3],  # 备注
-                    "feeAlias": row[4],  # 费用别称
-                    "feeType": row[4],  # 费用类型（使用费用别称）
-                    "feeCode": row[6],  # 费用代码
-                    "amount": row[7],  # 金额
-                    "summary": row[8],  # 摘要
-                    "departmentProject": row[9] if len(row) > 9 else "",  # 部门+项目
-                }
-
-                # 如果关键字段都为空，跳过这行
-                if (dic["person"] is None or dic["person"] == "") and (
-                    dic["amount"] is None or dic["amount"] == 0
-                ):
-                    continue
+                dic = self._parse_reimbursement_detail_row(row)
+                if dic is not None:
+                    base_data.append(dic)
 
-                # 检查部门+项目是否为空或出错
-                dept_project = dic["departmentProject"]
-                if (
-                    dept_project is None
-                    or dept_project == ""
-                    or str(dept_project).startswith("#")
-                ):
-                    if dic["project"] is not None and dic["project"] != "":
-                        # 如果项目不为空但部门+项目为空，给出警告但继续处理
-                        self.logger.warning(
-                            f"报销人 {dic['person']} 的项目 {dic['project']} 部门+项目字段为空或有错误: {dept_project}"
-                        )
-                        dic["departmentProject"] = ""  # 设为空字符串以便后续处理
-
-                result.append(dic)
-
-            wb.close()
-            return result
+            return top_infos, base_data
 
         except Exception as e:
-            raise ExcelProcessingError(f"解析报销基础数据错误: {str(e)}")
+            raise ExcelProcessingError(f"解析报销工作表错误: {str(e)}")
+
+        finally:
+            self._release_session(source, session)
+
+    def _parse_reimbursement_top_row(self, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        """解析一行顶部信息"""
+        return {
+            "date": row[1],
+            "person": row[3],
+            "bank": row[5],
+            "bankCode": row[7],
+            "summary": row[9],
+        }
+
+    def _parse_reimbursement_detail_row(
+        self, row: Tuple[Any, ...]
+    ) -> Optional[Dict[str, Any]]:
+        """解析一行报销明细，无效行返回None"""
+        # 解析报销明细：报销人、部门代码、项目简称、备注、费用别称、备注、费用别称、费用类型、费用代码、金额、摘要、部门+项目
+        if row[0] is None:  # 如果报销人为空，跳过
+            return None
+
+        dic = {
+            "person": row[0],  # 报销人
+            "department": row[1],  # 部门代码
+            "project": row[2],  # 项目简称
+            "remark": row[3],  # 备注
+            "feeAlias": row[4],  # 费用别称
+            "feeType": row[4],  # 费用类型（使用费用别称）
+            "feeCode": row[6],  # 费用代码
+            "amount": row[7],  # 金额
+            "summary": row[8],  # 摘要
+            "departmentProject": row[9] if len(row) > 9 else "",  # 部门+项目
+        }
+
+        # 如果关键字段都为空，跳过这行
+        if (dic["person"] is None or dic["person"] == "") and (
+            dic["amount"] is None or dic["amount"] == 0
+        ):
+            return None
+
+        # 检查部门+项目是否为空或出错
+        dept_project = dic["departmentProject"]
+        if (
+            dept_project is None
+            or dept_project == ""
+            or str(dept_project).startswith("#")
+        ):
+            if dic["project"] is not None and dic["project"] != "":
+                # 如果项目不为空但部门+项目为空，给出警告但继续处理
+                self.logger.warning(
+                    f"报销人 {dic['person']} 的项目 {dic['project']} 部门+项目字段为空或有错误: {dept_project}"
+                )
+                dic["departmentProject"] = ""  # 设为空字符串以便后续处理
+
+        return dic
 
     def process_reimbursement_data(
         self,
@@ -908,7 +1372,8 @@ class ExcelProcessor:
         base_data: List[Dict[str, Any]],
         fee_type_mapping: Dict[str, str],
         user: User = None,
-    ) -> List[Dict[str, Any]]:
+        context: Optional[JobContext] = None,
+    ) -> List[VoucherEntry]:
         """处理报销数据，生成会计分录"""
         try:
             result = []
@@ -918,37 +1383,37 @@ class ExcelProcessor:
 
             date = top_infos[0]["date"]
             person_index = 1
+            items_by_person = self.group_reimbursement_items(base_data)
+            template = self.new_reimbursement_template(user, context)
 
             # 按报销人分组处理
             for top_info in top_infos:
                 index = 0
-                total_amount = 0
+                # 以分累计，合计与各明细之和严格相等
+                total_cents = 0
                 person = top_info["person"]
 
                 # 处理该报销人的所有明细
-                for item in base_data:
-                    if (
-                        item["person"] is None
-                        or item["person"] == ""
-                        or person != item["person"]
-                    ):
-                        continue
-
-                    # 确保金额格式正确
-                    amount = float(item["amount"]) if item["amount"] else 0
-                    item["amount"] = round(amount, 2)
-                    total_amount += item["amount"]
-                    total_amount = round(total_amount, 2)
+                for item in items_by_person.get(person, ()):
+                    # 金额转换为分
+                    item["amountCents"] = to_cents(item["amount"])
+                    total_cents += item["amountCents"]
 
                     # 生成费用明细的会计分录（借方）
                     single_data = self.gen_reimbursement_debit_row(
-                        user, item, index, date, person_index, fee_type_mapping
+                        user,
+                        item,
+                        index,
+                        date,
+                        person_index,
+                        fee_type_mapping,
+                        template,
                     )
                     result.extend(single_data)
                     index += 1
 
                 # 生成银行支付的会计分录（贷方）
-                if total_amount > 0:
+                if total_cents > 0:
                     last_row = self.gen_reimbursement_credit_row(
                         user,
                         top_info,
@@ -956,7 +1421,8 @@ class ExcelProcessor:
                         index,
                         date,
                         person_index,
-                        total_amount,
+                        total_cents,
+                        template,
                     )
                     result.extend(last_row)
 
@@ -967,6 +1433,24 @@ class ExcelProcessor:
         except Exception as e:
             raise ExcelProcessingError(f"处理报销数据错误: {str(e)}")
 
+    def new_reimbursement_template(
+        self, user: User = None, context: Optional[JobContext] = None
+    ) -> VoucherHeaderTemplate:
+        """报销凭证的表头模板（每张凭证的分录序号固定为 1）"""
+        return self.new_voucher_template(user, context, FSerialNum=1)
+
+    def group_reimbursement_items(
+        self, base_data: List[Dict[str, Any]]
+    ) -> Dict[Any, List[Dict[str, Any]]]:
+        """按报销人分组明细（一次遍历，组内保持原顺序），报销人为空的明细不参与"""
+        items_by_person: Dict[Any, List[Dict[str, Any]]] = {}
+        for item in base_data:
+            person = item["person"]
+            if person is None or person == "":
+                continue
+            items_by_person.setdefault(person, []).append(item)
+        return items_by_person
+
     def gen_reimbursement_debit_row(
         self,
         user: Any,
@@ -975,41 +1459,14 @@ class ExcelProcessor:
         date: Any,
         person_index: int,
         fee_type_mapping: Dict[str, str],
-    ) -> List[Dict[str, Any]]:
-        """生成报销费用的借方分录"""
-        real_date = self.get_real_date(date)
-
-        # 基础数据
-        base_info = {
-            "FDate": real_date.strftime("%Y-%m-%d"),
-            "FYear": real_date.strftime("%Y"),
-            "FPeriod": real_date.strftime("%m"),
-            "FGroupID": "记",
-            "FNumber": person_index,
-            "FCurrencyNum": "RMB",
-            "FCurrencyName": "人民币",
-            "FPreparerID": get_prepared_by_display_name(user),
-            "FCheckerID": "NONE",
-            "FApproveID": "NONE",
-            "FCashierID": "NONE",
-            "FHandler": "",
-            "FSettleTypeID": "*",
-            "FSettleNo": "",
-            "FQuantity": 0,
-            "FMeasureUnitID": "*",
-            "FUnitPrice": 0,
-            "FReference": "",
-            "FTransDate": real_date.strftime("%Y-%m-%d"),
-            "FTransNo": "",
-            "FAttachments": 0,
-            "FSerialNum": 1,
-            "FObjectName": "",
-            "FParameter": "",
-            "FExchangeRate": 1,
-            "FPosted": 0,
-            "FInternalInd": "",
-            "FCashFlow": "",
-        }
+        template: Optional[VoucherHeaderTemplate] = None,
+    ) -> List[VoucherEntry]:
+        """生成报销费用的借方分录（批量生成时传入同一个 template）"""
+        if template is None:
+            template = self.new_reimbursement_template(user)
+
+        # 基础数据：表头按日期复用
+        base_info = template.for_month_day(date, self.get_real_date)
 
         # 获取正确的费用类型名称
         fee_code = str(item["feeCode"]) if item["feeCode"] else ""
@@ -1018,19 +1475,19 @@ class ExcelProcessor:
         )
 
         # 费用明细行（借方）
-        debit_row = {
-            **base_info,
+        debit_fields = {
+            "FNumber": person_index,
             "FAccountNum": fee_code,
             "FAccountName": fee_name,
-            "FAmountFor": item["amount"],
-            "FDebit": item["amount"],
+            "FAmountFor": item["amountCents"],
+            "FDebit": item["amountCents"],
             "FCredit": 0,
             "FExplanation": str(date) + (item["summary"] if item["summary"] else ""),
             "FEntryID": index,
             "FItem": item["departmentProject"] if item["departmentProject"] else "",
         }
 
-        return [debit_row]
+        return [template.entry(base_info, debit_fields)]
 
     def gen_reimbursement_credit_row(
         self,
@@ -1040,106 +1497,51 @@ class ExcelProcessor:
         index: int,
         date: Any,
         person_index: int,
-        total_amount: float,
-    ) -> List[Dict[str, Any]]:
-        """生成银行支付的贷方分录"""
-        real_date = self.get_real_date(date)
-
-        # 基础数据
-        base_info = {
-            "FDate": real_date.strftime("%Y-%m-%d"),
-            "FYear": real_date.strftime("%Y"),
-            "FPeriod": real_date.strftime("%m"),
-            "FGroupID": "记",
-            "FNumber": person_index,
-            "FCurrencyNum": "RMB",
-            "FCurrencyName": "人民币",
-            "FPreparerID": get_prepared_by_display_name(user),
-            "FCheckerID": "NONE",
-            "FApproveID": "NONE",
-            "FCashierID": "NONE",
-            "FHandler": "",
-            "FSettleTypeID": "*",
-            "FSettleNo": "",
-            "FQuantity": 0,
-            "FMeasureUnitID": "*",
-            "FUnitPrice": 0,
-            "FReference": "",
-            "FTransDate": real_date.strftime("%Y-%m-%d"),
-            "FTransNo": "",
-            "FAttachments": 0,
-            "FSerialNum": 1,
-            "FObjectName": "",
-            "FParameter": "",
-            "FExchangeRate": 1,
-            "FPosted": 0,
-            "FInternalInd": "",
-            "FCashFlow": "",
-        }
+        total_cents: int,
+        template: Optional[VoucherHeaderTemplate] = None,
+    ) -> List[VoucherEntry]:
+        """生成银行支付的贷方分录（total_cents 为该报销人合计金额，单位分）"""
+        if template is None:
+            template = self.new_reimbursement_template(user)
+
+        # 基础数据：表头按日期复用
+        base_info = template.for_month_day(date, self.get_real_date)
 
         # 银行支付行（贷方）
-        credit_row = {
-            **base_info,
+        credit_fields = {
+            "FNumber": person_index,
             "FAccountNum": top_info["bankCode"],
             "FAccountName": top_info["bank"],
-            "FAmountFor": total_amount,
+            "FAmountFor": total_cents,
             "FDebit": 0,
-            "FCredit": total_amount,
+            "FCredit": total_cents,
             "FExplanation": str(date) + top_info["summary"],
             "FEntryID": index,
             "FItem": "",
         }
 
-        return [credit_row]
+        return [template.entry(base_info, credit_fields)]
 
     def write_reimbursement_excel(
-        self, excel_file: str, data: List[Dict[str, Any]]
+        self, excel_file: str, data: List[VoucherEntry], output_format: str = "xlsx"
     ) -> None:
         """写入报销Excel文件"""
         try:
-            workbook = xlsxwriter.Workbook(excel_file)
-
-            # 写入schema工作表
-            worksheet = workbook.add_worksheet("t_Schema")
-
-            # 尝试读取schema文件
-            schema_file_path = os.path.join(
-                os.path.dirname(__file__), "..", "..", "t_Schema.json"
+            if output_format in TEXT_FORMATS:
+                write_text(excel_file, data, TEXT_FORMATS[output_format])
+                return
+            self._write_voucher_workbook(
+                excel_file, self._reimbursement_output_rows(data)
             )
-            try:
-                with open(schema_file_path, "r", encoding="utf-8") as f:
-                    schema = json.load(f)
-            except FileNotFoundError:
-                self.logger.warning("t_Schema.json 文件未找到，使用空schema")
-                schema = []
-
-            # 写入schema表头
-            for i, header in enumerate(SCHEMA_HEADERS):
-                worksheet.write(0, i, header)
-
-            # 写入schema数据
-            for i, schema_item in enumerate(schema):
-                for j, header in enumerate(SCHEMA_HEADERS):
-                    if header in schema_item:
-                        worksheet.write(i + 1, j, schema_item[header])
-
-            # 写入数据工作表
-            worksheet = workbook.add_worksheet("Page1")
-
-            # 写入数据表头
-            for i, header in enumerate(EXCEL_HEADERS):
-                worksheet.write(0, i, header)
-
-            # 写入数据
-            for i, row_data in enumerate(data):
-                for j, header in enumerate(EXCEL_HEADERS):
-                    if header == "FAmountFor":
-                        # FAmountFor列使用求和公式
-                        worksheet.write(i + 1, j, f"=SUM(K{i + 2}+L{i + 2})")
-                    elif header in row_data:
-                        worksheet.write(i + 1, j, row_data[header])
-
-            workbook.close()
 
         except Exception as e:
             raise ExcelProcessingError(f"写入报销Excel文件错误: {str(e)}")
+
+    def _reimbursement_output_rows(
+        self, data: Iterable[VoucherEntry]
+    ) -> Iterator[List[Any]]:
+        """报销分录的输出行（金额列由分换算为元，FAmountFor 为借贷求和公式）"""
+        for row_number, entry in enumerate(data, start=2):
+            values = output_row(entry)
+            values[AMOUNT_FOR_INDEX] = f"=SUM(K{row_number}+L{row_number})"
+            yield values
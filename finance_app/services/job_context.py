@@ -0,0 +1,36 @@
+"""
+任务上下文 - 一次处理任务内共用、只需解析一次的信息
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from django.contrib.auth.models import User
+
+from ..utils import get_prepared_by_display_name
+
+
+@dataclass(frozen=True)
+class JobContext:
+    """处理任务上下文"""
+
+    user: Optional[User]
+    # 制单人显示名称（FPreparerID）
+    preparer: str
+
+    @classmethod
+    def for_user(cls, user: Optional[User] = None) -> "JobContext":
+        """
+        按发起任务的用户生成上下文
+
+        用户连同 profile 一次查出，制单人名称在任务开始时解析一次；
+        未登录或未提供用户时使用默认制单人。
+        """
+        if user is not None and not getattr(user, "is_authenticated", False):
+            user = None
+        if user is not None:
+            try:
+                user = User.objects.select_related("profile").get(pk=user.pk)
+            except User.DoesNotExist:
+                pass
+        return cls(user=user, preparer=get_prepared_by_display_name(user))
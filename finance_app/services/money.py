@@ -0,0 +1,52 @@
+"""
+金额定点表示 - 以整数“分”参与计算，只在写出文件时格式化为元
+
+单元格读出的金额（float、文本数字或空值）在进入计算前统一转换为分，
+合计与差额都是整数运算，借贷两边不会因浮点舍入相差一分。
+
+桌面版（src）中的对应模块为 src/utils/money.py，修改时同步。
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any
+
+import numpy as np
+
+# 凭证分录中以分表示的金额字段
+MONEY_FIELDS = ("FAmountFor", "FDebit", "FCredit")
+
+CENTS_PER_YUAN = 100
+_CENT = Decimal("0.01")
+
+
+def to_cents(value: Any) -> int:
+    """
+    金额转换为分，四舍五入到分；空值（None、空字符串）为 0
+
+    float 按其最短十进制表示转换（如 1.005 即 1.005 元），与单元格中看到的数值一致。
+    """
+    if value is None or value == "":
+        return 0
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"金额格式错误: {value}")
+    if not amount.is_finite():
+        raise ValueError(f"金额格式错误: {value}")
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * CENTS_PER_YUAN)
+
+
+def to_cents_array(amounts: np.ndarray) -> np.ndarray:
+    """
+    float64 金额数组转换为 int64 分数组，四舍五入（远离零）到分
+
+    先把 元×100 的结果舍到 6 位小数，消除 1.005×100=100.4999… 这类二进制误差，
+    结果与逐个调用 to_cents 一致。
+    """
+    scaled = np.round(np.abs(amounts) * CENTS_PER_YUAN, 6)
+    return (np.sign(amounts) * np.floor(scaled + 0.5)).astype(np.int64)
+
+
+def cents_to_amount(cents: int) -> float:
+    """分转换为写入单元格的金额（元）"""
+    return cents / CENTS_PER_YUAN
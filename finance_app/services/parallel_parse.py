@@ -0,0 +1,61 @@
+"""
+并行解析 - 在进程池中解析互不依赖的工作表
+
+子进程各自打开工作簿，只依赖 workbook 与 sheet_specs，不导入 Django，
+spawn 方式启动的子进程也能直接使用。
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from .sheet_specs import SheetSpec, iter_mapped_rows
+from .workbook import WorkbookSession
+
+# 子进程返回值：(映射后的行数据, 因连续空行跳过的行数)
+SheetResult = Tuple[List[Dict[str, Any]], Dict[str, Optional[int]]]
+
+
+def parse_sheet_in_worker(
+    path: str,
+    spec: SheetSpec,
+    session_options: Dict[str, Any],
+    check_list: Optional[Collection[Any]] = None,
+) -> SheetResult:
+    """在子进程中打开工作簿并解析一个工作表"""
+    with WorkbookSession(path, **session_options) as session:
+        rows = list(iter_mapped_rows(session, spec, check_list))
+        return rows, dict(session.skipped_rows)
+
+
+class SheetParsePool:
+    """
+    工作表解析进程池
+
+    openpyxl 非只读模式下每个子进程都要加载整个工作簿，
+    建议与只读模式或 native 引擎一起使用。
+    """
+
+    def __init__(
+        self, path: str, session_options: Dict[str, Any], max_workers: int = 3
+    ):
+        self.path = path
+        self.session_options = session_options
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    def submit(
+        self, spec: SheetSpec, check_list: Optional[Collection[Any]] = None
+    ) -> "Future[SheetResult]":
+        """提交一个工作表的解析任务"""
+        return self.executor.submit(
+            parse_sheet_in_worker, self.path, spec, self.session_options, check_list
+        )
+
+    def close(self) -> None:
+        """关闭进程池，取消尚未开始的任务"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "SheetParsePool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
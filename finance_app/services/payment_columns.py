@@ -0,0 +1,164 @@
+"""
+排单数据列式转换 - 以列为单位批量计算凭证日期、付款方式与税额
+
+关联主数据后的每一行仍是字典；这里把需要计算的字段抽成 NumPy 数组：
+日期、付款方式、备注2 这类取值重复度高的列先按不同取值去重（factorize），
+每个取值只解析一次，再按下标广播回所有行；金额列转换为 int64 的分后整列相减。
+计算结果可以写回原来的字典，供凭证生成继续使用。
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .money import to_cents_array
+
+PAYMENT_TYPE_PARTIAL = "partial"
+PAYMENT_TYPE_FULL = "full"
+
+# 写回行字典的字段（金额字段以分表示）
+TRANSFORMED_FIELDS = (
+    "FDate",
+    "FYear",
+    "FPeriod",
+    "paymentType",
+    "totalCents",
+    "realTaxCents",
+    "remainCents",
+)
+
+
+def factorize(values: Iterable[Any]) -> Tuple[List[Any], np.ndarray]:
+    """
+    把取值序列编码为 (不同取值列表, 每个值在列表中的下标)
+
+    按首次出现的顺序编号，不要求取值可比较大小（日期列可能混有数字和字符串）。
+    """
+    uniques: Dict[Any, int] = {}
+    codes = [uniques.setdefault(value, len(uniques)) for value in values]
+    return list(uniques), np.asarray(codes, dtype=np.intp)
+
+
+def map_distinct(values: Sequence[Any], func: Callable[[Any], Any]) -> np.ndarray:
+    """对每个不同取值只调用一次 func，结果按行广播为 object 数组"""
+    uniques, codes = factorize(values)
+    results = np.empty(len(uniques), dtype=object)
+    results[:] = [func(value) for value in uniques]
+    return results[codes]
+
+
+def normalize_payment_type(payment_type: str) -> str:
+    """付款方式归一：含“定金”为 partial，含“全款”为 full，否则保持原值"""
+    if "全款" in payment_type:
+        return PAYMENT_TYPE_FULL
+    if "定金" in payment_type:
+        return PAYMENT_TYPE_PARTIAL
+    return payment_type
+
+
+def to_amounts(values: Sequence[Any]) -> np.ndarray:
+    """
+    金额列转为 float64 数组，空值（None、空字符串、0）记为 0
+
+    全部为数字或空单元格时整列交给 NumPy 转换，否则逐个转换（如 CSV 中的文本数字）。
+    """
+    try:
+        amounts = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        amounts = np.fromiter(
+            (float(value) if value else 0.0 for value in values),
+            dtype=np.float64,
+            count=len(values),
+        )
+    # None 在整列转换中变为 NaN
+    return np.nan_to_num(amounts, nan=0.0)
+
+
+class PaymentColumns:
+    """排单数据的列式计算结果"""
+
+    def __init__(
+        self,
+        rows: Sequence[Dict[str, Any]],
+        parse_date: Callable[[Any], Any],
+        fee_by_remark2: Callable[[str], float],
+        start: int = 0,
+    ):
+        """
+        Args:
+            rows: 已关联主数据的排单行
+            parse_date: 月.日 → datetime，日期无效时抛出异常
+            fee_by_remark2: 从备注2中取定金金额，备注2无效时抛出异常
+            start: 分块计算时第一行在全部数据中的位置，用于错误提示
+        """
+        self.size = len(rows)
+
+        # 日期：每个不同的 月.日 只解析一次
+        date_values, date_codes = factorize(row.get("date") for row in rows)
+        dates = [parse_date(value) for value in date_values]
+        self.fdate = self._date_column(dates, date_codes, "%Y-%m-%d")
+        self.fyear = self._date_column(dates, date_codes, "%Y")
+        self.fperiod = self._date_column(dates, date_codes, "%m")
+
+        self.payment_type = map_distinct(
+            [row.get("paymentType", "") for row in rows], normalize_payment_type
+        )
+        partial = self.payment_type == PAYMENT_TYPE_PARTIAL
+
+        # 税额：定金行取备注2中的金额，其余行取“税”列
+        real_tax = to_cents_array(to_amounts([row.get("tax") for row in rows]))
+        if partial.any():
+            partial_rows = np.flatnonzero(partial)
+            fees = map_distinct(
+                [rows[index].get("remark2", "") for index in partial_rows],
+                fee_by_remark2,
+            )
+            real_tax[partial_rows] = to_cents_array(to_amounts(fees))
+        self.real_tax_cents = real_tax
+
+        self.total_cents = to_cents_array(self._total_amounts(rows, start))
+        self.remain_cents = self.total_cents - self.real_tax_cents
+
+    @staticmethod
+    def _date_column(
+        dates: List[Any], codes: np.ndarray, date_format: str
+    ) -> np.ndarray:
+        """按格式输出日期列"""
+        formatted = np.empty(len(dates), dtype=object)
+        formatted[:] = [value.strftime(date_format) for value in dates]
+        return formatted[codes]
+
+    @staticmethod
+    def _total_amounts(rows: Sequence[Dict[str, Any]], start: int = 0) -> np.ndarray:
+        """总金额列，缺失时记为 0，空单元格视为错误"""
+        values = [row.get("totalAmount", 0) for row in rows]
+        try:
+            amounts = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            amounts = np.fromiter(
+                (float(value) for value in values), dtype=np.float64, count=len(values)
+            )
+        empty = np.flatnonzero(np.isnan(amounts))
+        if empty.size:
+            raise ValueError(f"第 {start + empty[0] + 1} 条数据总金额为空")
+        return amounts
+
+    def columns(self) -> Dict[str, list]:
+        """各计算字段的 Python 列表（金额为 int，单位分）"""
+        return {
+            "FDate": self.fdate.tolist(),
+            "FYear": self.fyear.tolist(),
+            "FPeriod": self.fperiod.tolist(),
+            "paymentType": self.payment_type.tolist(),
+            "totalCents": self.total_cents.tolist(),
+            "realTaxCents": self.real_tax_cents.tolist(),
+            "remainCents": self.remain_cents.tolist(),
+        }
+
+    def write_back(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """把计算结果写回行字典"""
+        columns = self.columns()
+        for row, values in zip(
+            rows, zip(*(columns[field] for field in TRANSFORMED_FIELDS))
+        ):
+            row.update(zip(TRANSFORMED_FIELDS, values))
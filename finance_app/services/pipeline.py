@@ -0,0 +1,37 @@
+"""
+流水线工具 - 在解析、关联、生成、写出各阶段之间按块传递数据
+
+各阶段都是生成器，数据按固定行数分块逐段流过，任何时刻只有少量块在内存中。
+峰值内存与文件行数无关的前提是首尾两端也逐行处理：读取使用只读模式或 native 引擎，
+写出使用逐行刷出的写出器（xlsxwriter constant_memory、native 写出引擎或文本格式）。
+"""
+
+from itertools import islice
+from typing import Generic, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """按 size 条分块，最后一块可能不足 size 条"""
+    if size <= 0:
+        raise ValueError(f"分块大小必须大于 0: {size}")
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Counted(Generic[T]):
+    """流过时计数的迭代器，流水线结束后可从 count 得到处理的条数"""
+
+    def __init__(self, iterable: Iterable[T]):
+        self.count = 0
+        self._iterator = iter(iterable)
+
+    def __iter__(self) -> Iterator[T]:
+        for item in self._iterator:
+            self.count += 1
+            yield item
@@ -0,0 +1,174 @@
+"""
+记账规则 - 以规则表描述排单凭证的分录形态，导入时编译为按位置赋值的生成器
+
+每种凭证形态是一组分录规则：科目代码、科目名称、金额来源、借贷方向和核算项目。
+规则中的 RowField 表示取排单行中的字段，其他值为常量。编译后每条分录只需
+在凭证表头副本上按列下标写入少量字段，不再构造和合并字典。
+新增付款方式时，在 POSTING_RULES 中加入形态、在 PAYMENT_SHAPES 中登记即可。
+
+桌面版（src）中的对应模块为 src/processors/posting_rules.py，修改时同步。
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .voucher_entry import FIELD_INDEX, VoucherEntry
+
+DEBIT = "debit"
+CREDIT = "credit"
+
+
+class RowField(NamedTuple):
+    """取排单行中的字段，字段不存在时为 default"""
+
+    name: str
+    default: Any = ""
+
+
+class PostingLine(NamedTuple):
+    """一条分录的规则"""
+
+    account: Any  # 科目代码
+    account_name: Any  # 科目名称
+    amount: str  # 金额字段（分）
+    side: str  # DEBIT / CREDIT
+    item: Any = ""  # 核算项目（FItem）
+
+
+FEE_ACCOUNT = RowField("feeCode")
+FEE_NAME = RowField("feeType")
+BANK_ACCOUNT = RowField("FAccountNum_Bank")
+DEP_PROJECT = RowField("depProjectStr")
+SUPPLIER_PROJECT = RowField("supplierProjectStr")
+
+# 凭证形态 → 分录规则（顺序即 FEntryID）
+POSTING_RULES: Dict[str, Tuple[PostingLine, ...]] = {
+    # 定金
+    "partial": (
+        PostingLine(FEE_ACCOUNT, FEE_NAME, "realTaxCents", DEBIT, DEP_PROJECT),
+        PostingLine("1402", "在途物资", "remainCents", DEBIT),
+        PostingLine("2202.01", "应付供应商", "totalCents", CREDIT, SUPPLIER_PROJECT),
+        PostingLine("2202.01", "应付供应商", "realTaxCents", DEBIT, SUPPLIER_PROJECT),
+        PostingLine(BANK_ACCOUNT, "银行", "realTaxCents", CREDIT),
+    ),
+    # 全款不含税
+    "full_without_tax": (
+        PostingLine(FEE_ACCOUNT, FEE_NAME, "remainCents", DEBIT, DEP_PROJECT),
+        PostingLine("2202.01", "应付供应商", "totalCents", CREDIT, SUPPLIER_PROJECT),
+        PostingLine("2202.01", "应付供应商", "totalCents", DEBIT, SUPPLIER_PROJECT),
+        PostingLine(BANK_ACCOUNT, "银行", "totalCents", CREDIT),
+    ),
+    # 全款含税
+    "full_with_tax": (
+        PostingLine(FEE_ACCOUNT, FEE_NAME, "remainCents", DEBIT, DEP_PROJECT),
+        PostingLine("2221.01.01", "进项税额", "realTaxCents", DEBIT),
+        PostingLine("2202.01", "应付供应商", "totalCents", CREDIT, SUPPLIER_PROJECT),
+        PostingLine("2202.01", "应付供应商", "totalCents", DEBIT, SUPPLIER_PROJECT),
+        PostingLine(BANK_ACCOUNT, "银行", "totalCents", CREDIT),
+    ),
+}
+
+# 付款方式 → (税额为 0 时的形态, 税额不为 0 时的形态)
+PAYMENT_SHAPES: Dict[str, Tuple[str, str]] = {
+    "partial": ("partial", "partial"),
+    "full": ("full_without_tax", "full_with_tax"),
+}
+
+# 每张凭证都有的字段：凭证号、分录序号、摘要
+NUMBER_INDEXES = (FIELD_INDEX["FNumber"], FIELD_INDEX["FSerialNum"])
+EXPLANATION_INDEX = FIELD_INDEX["FExplanation"]
+
+
+class PostingEmitter:
+    """由规则编译的凭证生成器"""
+
+    def __init__(self, lines: Iterable[PostingLine]):
+        # 每条分录: (常量 [(列下标, 值)], 行字段 [(列下标, 字段名, 默认值)])
+        self.lines: List[Tuple[List[Tuple[int, Any]], List[Tuple[int, str, Any]]]] = []
+        for entry_id, line in enumerate(lines):
+            constants = [(FIELD_INDEX["FEntryID"], entry_id)]
+            row_fields = []
+            for name, source in (
+                ("FAccountNum", line.account),
+                ("FAccountName", line.account_name),
+                ("FItem", line.item),
+            ):
+                if isinstance(source, RowField):
+                    row_fields.append((FIELD_INDEX[name], source.name, source.default))
+                else:
+                    constants.append((FIELD_INDEX[name], source))
+
+            amount_columns = [
+                "FAmountFor",
+                "FDebit" if line.side == DEBIT else "FCredit",
+            ]
+            for name in amount_columns:
+                row_fields.append((FIELD_INDEX[name], line.amount, 0))
+            opposite = "FCredit" if line.side == DEBIT else "FDebit"
+            constants.append((FIELD_INDEX[opposite], 0))
+
+            self.lines.append((constants, row_fields))
+
+    def emit(
+        self, row: Dict[str, Any], header: List[Any], number: int
+    ) -> List[VoucherEntry]:
+        """按凭证表头生成一张凭证的全部分录"""
+        voucher = header.copy()
+        for index in NUMBER_INDEXES:
+            voucher[index] = number
+        voucher[EXPLANATION_INDEX] = row.get("FExplanation", "")
+
+        entries = []
+        for constants, row_fields in self.lines:
+            values = voucher.copy()
+            for index, value in constants:
+                values[index] = value
+            for index, name, default in row_fields:
+                values[index] = row.get(name, default)
+            entries.append(VoucherEntry._make(values))
+        return entries
+
+
+def compile_posting_rules(
+    rules: Dict[str, Iterable[PostingLine]],
+) -> Dict[str, PostingEmitter]:
+    """把规则表编译为 {形态: 生成器}"""
+    return {shape: PostingEmitter(lines) for shape, lines in rules.items()}
+
+
+PAYMENT_EMITTERS = compile_posting_rules(POSTING_RULES)
+
+
+def select_shape(payment_type: Any, real_tax_cents: int) -> Optional[str]:
+    """按付款方式和税额选择凭证形态，不支持的付款方式返回 None"""
+    shapes = PAYMENT_SHAPES.get(payment_type)
+    if shapes is None:
+        return None
+    return shapes[1] if real_tax_cents else shapes[0]
+
+
+def emit_payment_vouchers(
+    rows: Iterable[Dict[str, Any]],
+    header_for: Callable[[Dict[str, Any]], List[Any]],
+    start: int = 1,
+) -> List[List[VoucherEntry]]:
+    """
+    批量生成排单凭证
+
+    Args:
+        rows: 已计算金额（分）的排单行
+        header_for: 行 → 凭证表头（按列排列的值列表）
+        start: 第一张凭证的凭证号
+
+    Returns:
+        每行对应的分录列表（不支持的付款方式为空列表）
+    """
+    emitters = PAYMENT_EMITTERS
+    vouchers = []
+    for number, row in enumerate(rows, start):
+        shape = select_shape(row.get("paymentType", ""), row.get("realTaxCents", 0))
+        emitter = emitters.get(shape)
+        if emitter is None:
+            vouchers.append([])
+        else:
+            vouchers.append(emitter.emit(row, header_for(row), number))
+    return vouchers
@@ -0,0 +1,88 @@
+"""
+工作表规格 - 声明式描述工作表的位置与字段映射
+
+每个工作表只解析一次表头，得到各字段所在的列位置，再编译成按位置取值的
+行映射函数，逐行处理时不再查找表头和 key_map。
+
+桌面版（src）中的对应模块为 src/processors/sheet_specs.py，修改时同步。
+"""
+
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, Callable, Collection, Dict, Iterator, Optional, Sequence, Tuple
+
+RowMapper = Callable[[Tuple[Any, ...]], Dict[str, Any]]
+
+
+def compile_row_mapper(
+    header_cells: Sequence[Any], key_map: Dict[str, str]
+) -> RowMapper:
+    """
+    根据表头编译行映射函数
+
+    表头中不在 key_map 里的列会被忽略；同一字段出现在多列时取最后一列，
+    与逐格映射的结果一致。
+
+    Returns:
+        把行元组转换为 {字段名: 值} 字典的函数
+    """
+    positions: Dict[str, int] = {}
+    for index, header_value in enumerate(header_cells):
+        if header_value in key_map:
+            positions[key_map[header_value]] = index
+
+    fields = tuple(positions)
+    if not fields:
+        return lambda row: {}
+
+    if len(fields) == 1:
+        # itemgetter 只取一个位置时返回单个值而不是元组
+        field, index = fields[0], positions[fields[0]]
+        return lambda row: {field: row[index]}
+
+    getter = itemgetter(*positions.values())
+    return lambda row: dict(zip(fields, getter(row)))
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """工作表规格"""
+
+    sheet_name: str
+    key_map: Dict[str, str]
+    max_col: int = 4
+    start_row: int = 2
+    header_row: int = 1
+
+    def compile(self, header_cells: Sequence[Any]) -> RowMapper:
+        """按实际表头编译行映射函数（只取前 max_col 列）"""
+        return compile_row_mapper(header_cells[: self.max_col], self.key_map)
+
+
+def iter_mapped_rows(
+    session, spec: SheetSpec, check_list: Optional[Collection[Any]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    按规格逐行读取工作簿会话中的工作表
+
+    跳过第一列为空的行；check_list 不为None时，只保留第一列在其中的行。
+    """
+    if not session.has_sheet(spec.sheet_name):
+        raise ValueError(f"工作表 '{spec.sheet_name}' 不存在")
+
+    header_cells = session.read_row(spec.sheet_name, spec.header_row, spec.max_col)
+    map_row = spec.compile(header_cells)
+
+    # 逐行判断是否在列表中，转成集合避免 O(行数×列表长度) 的查找
+    if check_list is not None and not isinstance(check_list, (set, frozenset)):
+        check_list = set(check_list)
+
+    for row in session.iter_rows(
+        spec.sheet_name, min_row=spec.start_row, max_col=spec.max_col
+    ):
+        item = row[0]
+        if item is None:
+            continue
+        if check_list is not None and item not in check_list:
+            continue
+        yield map_row(row)
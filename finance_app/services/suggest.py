@@ -0,0 +1,75 @@
+"""
+相近名称建议 - 基于字符 n-gram 倒排索引查找与输入最接近的主数据简称
+
+供应商、项目简称多为短中文名称，按字符二元组（首尾加边界符）建立倒排索引，
+查询时只对至少共享一个二元组的候选计算 Dice 相似度，不必逐个比较全部名称。
+"""
+
+import heapq
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# 首尾边界符，使单字名称和首尾字符也能参与匹配
+NGRAM_BOUNDARY = "\x00"
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """名称的字符 n-gram 集合（忽略大小写和首尾空白）"""
+    padded = NGRAM_BOUNDARY + text.strip().lower() + NGRAM_BOUNDARY
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """名称 n-gram 倒排索引"""
+
+    def __init__(self, names: Iterable[Any], n: int = 2):
+        self.n = n
+        self.names: List[str] = []
+        self.gram_counts: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+
+        seen = set()
+        for name in names:
+            if name is None:
+                continue
+            name = str(name)
+            if name in seen:
+                continue
+            seen.add(name)
+
+            grams = char_ngrams(name, n)
+            name_id = len(self.names)
+            self.names.append(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(name_id)
+
+    def suggest(
+        self, query: Any, limit: int = 3, min_score: float = 0.3
+    ) -> List[Tuple[str, float]]:
+        """
+        查找与 query 最相近的名称
+
+        Returns:
+            [(名称, 相似度)]，按相似度从高到低排列，相似度低于 min_score 的不返回
+        """
+        if query is None:
+            return []
+        grams = char_ngrams(str(query), self.n)
+
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for name_id in self.postings.get(gram, ()):
+                overlaps[name_id] += 1
+
+        # 相似度相同时，靠前的名称优先
+        scored = (
+            (2 * shared / (len(grams) + self.gram_counts[name_id]), -name_id)
+            for name_id, shared in overlaps.items()
+        )
+        best = heapq.nlargest(limit, scored)
+        return [
+            (self.names[-negative_id], round(score, 3))
+            for score, negative_id in best
+            if score >= min_score
+        ]
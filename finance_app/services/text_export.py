@@ -0,0 +1,188 @@
+"""
+文本格式导出 - 把凭证分录写成 CSV 或金蝶凭证引入用的制表符分隔文本
+
+列顺序与 xlsx 的 Page1 工作表相同（EXCEL_HEADERS），第一行为表头。
+金额由分直接格式化为两位小数的元，不经过浮点数；文本按块编码后逐段产出，
+既可以写入文件，也可以直接作为 HTTP 响应体发送。
+"""
+
+import codecs
+import csv
+import io
+import os
+import re
+from decimal import Decimal
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Union
+
+from .money import to_cents
+from .voucher_entry import (
+    AMOUNT_FOR_INDEX,
+    CREDIT_INDEX,
+    DEBIT_INDEX,
+    EXCEL_HEADERS,
+    MONEY_INDEXES,
+)
+
+# 每写出这么多行交给调用方一次
+FLUSH_ROWS = 1000
+
+
+class TextFormat(NamedTuple):
+    """文本输出格式"""
+
+    label: str
+    extension: str
+    content_type: str
+    delimiter: str
+    encoding: str
+    # False 时不加引号，值中的分隔符和换行替换为空格（金蝶引入不识别引号）
+    quoting: bool
+
+
+TEXT_FORMATS: Dict[str, TextFormat] = {
+    # 带 BOM，Excel 直接打开时中文不乱码
+    "csv": TextFormat("CSV", ".csv", "text/csv", ",", "utf-8-sig", True),
+    # 金蝶凭证引入：制表符分隔、GB18030 编码
+    "txt": TextFormat("金蝶凭证引入文本", ".txt", "text/plain", "\t", "gb18030", False),
+}
+
+LINE_TERMINATOR = "\r\n"
+
+_UNSAFE_CHARS = re.compile(r"[\t\r\n]")
+
+
+def format_for_path(path: str) -> str:
+    """按扩展名判断输出文件的格式（TEXT_FORMATS 的键，其余为 "xlsx"）"""
+    extension = os.path.splitext(path)[1].lower()
+    for name, text_format in TEXT_FORMATS.items():
+        if text_format.extension == extension:
+            return name
+    return "xlsx"
+
+
+def format_cents(cents: int) -> str:
+    """分 → 两位小数的元，如 123456 → "1234.56" """
+    return str(Decimal(cents).scaleb(-2))
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float):
+        return "%.16G" % value
+    return str(value)
+
+
+def text_row(entry: Iterable[Any], quoting: bool = True) -> List[str]:
+    """分录（金额列为分）→ 一行文本值"""
+    values = list(entry)
+    for index in MONEY_INDEXES:
+        if values[index] is not None:
+            values[index] = format_cents(values[index])
+    values = [_format_value(value) for value in values]
+    if not quoting:
+        values = [_UNSAFE_CHARS.sub(" ", value) for value in values]
+    return values
+
+
+def _writer(buffer: io.StringIO, text_format: TextFormat):
+    if text_format.quoting:
+        return csv.writer(
+            buffer, delimiter=text_format.delimiter, lineterminator=LINE_TERMINATOR
+        )
+    return csv.writer(
+        buffer,
+        delimiter=text_format.delimiter,
+        lineterminator=LINE_TERMINATOR,
+        quoting=csv.QUOTE_NONE,
+        quotechar=None,
+    )
+
+
+def iter_text(
+    entries: Iterable[Iterable[Any]],
+    text_format: TextFormat,
+    flush_rows: int = FLUSH_ROWS,
+) -> Iterator[bytes]:
+    """
+    逐段产出文本文件的字节
+
+    Args:
+        entries: 按 EXCEL_HEADERS 列顺序的分录，金额列以分表示
+        text_format: TEXT_FORMATS 中的格式
+        flush_rows: 每写出多少行交出一次编码后的数据
+    """
+    buffer = io.StringIO()
+    writer = _writer(buffer, text_format)
+    encoder = codecs.getincrementalencoder(text_format.encoding)()
+
+    def drain(final: bool = False) -> bytes:
+        data = encoder.encode(buffer.getvalue(), final)
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(EXCEL_HEADERS)
+    for row_number, entry in enumerate(entries, 1):
+        writer.writerow(text_row(entry, text_format.quoting))
+        if row_number % flush_rows == 0:
+            yield drain()
+    yield drain(final=True)
+
+
+def write_text(
+    target: Union[str, BinaryIO],
+    entries: Iterable[Iterable[Any]],
+    text_format: TextFormat,
+) -> None:
+    """把分录写入文件路径或可写的二进制文件对象"""
+    if isinstance(target, str):
+        with open(target, "wb") as f:
+            write_text(f, entries, text_format)
+        return
+    for chunk in iter_text(entries, text_format):
+        target.write(chunk)
+
+
+def entry_from_cells(cells: Iterable[Any], derive_amount: bool = False) -> List[Any]:
+    """
+    已导出文件中的一行单元格 → 按列顺序的分录值（金额列换算为分）
+
+    Args:
+        derive_amount: FAmountFor 按借方加贷方计算。xlsx 中报销分录的 FAmountFor
+            是求和公式，读回的只是未计算的缓存值
+    """
+    values = list(cells)[: len(EXCEL_HEADERS)]
+    values.extend([None] * (len(EXCEL_HEADERS) - len(values)))
+    if derive_amount:
+        values[AMOUNT_FOR_INDEX] = None
+    for index in MONEY_INDEXES:
+        if values[index] is not None:
+            values[index] = to_cents(values[index])
+    if derive_amount:
+        values[AMOUNT_FOR_INDEX] = (values[DEBIT_INDEX] or 0) + (
+            values[CREDIT_INDEX] or 0
+        )
+    return values
+
+
+def read_text(path: str, text_format: TextFormat) -> Iterator[List[Any]]:
+    """
+    读取 write_text 写出的文件，逐行返回分录的值（金额列换算为分，空值为 None）
+
+    Raises:
+        ValueError: 表头与 EXCEL_HEADERS 不一致
+    """
+    with open(path, "r", encoding=text_format.encoding, newline="") as f:
+        if text_format.quoting:
+            reader = csv.reader(f, delimiter=text_format.delimiter)
+        else:
+            reader = csv.reader(
+                f, delimiter=text_format.delimiter, quoting=csv.QUOTE_NONE
+            )
+        if next(reader, None) != EXCEL_HEADERS:
+            raise ValueError(f"文件表头不是凭证导入格式: {path}")
+        for values in reader:
+            yield entry_from_cells(value if value != "" else None for value in values)
@@ -0,0 +1,89 @@
+"""
+凭证分录 - 按 EXCEL_HEADERS 列顺序存放的紧凑分录类型
+
+分录以 namedtuple（__slots__ 为空、基于元组）表示，字段顺序即导出文件的列顺序，
+比按表头名索引的字典占用内存少得多，写出时也可以整行输出而无需逐列查找。
+"""
+
+from collections import namedtuple
+from typing import Any, Dict, List, Sequence
+
+from .money import MONEY_FIELDS, cents_to_amount
+
+# 金蝶凭证导入文件的列（即 VoucherEntry 的字段顺序）
+EXCEL_HEADERS = [
+    "FDate",
+    "FYear",
+    "FPeriod",
+    "FGroupID",
+    "FNumber",
+    "FAccountNum",
+    "FAccountName",
+    "FCurrencyNum",
+    "FCurrencyName",
+    "FAmountFor",
+    "FDebit",
+    "FCredit",
+    "FPreparerID",
+    "FCheckerID",
+    "FApproveID",
+    "FCashierID",
+    "FHandler",
+    "FSettleTypeID",
+    "FSettleNo",
+    "FExplanation",
+    "FQuantity",
+    "FMeasureUnitID",
+    "FUnitPrice",
+    "FReference",
+    "FTransDate",
+    "FTransNo",
+    "FAttachments",
+    "FSerialNum",
+    "FObjectName",
+    "FParameter",
+    "FExchangeRate",
+    "FEntryID",
+    "FItem",
+    "FPosted",
+    "FInternalInd",
+    "FCashFlow",
+]
+
+VoucherEntry = namedtuple("VoucherEntry", EXCEL_HEADERS)
+
+# 字段名 → 列下标
+FIELD_INDEX: Dict[str, int] = {name: index for index, name in enumerate(EXCEL_HEADERS)}
+
+AMOUNT_FOR_INDEX = FIELD_INDEX["FAmountFor"]
+DEBIT_INDEX = FIELD_INDEX["FDebit"]
+CREDIT_INDEX = FIELD_INDEX["FCredit"]
+
+# 以分表示、写出时需换算为元的列
+MONEY_INDEXES = tuple(FIELD_INDEX[name] for name in MONEY_FIELDS)
+
+
+def entry_values(fields: Dict[str, Any]) -> List[Any]:
+    """按列顺序展开字段字典，未给出的列为 None"""
+    values: List[Any] = [None] * len(EXCEL_HEADERS)
+    for name, value in fields.items():
+        values[FIELD_INDEX[name]] = value
+    return values
+
+
+def make_entry(base: Sequence[Any], *fields: Dict[str, Any]) -> VoucherEntry:
+    """在按列排列的基础值（如凭证表头）上填入各字段，生成分录"""
+    values = list(base)
+    for part in fields:
+        for name, value in part.items():
+            values[FIELD_INDEX[name]] = value
+    return VoucherEntry._make(values)
+
+
+def output_row(entry: VoucherEntry) -> List[Any]:
+    """分录转换为写出的一行值（金额由分换算为元）"""
+    values = list(entry)
+    for index in MONEY_INDEXES:
+        if values[index] is not None:
+            values[index] = cents_to_amount(values[index])
+    return values
@@ -0,0 +1,90 @@
+"""
+凭证表头模板 - 按批次预先生成分录中不随行变化的字段
+
+一次任务内制单人、币别、审核人等字段对所有分录相同，日期字段只随凭证日期变化。
+模板在任务开始时生成一次常量部分，每个不同的日期再生成一次带日期的表头
+（按 EXCEL_HEADERS 列顺序排列的值列表），各分录只需在表头副本上补充自己的变动字段。
+"""
+
+import datetime
+from typing import Any, Callable, Dict, List
+
+from .voucher_entry import VoucherEntry, entry_values, make_entry
+
+# 所有分录相同的字段
+VOUCHER_HEADER_CONSTANTS = {
+    "FGroupID": "记",
+    "FCurrencyNum": "RMB",
+    "FCurrencyName": "人民币",
+    "FCheckerID": "NONE",
+    "FApproveID": "NONE",
+    "FCashierID": "NONE",
+    "FHandler": "",
+    "FSettleTypeID": "*",
+    "FSettleNo": "",
+    "FQuantity": 0,
+    "FMeasureUnitID": "*",
+    "FUnitPrice": 0,
+    "FReference": "",
+    "FTransNo": "",
+    "FAttachments": 0,
+    "FObjectName": "",
+    "FParameter": "",
+    "FExchangeRate": 1,
+    "FPosted": 0,
+    "FInternalInd": "",
+    "FCashFlow": "",
+}
+
+
+class VoucherHeaderTemplate:
+    """批次范围的凭证表头模板"""
+
+    def __init__(self, preparer: str, **fields: Any):
+        """
+        Args:
+            preparer: 制单人显示名称
+            fields: 本批次其他固定字段（如报销凭证的 FSerialNum=1）
+        """
+        self.constants = {
+            **VOUCHER_HEADER_CONSTANTS,
+            "FPreparerID": preparer,
+            **fields,
+        }
+        self._by_date: Dict[str, List[Any]] = {}
+        self._by_month_day: Dict[Any, List[Any]] = {}
+
+    def for_date(self, fdate: str, fyear: str, fperiod: str) -> List[Any]:
+        """已格式化日期对应的表头（同一日期只生成一次，调用方不要修改）"""
+        header = self._by_date.get(fdate)
+        if header is None:
+            header = entry_values(
+                {
+                    **self.constants,
+                    "FDate": fdate,
+                    "FYear": fyear,
+                    "FPeriod": fperiod,
+                    "FTransDate": fdate,
+                }
+            )
+            self._by_date[fdate] = header
+        return header
+
+    def for_month_day(
+        self, month_day: Any, parse_date: Callable[[Any], datetime.datetime]
+    ) -> List[Any]:
+        """“月.日”原始值对应的表头，每个不同的原始值只解析一次"""
+        header = self._by_month_day.get(month_day)
+        if header is None:
+            real_date = parse_date(month_day)
+            header = self.for_date(
+                real_date.strftime("%Y-%m-%d"),
+                real_date.strftime("%Y"),
+                real_date.strftime("%m"),
+            )
+            self._by_month_day[month_day] = header
+        return header
+
+    def entry(self, header: List[Any], *fields: Dict[str, Any]) -> VoucherEntry:
+        """在表头上填入分录自己的字段"""
+        return make_entry(header, *fields)
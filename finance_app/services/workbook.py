@@ -0,0 +1,222 @@
+"""
+工作簿会话 - 一次处理任务内只加载一次Excel文件，供各解析方法共用
+"""
+
+import openpyxl
+import zipfile
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .csv_reader import CsvBundleReader, is_csv_bundle
+from .xls_reader import XlsReader
+from .xlsx_reader import NativeXlsxReader
+
+# 可选的读取引擎（.xlsx 文件）
+READER_ENGINES = ("openpyxl", "native")
+
+# 文件头标识
+XLSX_MAGIC = b"PK\x03\x04"
+XLS_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+def detect_workbook_format(header: bytes) -> Optional[str]:
+    """
+    根据文件开头的字节判断工作簿格式
+
+    Returns:
+        "xlsx"（zip 压缩包）、"xls"（OLE2 复合文档）或 None（无法识别）
+    """
+    if header.startswith(XLSX_MAGIC):
+        return "xlsx"
+    if header.startswith(XLS_MAGIC):
+        return "xls"
+    return None
+
+
+def _detect_stream_format(stream: IO[bytes]) -> Optional[str]:
+    """判断文件流的格式，zip 压缩包再区分 xlsx 工作簿和CSV包"""
+    file_format = detect_workbook_format(stream.read(len(XLS_MAGIC)))
+    if file_format != "xlsx":
+        return file_format
+
+    stream.seek(0)
+    try:
+        with zipfile.ZipFile(stream) as archive:
+            if is_csv_bundle(archive.namelist()):
+                return "csv"
+    except zipfile.BadZipFile:
+        return None
+    return file_format
+
+
+def detect_file_format(source: Union[str, IO[bytes]]) -> Optional[str]:
+    """
+    判断文件格式
+
+    Args:
+        source: 文件路径，或可 seek 的文件对象（读取后会恢复原位置）
+
+    Returns:
+        "xlsx"、"xls"、"csv"（CSV压缩包）或 None（无法识别）
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return _detect_stream_format(f)
+
+    position = source.tell()
+    try:
+        source.seek(0)
+        return _detect_stream_format(source)
+    finally:
+        source.seek(position)
+
+
+class OpenpyxlReader:
+    """
+    基于 openpyxl 的读取引擎
+
+    read_only=True 时使用 openpyxl 的只读模式，工作表按行流式读取，
+    不会在内存中构建完整的单元格对象模型。
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.workbook = openpyxl.load_workbook(
+            path, read_only=read_only, data_only=True
+        )
+
+    @property
+    def sheetnames(self) -> List[str]:
+        """工作表名称列表"""
+        return self.workbook.sheetnames
+
+    def iter_rows(
+        self, sheet_name: str, min_row: int = 1, max_col: Optional[int] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """按行返回单元格的值"""
+        sheet = self.workbook[sheet_name]
+        return sheet.iter_rows(min_row=min_row, max_col=max_col, values_only=True)
+
+    def max_row(self, sheet_name: str) -> Optional[int]:
+        """工作表报告的最大行号"""
+        return self.workbook[sheet_name].max_row
+
+    def close(self) -> None:
+        """关闭工作簿"""
+        self.workbook.close()
+
+
+def _is_blank_row(values: Tuple[Any, ...]) -> bool:
+    """整行都为空值或空白字符串"""
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, str) and not value.strip():
+            continue
+        return False
+    return True
+
+
+class WorkbookSession:
+    """
+    工作簿会话
+
+    engine 指定读取引擎："openpyxl"（默认）或 "native"（见 xlsx_reader），
+    两者产出的行元组完全相同。按文件头识别为 .xls 的文件不论 engine
+    如何都使用 XlsReader，CSV压缩包使用 CsvBundleReader，
+    扩展名与实际格式不符时也能正确读取。
+
+    empty_row_limit 不为空时，连续空行达到该数量即视为数据结束。整列设置过
+    格式的工作表 dimension 会达到 1048576 行，不设上限就要逐行遍历这些空行。
+    被跳过的行数记录在 skipped_rows 中（dimension 未知时记为 None）。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        read_only: bool = False,
+        engine: str = "openpyxl",
+        empty_row_limit: Optional[int] = None,
+    ):
+        self.path = path
+        self.read_only = read_only
+        self.engine = engine
+        self.empty_row_limit = empty_row_limit
+        self.skipped_rows: Dict[str, Optional[int]] = {}
+
+        if engine not in READER_ENGINES:
+            raise ValueError(f"不支持的读取引擎: {engine}")
+
+        file_format = detect_file_format(path)
+        if file_format == "xls":
+            self.reader = XlsReader(path)
+        elif file_format == "csv":
+            self.reader = CsvBundleReader(path)
+        elif engine == "native":
+            self.reader = NativeXlsxReader(path)
+        else:
+            self.reader = OpenpyxlReader(path, read_only=read_only)
+
+    @property
+    def sheetnames(self) -> List[str]:
+        """工作表名称列表"""
+        return self.reader.sheetnames
+
+    def has_sheet(self, sheet_name: str) -> bool:
+        """判断工作表是否存在"""
+        return sheet_name in self.reader.sheetnames
+
+    def iter_rows(
+        self, sheet_name: str, min_row: int = 1, max_col: Optional[int] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """按行返回单元格的值"""
+        rows = self.reader.iter_rows(sheet_name, min_row=min_row, max_col=max_col)
+        if not self.empty_row_limit:
+            return rows
+        return self._iter_until_blank_run(sheet_name, rows, min_row)
+
+    def _iter_until_blank_run(
+        self, sheet_name: str, rows: Iterator[Tuple[Any, ...]], min_row: int
+    ) -> Iterator[Tuple[Any, ...]]:
+        """连续空行达到上限后停止读取，并记录跳过的行数"""
+        blank_run = 0
+        row_index = min_row - 1
+        try:
+            for values in rows:
+                row_index += 1
+                if _is_blank_row(values):
+                    blank_run += 1
+                    if blank_run >= self.empty_row_limit:
+                        max_row = self.reader.max_row(sheet_name)
+                        if max_row is None:
+                            self.skipped_rows[sheet_name] = None
+                        elif max_row > row_index:
+                            self.skipped_rows[sheet_name] = max_row - row_index
+                        break
+                else:
+                    blank_run = 0
+                yield values
+        finally:
+            rows.close()
+
+    def read_row(
+        self, sheet_name: str, row: int, max_col: Optional[int] = None
+    ) -> Tuple[Any, ...]:
+        """读取单行的值（通常用于表头）"""
+        rows = self.reader.iter_rows(sheet_name, min_row=row, max_col=max_col)
+        try:
+            for values in rows:
+                return values
+            return ()
+        finally:
+            rows.close()
+
+    def close(self) -> None:
+        """关闭工作簿"""
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def __enter__(self) -> "WorkbookSession":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
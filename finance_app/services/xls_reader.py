@@ -0,0 +1,86 @@
+"""
+XLS读取引擎 - 用 xlrd 读取旧版 BIFF 格式（.xls）的工作簿
+
+产出与 openpyxl（data_only=True, values_only=True）相同形式的行元组：
+整数值的数字转为 int，日期格式的数字转为 datetime，空单元格为 None。
+xlrd 为可选依赖，未安装时 XLS_SUPPORTED 为 False。
+"""
+
+from typing import Any, Iterator, List, Optional, Tuple
+
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+
+try:
+    import xlrd
+except ImportError:  # pragma: no cover - 取决于部署环境
+    xlrd = None
+
+XLS_SUPPORTED = xlrd is not None
+
+
+class XlsReader:
+    """XLS读取器"""
+
+    def __init__(self, path: str):
+        if xlrd is None:
+            raise ValueError("读取 .xls 文件需要安装 xlrd")
+        self.path = path
+        self.workbook = xlrd.open_workbook(path, on_demand=True)
+        self.epoch = (
+            CALENDAR_MAC_1904 if self.workbook.datemode else CALENDAR_WINDOWS_1900
+        )
+
+    @property
+    def sheetnames(self) -> List[str]:
+        """工作表名称列表"""
+        return self.workbook.sheet_names()
+
+    def _sheet(self, sheet_name: str):
+        """按名称取工作表"""
+        try:
+            return self.workbook.sheet_by_name(sheet_name)
+        except xlrd.XLRDError:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+    def _cell_value(self, cell_type: int, value: Any) -> Any:
+        """按 openpyxl 的规则转换单元格的值"""
+        if cell_type == xlrd.XL_CELL_NUMBER:
+            return int(value) if value.is_integer() else value
+        if cell_type == xlrd.XL_CELL_TEXT:
+            return value or None
+        if cell_type == xlrd.XL_CELL_DATE:
+            try:
+                return from_excel(value, self.epoch)
+            except (OverflowError, ValueError):
+                return "#VALUE!"
+        if cell_type == xlrd.XL_CELL_BOOLEAN:
+            return bool(value)
+        if cell_type == xlrd.XL_CELL_ERROR:
+            return xlrd.error_text_from_code.get(value, "#N/A")
+        return None
+
+    def iter_rows(
+        self, sheet_name: str, min_row: int = 1, max_col: Optional[int] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """按行返回单元格的值，每行补齐到 max_col 列"""
+        sheet = self._sheet(sheet_name)
+        width = max_col or sheet.ncols
+        columns = min(width, sheet.ncols)
+        padding = (None,) * (width - columns)
+
+        for row_index in range(min_row - 1, sheet.nrows):
+            types = sheet.row_types(row_index, 0, columns)
+            values = sheet.row_values(row_index, 0, columns)
+            yield tuple(map(self._cell_value, types, values)) + padding
+
+        # 与 openpyxl 一致：空工作表视为只有一行空行
+        if sheet.nrows == 0 and min_row <= 1:
+            yield (None,) * width
+
+    def max_row(self, sheet_name: str) -> Optional[int]:
+        """工作表的最大行号"""
+        return self._sheet(sheet_name).nrows
+
+    def close(self) -> None:
+        """释放工作簿"""
+        self.workbook.release_resources()
@@ -0,0 +1,350 @@
+"""
+原生XLSX读取引擎 - 直接用 zipfile + iterparse 读取工作表XML
+
+只产出 values_only 形式的行元组，不创建 openpyxl 的 Cell 对象。
+单元格取值规则与 openpyxl（data_only=True）保持一致：数字、共享字符串、
+内联字符串、布尔值、错误值以及日期格式的数字都按相同方式转换。
+"""
+
+import posixpath
+import zipfile
+from xml.etree.ElementTree import fromstring, iterparse
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from openpyxl.styles.numbers import (
+    builtin_format_code,
+    is_date_format,
+    is_timedelta_format,
+)
+from openpyxl.utils.datetime import (
+    CALENDAR_MAC_1904,
+    CALENDAR_WINDOWS_1900,
+    from_excel,
+    from_ISO8601,
+)
+from openpyxl.xml.constants import PKG_REL_NS, REL_NS, SHEET_MAIN_NS
+
+# XML标签
+ROW_TAG = f"{{{SHEET_MAIN_NS}}}row"
+CELL_TAG = f"{{{SHEET_MAIN_NS}}}c"
+VALUE_TAG = f"{{{SHEET_MAIN_NS}}}v"
+INLINE_STRING_TAG = f"{{{SHEET_MAIN_NS}}}is"
+TEXT_TAG = f"{{{SHEET_MAIN_NS}}}t"
+RICH_RUN_TAG = f"{{{SHEET_MAIN_NS}}}r"
+STRING_ITEM_TAG = f"{{{SHEET_MAIN_NS}}}si"
+SHEET_DATA_TAG = f"{{{SHEET_MAIN_NS}}}sheetData"
+DIMENSION_TAG = f"{{{SHEET_MAIN_NS}}}dimension"
+RELATIONSHIP_TAG = f"{{{PKG_REL_NS}}}Relationship"
+
+# 关系类型
+OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+    "officeDocument"
+)
+SHARED_STRINGS_REL = f"{REL_NS}/sharedStrings"
+STYLES_REL = f"{REL_NS}/styles"
+
+
+def _column_index(coordinate: str) -> int:
+    """从单元格坐标（如 "AB12"）中取出列号（从1开始）"""
+    column = 0
+    for char in coordinate:
+        if "A" <= char <= "Z":
+            column = column * 26 + ord(char) - 64
+        else:
+            break
+    return column
+
+
+def _text_content(node) -> str:
+    """取字符串节点的纯文本，与 openpyxl Text.content 一致（忽略注音）"""
+    parts = []
+    for child in node:
+        if child.tag == TEXT_TAG:
+            if child.text is not None:
+                parts.append(child.text)
+        elif child.tag == RICH_RUN_TAG:
+            text = child.find(TEXT_TAG)
+            if text is not None and text.text is not None:
+                parts.append(text.text)
+    return "".join(parts)
+
+
+def _cast_number(value: str) -> Any:
+    """将数字字符串转换为 int 或 float"""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+class NativeXlsxReader:
+    """原生XLSX读取器"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.archive = zipfile.ZipFile(path)
+        self._sheet_parts: Dict[str, str] = {}
+        self._dimensions: Dict[str, str] = {}
+        self._max_columns: Dict[str, int] = {}
+        self._shared_strings: Optional[List[str]] = None
+        self._shared_strings_part: Optional[str] = None
+        self._styles_part: Optional[str] = None
+        self._date_formats: Set[int] = set()
+        self._timedelta_formats: Set[int] = set()
+        self.epoch = CALENDAR_WINDOWS_1900
+
+        self._read_workbook()
+        self._read_styles()
+
+    def _read_rels(self, part: str) -> Dict[str, Tuple[str, str]]:
+        """读取部件的关系文件，返回 {Id: (Type, 目标部件路径)}"""
+        folder, name = posixpath.split(part)
+        rels_part = posixpath.join(folder, "_rels", f"{name}.rels")
+        try:
+            root = fromstring(self.archive.read(rels_part))
+        except KeyError:
+            return {}
+
+        rels = {}
+        for rel in root.iter(RELATIONSHIP_TAG):
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            rels[rel.get("Id")] = (rel.get("Type"), target)
+        return rels
+
+    def _read_workbook(self) -> None:
+        """读取工作表名称与部件路径的对应关系"""
+        workbook_part = "xl/workbook.xml"
+        for rel_type, target in self._read_rels("").values():
+            if rel_type == OFFICE_DOCUMENT_REL:
+                workbook_part = target
+                break
+
+        rels = self._read_rels(workbook_part)
+        for rel_type, target in rels.values():
+            if rel_type == SHARED_STRINGS_REL:
+                self._shared_strings_part = target
+            elif rel_type == STYLES_REL:
+                self._styles_part = target
+
+        root = fromstring(self.archive.read(workbook_part))
+
+        workbook_pr = root.find(f"{{{SHEET_MAIN_NS}}}workbookPr")
+        if workbook_pr is not None and workbook_pr.get("date1904") in ("1", "true"):
+            self.epoch = CALENDAR_MAC_1904
+
+        for sheet in root.iter(f"{{{SHEET_MAIN_NS}}}sheet"):
+            rel_id = sheet.get(f"{{{REL_NS}}}id")
+            if rel_id in rels:
+                self._sheet_parts[sheet.get("name")] = rels[rel_id][1]
+
+    def _read_styles(self) -> None:
+        """找出使用日期/时长数字格式的单元格样式"""
+        if not self._styles_part:
+            return
+        try:
+            root = fromstring(self.archive.read(self._styles_part))
+        except KeyError:
+            return
+
+        custom_formats = {}
+        num_fmts = root.find(f"{{{SHEET_MAIN_NS}}}numFmts")
+        if num_fmts is not None:
+            for num_fmt in num_fmts:
+                custom_formats[int(num_fmt.get("numFmtId"))] = num_fmt.get("formatCode")
+
+        cell_xfs = root.find(f"{{{SHEET_MAIN_NS}}}cellXfs")
+        if cell_xfs is None:
+            return
+
+        for idx, xf in enumerate(cell_xfs):
+            num_fmt_id = int(xf.get("numFmtId", 0))
+            fmt = custom_formats.get(num_fmt_id) or builtin_format_code(num_fmt_id)
+            if is_date_format(fmt):
+                self._date_formats.add(idx)
+            if is_timedelta_format(fmt):
+                self._timedelta_formats.add(idx)
+
+    @property
+    def shared_strings(self) -> List[str]:
+        """共享字符串表（首次使用时读取）"""
+        if self._shared_strings is None:
+            strings = []
+            if self._shared_strings_part:
+                try:
+                    source = self.archive.open(self._shared_strings_part)
+                except KeyError:
+                    source = None
+                if source is not None:
+                    with source:
+                        for _, node in iterparse(source):
+                            if node.tag == STRING_ITEM_TAG:
+                                strings.append(
+                                    _text_content(node).replace("x005F_", "")
+                                )
+                                node.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    @property
+    def sheetnames(self) -> List[str]:
+        """工作表名称列表"""
+        return list(self._sheet_parts)
+
+    def _parse_cell(self, cell) -> Any:
+        """解析单个单元格的值"""
+        data_type = cell.get("t", "n")
+
+        if data_type == "inlineStr":
+            child = cell.find(INLINE_STRING_TAG)
+            if child is None:
+                return None
+            return _text_content(child)
+
+        value = cell.findtext(VALUE_TAG) or None
+        if value is None:
+            return None
+
+        if data_type == "n":
+            value = _cast_number(value)
+            style_id = int(cell.get("s") or 0)
+            if style_id in self._date_formats:
+                try:
+                    value = from_excel(
+                        value,
+                        self.epoch,
+                        timedelta=style_id in self._timedelta_formats,
+                    )
+                except (OverflowError, ValueError):
+                    value = "#VALUE!"
+        elif data_type == "s":
+            value = self.shared_strings[int(value)]
+        elif data_type == "b":
+            value = bool(int(value))
+        elif data_type == "d":
+            value = from_ISO8601(value)
+
+        return value
+
+    def iter_rows(
+        self, sheet_name: str, min_row: int = 1, max_col: Optional[int] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        按行返回单元格的值
+
+        与 openpyxl 非只读模式的 iter_rows(values_only=True) 相同：
+        中间缺失的行以全 None 元组补齐，读到最后一个含单元格的行为止；
+        未指定 max_col 时每行补齐到工作表的最大列（见 max_column）。
+        """
+        if sheet_name not in self._sheet_parts:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+        if max_col is None:
+            max_col = self.max_column(sheet_name)
+
+        # 先取共享字符串表，避免在遍历工作表时再打开另一个压缩流
+        self.shared_strings
+
+        width = max_col
+        empty_row = (None,) * width
+        next_row = min_row
+        row_counter = 0
+
+        with self.archive.open(self._sheet_parts[sheet_name]) as source:
+            sheet_data = None
+            for event, element in iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+
+                if element.tag != ROW_TAG:
+                    if element.tag == DIMENSION_TAG:
+                        self._dimensions[sheet_name] = element.get("ref", "")
+                    continue
+
+                row_ref = element.get("r")
+                row_counter = int(row_ref) if row_ref else row_counter + 1
+
+                if row_counter >= min_row and len(element):
+                    # 补齐中间的空行
+                    while next_row < row_counter:
+                        next_row += 1
+                        yield empty_row
+
+                    values = [None] * width
+                    column = 0
+                    for cell in element:
+                        if cell.tag != CELL_TAG:
+                            continue
+                        ref = cell.get("r")
+                        column = _column_index(ref) if ref else column + 1
+                        if column > max_col:
+                            continue
+                        values[column - 1] = self._parse_cell(cell)
+
+                    next_row = row_counter + 1
+                    yield tuple(values)
+
+                # 已处理的行及时释放
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+
+        # 与 openpyxl 一致：空工作表视为只有一行空行
+        if next_row == 1 and min_row <= 1:
+            yield empty_row
+
+    def max_column(self, sheet_name: str) -> int:
+        """
+        工作表中含单元格的最大列号，空工作表为 1
+
+        与 openpyxl 的 max_column 一样按实际的单元格计算，不采用 dimension
+        （其他程序写出的 dimension 可能缺失或过期）。需要额外扫描一遍工作表。
+        """
+        if sheet_name in self._max_columns:
+            return self._max_columns[sheet_name]
+        if sheet_name not in self._sheet_parts:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+
+        max_column = 1
+        with self.archive.open(self._sheet_parts[sheet_name]) as source:
+            sheet_data = None
+            for event, element in iterparse(source, events=("start", "end")):
+                if event == "start":
+                    if element.tag == SHEET_DATA_TAG:
+                        sheet_data = element
+                    continue
+                if element.tag != ROW_TAG:
+                    continue
+
+                column = 0
+                for cell in element:
+                    if cell.tag != CELL_TAG:
+                        continue
+                    ref = cell.get("r")
+                    column = _column_index(ref) if ref else column + 1
+                    if column > max_column:
+                        max_column = column
+
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+
+        self._max_columns[sheet_name] = max_column
+        return max_column
+
+    def max_row(self, sheet_name: str) -> Optional[int]:
+        """工作表 dimension 中记录的最大行号（读取过该工作表后才可用）"""
+        ref = self._dimensions.get(sheet_name, "")
+        digits = ref.rpartition(":")[2].lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        return int(digits) if digits.isdigit() else None
+
+    def close(self) -> None:
+        """关闭压缩包"""
+        self.archive.close()
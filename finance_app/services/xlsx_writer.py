@@ -0,0 +1,260 @@
+"""
+原生XLSX写出引擎 - 直接生成 SpreadsheetML 并边压缩边产出字节
+
+工作簿的固定部件（内容类型、关系、workbook.xml、样式）预先生成；工作表按行拼接XML
+写入 zip 条目，每写若干行就把已压缩的字节交给调用方，可以直接作为 HTTP 响应体发送，
+不需要先写到磁盘上的临时文件。输出为不可回退的流，zip 条目使用数据描述符记录大小。
+
+单元格取值规则与 xlsxwriter 的 write() 保持一致：None 和空字符串不写，布尔值、
+数字按类型写出，以“=”开头的字符串作为公式，其余为内联字符串。
+"""
+
+import math
+import re
+import time
+import zipfile
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, BinaryIO, Iterable, Iterator, List, Sequence, Tuple, Union
+from xml.sax.saxutils import escape
+
+from openpyxl.xml.constants import PKG_REL_NS, REL_NS, SHEET_MAIN_NS
+
+# (工作表名称, 各行的值；也可以是 render_rows 预先生成的XML)
+Sheet = Tuple[str, Union[bytes, Iterable[Sequence[Any]]]]
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+OFFICE_DOCUMENT_REL = f"{REL_NS}/officeDocument"
+WORKSHEET_REL = f"{REL_NS}/worksheet"
+STYLES_REL = f"{REL_NS}/styles"
+SPREADSHEETML = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# 每写出这么多行把已压缩的数据交给调用方一次
+FLUSH_ROWS = 500
+
+STYLES_XML = (
+    XML_DECLARATION + f'<styleSheet xmlns="{SHEET_MAIN_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    "</borders>"
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    "</cellStyleXfs>"
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    "</cellXfs>"
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    "</cellStyles></styleSheet>"
+)
+
+WORKSHEET_HEAD = (
+    XML_DECLARATION + f'<worksheet xmlns="{SHEET_MAIN_NS}" xmlns:r="{REL_NS}">'
+    "<sheetData>"
+).encode("utf-8")
+WORKSHEET_TAIL = b"</sheetData></worksheet>"
+
+# XML 1.0 不允许的控制字符，按 Excel 的 _xHHHH_ 形式转义
+CONTROL_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def column_letter(index: int) -> str:
+    """列下标（从0开始）→ 列字母"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+@lru_cache(maxsize=None)
+def _column_letters(count: int) -> Tuple[str, ...]:
+    return tuple(column_letter(index) for index in range(count))
+
+
+def _text(value: str) -> str:
+    text = escape(value)
+    if CONTROL_CHARS.search(text):
+        text = CONTROL_CHARS.sub(lambda m: f"_x{ord(m.group()):04X}_", text)
+    return text
+
+
+def _number(value: Union[int, float, Decimal]) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if not math.isfinite(value):
+        raise ValueError(f"不支持的数值: {value}")
+    return "%.16G" % value
+
+
+def render_row(row_number: int, values: Sequence[Any]) -> str:
+    """一行的XML，row_number 从1开始"""
+    parts = [f'<row r="{row_number}">']
+    for letter, value in zip(_column_letters(len(values)), values):
+        if value is None:
+            continue
+        ref = f"{letter}{row_number}"
+        kind = type(value)
+        if kind is str:
+            if not value:
+                continue
+            if value[0] == "=":
+                parts.append(f'<c r="{ref}"><f>{_text(value[1:])}</f><v>0</v></c>')
+            elif value[0].isspace() or value[-1].isspace():
+                parts.append(
+                    f'<c r="{ref}" t="inlineStr">'
+                    f'<is><t xml:space="preserve">{_text(value)}</t></is></c>'
+                )
+            else:
+                parts.append(
+                    f'<c r="{ref}" t="inlineStr"><is><t>{_text(value)}</t></is></c>'
+                )
+        elif kind is bool:
+            parts.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif kind is int or kind is float or kind is Decimal:
+            parts.append(f'<c r="{ref}"><v>{_number(value)}</v></c>')
+        else:
+            parts.append(
+                f'<c r="{ref}" t="inlineStr"><is><t>{_text(str(value))}</t></is></c>'
+            )
+    parts.append("</row>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=8)
+def render_rows(rows: Tuple[Tuple[Any, ...], ...]) -> bytes:
+    """
+    预先生成若干行的XML（从第1行开始）
+
+    用于内容固定的工作表（如 t_Schema）；相同的行只生成一次。
+    """
+    return "".join(
+        render_row(row_number, values) for row_number, values in enumerate(rows, 1)
+    ).encode("utf-8")
+
+
+def _package_parts(sheet_names: Sequence[str]) -> List[Tuple[str, str]]:
+    """工作簿的固定部件：[(zip内路径, XML)]"""
+    sheet_overrides = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+        f'ContentType="{SPREADSHEETML}.worksheet+xml"/>'
+        for index in range(1, len(sheet_names) + 1)
+    )
+    content_types = (
+        XML_DECLARATION + f'<Types xmlns="{CONTENT_TYPES_NS}">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        f'ContentType="{SPREADSHEETML}.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        f'ContentType="{SPREADSHEETML}.styles+xml"/>'
+        f"{sheet_overrides}</Types>"
+    )
+    root_rels = (
+        XML_DECLARATION + f'<Relationships xmlns="{PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_DOCUMENT_REL}" '
+        'Target="xl/workbook.xml"/></Relationships>'
+    )
+    sheets = "".join(
+        f'<sheet name="{escape(name, {chr(34): "&quot;"})}" sheetId="{index}" '
+        f'r:id="rId{index}"/>'
+        for index, name in enumerate(sheet_names, 1)
+    )
+    workbook = (
+        XML_DECLARATION + f'<workbook xmlns="{SHEET_MAIN_NS}" xmlns:r="{REL_NS}">'
+        f'<sheets>{sheets}</sheets><calcPr fullCalcOnLoad="1"/></workbook>'
+    )
+    sheet_rels = "".join(
+        f'<Relationship Id="rId{index}" Type="{WORKSHEET_REL}" '
+        f'Target="worksheets/sheet{index}.xml"/>'
+        for index in range(1, len(sheet_names) + 1)
+    )
+    workbook_rels = (
+        XML_DECLARATION + f'<Relationships xmlns="{PKG_REL_NS}">{sheet_rels}'
+        f'<Relationship Id="rId{len(sheet_names) + 1}" Type="{STYLES_REL}" '
+        'Target="styles.xml"/></Relationships>'
+    )
+    return [
+        ("[Content_Types].xml", content_types),
+        ("_rels/.rels", root_rels),
+        ("xl/workbook.xml", workbook),
+        ("xl/_rels/workbook.xml.rels", workbook_rels),
+        ("xl/styles.xml", STYLES_XML),
+    ]
+
+
+class _ChunkSink:
+    """只追加的输出目标，zipfile 写入的字节暂存在这里，由生成器取走"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _zip_info(name: str, date_time: Tuple[int, ...]) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=date_time)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_workbook(
+    sheets: Sequence[Sheet], flush_rows: int = FLUSH_ROWS
+) -> Iterator[bytes]:
+    """
+    逐段产出工作簿文件的字节
+
+    Args:
+        sheets: 按顺序排列的工作表；各行依次写在第1行开始的位置
+        flush_rows: 每写出多少行交出一次已压缩的数据
+    """
+    sink = _ChunkSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _package_parts([name for name, _ in sheets]):
+            archive.writestr(_zip_info(name, date_time), xml)
+        yield sink.drain()
+
+        for index, (_, rows) in enumerate(sheets, 1):
+            info = _zip_info(f"xl/worksheets/sheet{index}.xml", date_time)
+            with archive.open(info, "w") as part:
+                part.write(WORKSHEET_HEAD)
+                if isinstance(rows, bytes):
+                    part.write(rows)
+                else:
+                    for row_number, values in enumerate(rows, 1):
+                        part.write(render_row(row_number, values).encode("utf-8"))
+                        if row_number % flush_rows == 0 and sink.chunks:
+                            yield sink.drain()
+                part.write(WORKSHEET_TAIL)
+            if sink.chunks:
+                yield sink.drain()
+
+    # 中央目录
+    if sink.chunks:
+        yield sink.drain()
+
+
+def write_workbook(
+    target: Union[str, BinaryIO], sheets: Sequence[Sheet], flush_rows: int = FLUSH_ROWS
+) -> None:
+    """把工作簿写入文件路径或可写的二进制文件对象"""
+    if isinstance(target, str):
+        with open(target, "wb") as f:
+            write_workbook(f, sheets, flush_rows)
+        return
+    for chunk in iter_workbook(sheets, flush_rows):
+        target.write(chunk)
@@ -0,0 +1,56 @@
+"""
+金额换算测试 - to_cents 四舍五入到分，与单元格中看到的数值一致
+"""
+
+from decimal import Decimal
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from finance_app.services.money import cents_to_amount, to_cents, to_cents_array
+
+
+class ToCentsTests(SimpleTestCase):
+    def test_rounds_half_up(self):
+        cases = [
+            (100.005, 10001),
+            ("100.005", 10001),
+            (1.005, 101),
+            (2.675, 268),
+            (0.125, 13),
+            (1234.564, 123456),
+            (Decimal("19.995"), 2000),
+        ]
+        for value, cents in cases:
+            with self.subTest(value=value):
+                self.assertEqual(to_cents(value), cents)
+
+    def test_negative_rounds_away_from_zero(self):
+        self.assertEqual(to_cents(-100.005), -10001)
+        self.assertEqual(to_cents("-0.005"), -1)
+
+    def test_integers_and_text(self):
+        self.assertEqual(to_cents(100), 10000)
+        self.assertEqual(to_cents(" 12.3 "), 1230)
+        self.assertEqual(to_cents("1e3"), 100000)
+
+    def test_blank_is_zero(self):
+        self.assertEqual(to_cents(None), 0)
+        self.assertEqual(to_cents(""), 0)
+
+    def test_invalid_amount(self):
+        for value in ("abc", "12,3", float("inf"), float("nan")):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    to_cents(value)
+
+    def test_array_matches_scalar(self):
+        amounts = [100.005, 1.005, 2.675, -100.005, 0.0, 9999999.995, 0.1 + 0.2]
+        self.assertEqual(
+            to_cents_array(np.array(amounts, dtype=np.float64)).tolist(),
+            [to_cents(amount) for amount in amounts],
+        )
+
+    def test_cents_to_amount(self):
+        self.assertEqual(cents_to_amount(10001), 100.01)
+        self.assertEqual(cents_to_amount(-5), -0.05)
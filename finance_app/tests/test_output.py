@@ -0,0 +1,152 @@
+"""
+输出格式测试 - 文本导出与原生写出引擎写出的内容能原样读回
+"""
+
+import io
+import os
+import shutil
+import tempfile
+
+import openpyxl
+from django.test import SimpleTestCase
+
+from finance_app.services.text_export import (
+    TEXT_FORMATS,
+    format_cents,
+    format_for_path,
+    iter_text,
+    read_text,
+    write_text,
+)
+from finance_app.services.voucher_entry import EXCEL_HEADERS, FIELD_INDEX
+from finance_app.services.xlsx_writer import (
+    column_letter,
+    iter_workbook,
+    write_workbook,
+)
+
+
+def entry(**fields):
+    values = [None] * len(EXCEL_HEADERS)
+    for name, value in fields.items():
+        values[FIELD_INDEX[name]] = value
+    return values
+
+
+# 文本格式读回的非金额列为字符串
+ENTRIES = [
+    entry(
+        FDate="2024-08-12",
+        FNumber="1",
+        FAccountNum="5001.01",
+        FAccountName="材料费",
+        FAmountFor=10001,
+        FDebit=10001,
+        FCredit=0,
+        FExplanation='摘要, 含"引号"',
+        FEntryID="0",
+    ),
+    entry(
+        FDate="2024-08-12",
+        FNumber="1",
+        FAccountNum="2202.01",
+        FAccountName="应付供应商",
+        FAmountFor=-5,
+        FDebit=0,
+        FCredit=-5,
+        FExplanation="第二行",
+        FEntryID="1",
+    ),
+]
+
+
+class OutputTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+
+class TextExportTests(OutputTestCase):
+    def test_format_cents(self):
+        self.assertEqual(format_cents(123456), "1234.56")
+        self.assertEqual(format_cents(10001), "100.01")
+        self.assertEqual(format_cents(-5), "-0.05")
+        self.assertEqual(format_cents(0), "0.00")
+
+    def test_format_for_path(self):
+        self.assertEqual(format_for_path("out.CSV"), "csv")
+        self.assertEqual(format_for_path("out.txt"), "txt")
+        self.assertEqual(format_for_path("out.xlsx"), "xlsx")
+
+    def test_round_trip(self):
+        for name, text_format in TEXT_FORMATS.items():
+            with self.subTest(format=name):
+                path = self.path("entries" + text_format.extension)
+                write_text(path, ENTRIES, text_format)
+                self.assertEqual(list(read_text(path, text_format)), ENTRIES)
+
+    def test_txt_replaces_delimiters_in_values(self):
+        text_format = TEXT_FORMATS["txt"]
+        path = self.path("entries.txt")
+        write_text(path, [entry(FNumber=1, FExplanation="a\tb\nc")], text_format)
+        rows = list(read_text(path, text_format))
+        self.assertEqual(rows[0][FIELD_INDEX["FExplanation"]], "a b c")
+
+    def test_chunks_join_to_file(self):
+        text_format = TEXT_FORMATS["csv"]
+        path = self.path("entries.csv")
+        write_text(path, ENTRIES * 5, text_format)
+        chunks = list(iter_text(ENTRIES * 5, text_format, flush_rows=3))
+        self.assertGreater(len(chunks), 2)
+        with open(path, "rb") as f:
+            self.assertEqual(b"".join(chunks), f.read())
+
+
+class XlsxWriterTests(OutputTestCase):
+    ROWS = [
+        ["文本", "a<b&c>", " 前后空格 ", "", None, "=1+1"],
+        [1, 2.5, -0.05, 12345678901234, True, False],
+        [None, None, None, None, None, None, None, "H列"],
+        [],
+    ]
+
+    def test_column_letter(self):
+        cases = [(0, "A"), (25, "Z"), (26, "AA"), (701, "ZZ"), (702, "AAA")]
+        for index, letters in cases:
+            with self.subTest(index=index):
+                self.assertEqual(column_letter(index), letters)
+
+    def test_values_read_back_with_openpyxl(self):
+        path = self.path("out.xlsx")
+        write_workbook(path, [("Page1", self.ROWS), ("空表", [])])
+
+        wb = openpyxl.load_workbook(path)
+        self.assertEqual(wb.sheetnames, ["Page1", "空表"])
+        ws = wb["Page1"]
+        self.assertEqual(
+            [ws.cell(1, column).value for column in range(1, 7)],
+            ["文本", "a<b&c>", " 前后空格 ", None, None, "=1+1"],
+        )
+        self.assertEqual(
+            [ws.cell(2, column).value for column in range(1, 7)],
+            [1, 2.5, -0.05, 12345678901234, True, False],
+        )
+        self.assertEqual(ws.cell(3, 8).value, "H列")
+        self.assertEqual(ws.max_row, 3)
+        wb.close()
+
+    def test_chunks_join_to_file(self):
+        path = self.path("out.xlsx")
+        write_workbook(path, [("Page1", self.ROWS * 300)])
+        chunks = list(iter_workbook([("Page1", self.ROWS * 300)], flush_rows=100))
+        self.assertGreater(len(chunks), 1)
+
+        wb = openpyxl.load_workbook(io.BytesIO(b"".join(chunks)))
+        expected = openpyxl.load_workbook(path)
+        self.assertEqual(
+            list(wb["Page1"].iter_rows(values_only=True)),
+            list(expected["Page1"].iter_rows(values_only=True)),
+        )
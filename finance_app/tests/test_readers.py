@@ -0,0 +1,188 @@
+"""
+读取引擎测试 - 各引擎读出的行、生成的凭证与 openpyxl 一致
+"""
+
+import datetime
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+
+import openpyxl
+import xlsxwriter
+from django.test import SimpleTestCase, override_settings
+
+from finance_app.services.excel_processor import ExcelProcessor
+from finance_app.services.workbook import OpenpyxlReader, WorkbookSession
+from finance_app.services.xls_reader import XLS_SUPPORTED
+from finance_app.services.xlsx_reader import NativeXlsxReader
+from finance_app.services.xlsx_writer import write_workbook
+
+from .workbooks import (
+    write_csv_bundle,
+    write_payment_workbook,
+    write_reimbursement_workbook,
+    write_xls_copy,
+)
+
+try:
+    import xlwt
+except ImportError:  # pragma: no cover - 取决于测试环境
+    xlwt = None
+
+
+def openpyxl_rows(path, sheet_name, min_row=1, max_col=None):
+    """openpyxl 读出的行（每次重新打开：iter_rows 会改变工作表的 max_column）"""
+    reader = OpenpyxlReader(path)
+    try:
+        return list(reader.iter_rows(sheet_name, min_row=min_row, max_col=max_col))
+    finally:
+        reader.close()
+
+
+class ReaderTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.tmpdir, name)
+
+
+class NativeXlsxReaderTests(ReaderTestCase):
+    def ragged_workbook(self):
+        """xlsxwriter 写出（共享字符串）的不规则工作表，含日期、布尔值和空工作表"""
+        path = self.path("ragged.xlsx")
+        workbook = xlsxwriter.Workbook(path)
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        worksheet = workbook.add_worksheet("A")
+        worksheet.write(0, 0, "hdr")
+        worksheet.write(0, 3, "x")
+        worksheet.write(3, 7, 5)
+        worksheet.write(4, 1, "y")
+        worksheet.write(5, 2, 1.25)
+        worksheet.write(5, 4, True)
+        worksheet.write_datetime(6, 0, datetime.datetime(2024, 8, 12), date_format)
+        workbook.add_worksheet("Empty")
+        workbook.close()
+        return path
+
+    def native_workbook(self):
+        """原生写出引擎（内联字符串）写出的工作簿"""
+        path = self.path("native.xlsx")
+        write_workbook(
+            path,
+            [
+                ("A", [["hdr", None, None, "x"], [], [1, 2.5], [None] * 7 + [8]]),
+                ("Empty", []),
+            ],
+        )
+        return path
+
+    def test_rows_match_openpyxl(self):
+        payment = self.path("pay.xlsx")
+        reimbursement = self.path("reimb.xlsx")
+        write_payment_workbook(payment)
+        write_reimbursement_workbook(reimbursement)
+
+        for path in (
+            payment,
+            reimbursement,
+            self.ragged_workbook(),
+            self.native_workbook(),
+        ):
+            reader = NativeXlsxReader(path)
+            self.addCleanup(reader.close)
+            for sheet_name in reader.sheetnames:
+                for min_row in (1, 2, 3):
+                    for max_col in (None, 2, 12):
+                        with self.subTest(
+                            path=os.path.basename(path),
+                            sheet=sheet_name,
+                            min_row=min_row,
+                            max_col=max_col,
+                        ):
+                            self.assertEqual(
+                                list(
+                                    reader.iter_rows(
+                                        sheet_name, min_row=min_row, max_col=max_col
+                                    )
+                                ),
+                                openpyxl_rows(path, sheet_name, min_row, max_col),
+                            )
+
+    def test_sheetnames_match_openpyxl(self):
+        path = self.ragged_workbook()
+        reader = NativeXlsxReader(path)
+        self.addCleanup(reader.close)
+        self.assertEqual(reader.sheetnames, openpyxl.load_workbook(path).sheetnames)
+
+
+@skipUnless(XLS_SUPPORTED and xlwt is not None, "需要 xlrd 和 xlwt")
+class XlsReaderTests(ReaderTestCase):
+    def test_rows_match_openpyxl(self):
+        source = self.path("pay.xlsx")
+        target = self.path("pay.xls")
+        write_payment_workbook(source)
+        write_xls_copy(source, target)
+
+        with WorkbookSession(target) as session:
+            for sheet_name in session.sheetnames:
+                with self.subTest(sheet=sheet_name):
+                    self.assertEqual(
+                        list(session.iter_rows(sheet_name, max_col=12)),
+                        openpyxl_rows(source, sheet_name, max_col=12),
+                    )
+
+
+class EngineEquivalenceTests(ReaderTestCase):
+    """同一份数据经不同引擎读取，生成的凭证文件与 openpyxl 引擎相同"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = self.path("media")
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def vouchers(self, path, process_type, engine="openpyxl"):
+        output_path, count = ExcelProcessor(engine=engine).process_excel_file(
+            path, process_type
+        )
+        wb = openpyxl.load_workbook(output_path)
+        rows = [list(row) for row in wb["Page1"].iter_rows(values_only=True)]
+        wb.close()
+        return count, rows
+
+    def sources(self, process_type):
+        """[(名称, 文件, 引擎)]：openpyxl 为基准，其余为待比较的引擎"""
+        source = self.path(f"{process_type}.xlsx")
+        if process_type == "payment":
+            write_payment_workbook(source)
+        else:
+            write_reimbursement_workbook(source)
+
+        csv_bundle = self.path(f"{process_type}.zip")
+        write_csv_bundle(source, csv_bundle)
+        sources = [("native", source, "native"), ("csv", csv_bundle, "openpyxl")]
+        if XLS_SUPPORTED and xlwt is not None:
+            xls = self.path(f"{process_type}.xls")
+            write_xls_copy(source, xls)
+            sources.append(("xls", xls, "openpyxl"))
+        return source, sources
+
+    def test_payment_vouchers_match_openpyxl(self):
+        source, sources = self.sources("payment")
+        expected = self.vouchers(source, "payment")
+        self.assertGreater(expected[0], 0)
+        for name, path, engine in sources:
+            with self.subTest(engine=name):
+                self.assertEqual(self.vouchers(path, "payment", engine), expected)
+
+    def test_reimbursement_vouchers_match_openpyxl(self):
+        source, sources = self.sources("reimbursement")
+        expected = self.vouchers(source, "reimbursement")
+        self.assertGreater(expected[0], 0)
+        for name, path, engine in sources:
+            with self.subTest(engine=name):
+                self.assertEqual(self.vouchers(path, "reimbursement", engine), expected)
@@ -0,0 +1,36 @@
+"""
+相近名称建议测试
+"""
+
+from django.test import SimpleTestCase
+
+from finance_app.services.suggest import NgramIndex, char_ngrams
+
+
+class NgramIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = NgramIndex(
+            [f"供应商{i}" for i in range(30)] + ["项目14", "深圳蜜蜂装饰", None, ""]
+        )
+
+    def test_char_ngrams(self):
+        self.assertEqual(char_ngrams(" Ab "), {"\x00a", "ab", "b\x00"})
+
+    def test_typo_suggests_real_name_first(self):
+        self.assertEqual(self.index.suggest("供应商16厂")[0][0], "供应商16")
+        self.assertEqual(self.index.suggest("深圳密蜂装饰")[0][0], "深圳蜜蜂装饰")
+
+    def test_scores_are_sorted_and_limited(self):
+        suggestions = self.index.suggest("供应商1", limit=5)
+        self.assertEqual(len(suggestions), 5)
+        self.assertEqual(suggestions[0], ("供应商1", 1.0))
+        scores = [score for _, score in suggestions]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_ties_keep_master_data_order(self):
+        names = [name for name, _ in self.index.suggest("供应商", limit=3)]
+        self.assertEqual(names, ["供应商0", "供应商1", "供应商2"])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.suggest("完全无关"), [])
+        self.assertEqual(self.index.suggest(None), [])
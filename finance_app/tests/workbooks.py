@@ -0,0 +1,128 @@
+"""
+测试用工作簿 - 生成小型的排单、报销文件，以及同一内容的 .xls 和CSV压缩包
+"""
+
+import csv
+import datetime
+import io
+import zipfile
+
+import openpyxl
+
+PAYMENT_SUPPLIERS = [f"供应商{i}" for i in range(12)]
+PAYMENT_PROJECTS = [f"项目{i}" for i in range(6)]
+
+
+def write_payment_workbook(path: str, rows: int = 12) -> None:
+    """排单文件：付款工作表和三张主数据工作表，覆盖定金、全款含税、全款不含税"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "付款(每日)"
+    ws.append(["付款排单"])
+    ws.append(
+        [
+            "日期",
+            "支付公司",
+            "项目简称（保持一致）",
+            "户型",
+            "供应商",
+            "费用类型",
+            "付款方式",
+            "总金额",
+            "税",
+            "备注1",
+            "备注2",
+            "摘要",
+        ]
+    )
+    for i in range(rows):
+        project = PAYMENT_PROJECTS[i % len(PAYMENT_PROJECTS)]
+        supplier = PAYMENT_SUPPLIERS[i % len(PAYMENT_SUPPLIERS)]
+        total = round(100 + i * 123.456, 2)
+        if i % 3 == 0:
+            values = [f"8.{i + 1}", "深蜜支付：", project, "A", supplier, "材料"]
+            values += ["定金", total, None, "", "（1050.5+2450）", f"摘要{i}"]
+        elif i % 3 == 1:
+            values = [f"9.{i + 1}", "高定付：", project, "B", supplier, "人工费"]
+            values += ["全款", total, round(total * 0.13, 2), "", "", f"摘要{i}"]
+        else:
+            values = [f"10.{i + 1}", "其他", project, "C", supplier, "运输"]
+            values += ["全款", int(total), 0, "", "", f"摘要{i}"]
+        ws.append(values)
+
+    fee_types = wb.create_sheet("核算项目_费用代码")
+    fee_types.append(["别称", "科目名称", "科目代码"])
+    fee_types.append(["材料", "材料费", "5001.01"])
+    fee_types.append(["人工", "人工费", "5001.02"])
+    fee_types.append(["运输费", "运输", "5001.03"])
+
+    projects = wb.create_sheet("核算项目_项目")
+    projects.append(["项目简称", "代码", "名称", "全名"])
+    for i, project in enumerate(PAYMENT_PROJECTS):
+        projects.append([project, f"01.{i:03d}", project + "名", project + "全名"])
+
+    suppliers = wb.create_sheet("核算项目_供应商")
+    suppliers.append(["简称", "代码", "名称", "全名"])
+    for i, supplier in enumerate(PAYMENT_SUPPLIERS):
+        suppliers.append([supplier, 2000 + i, supplier + "有限公司", supplier])
+    wb.save(path)
+
+
+def write_reimbursement_workbook(path: str) -> None:
+    """报销文件：两名报销人的顶部信息行、明细和费用代码映射表"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "报销  (每日)"
+    for person, bank, bank_code in (
+        ("张三", "招商银行", "1002.16"),
+        ("李四", "工商银行", "1002.21"),
+    ):
+        ws.append(["日期", "8.12", None, person, None, bank, None, bank_code])
+        ws.cell(ws.max_row, 10).value = "报销款"
+    ws.append(["报销人", "部门代码", "项目简称", "备注", "费用别称", "费用类型"])
+    for i in range(8):
+        person = ["张三", "李四"][i % 2]
+        project = "项目1" if i % 3 else None
+        department = "部门---02---采购部,项目---01.001---项目1名" if i % 3 else None
+        ws.append(
+            [person, "02", project, "", "差旅", "差旅费", f"6601.0{i % 3 + 1}"]
+            + [round(10 + i * 37.125, 3), f"出差{i}", department]
+        )
+
+    fee_types = wb.create_sheet("核算项目_费用代码")
+    fee_types.append(["别称", "科目名称", "科目代码"])
+    fee_types.append(["差旅", "差旅费", "6601.01"])
+    wb.save(path)
+
+
+def write_xls_copy(source: str, target: str) -> None:
+    """把 xlsx 工作簿的值另存为 .xls（需要 xlwt）"""
+    import xlwt
+
+    wb = openpyxl.load_workbook(source, data_only=True)
+    out = xlwt.Workbook()
+    date_style = xlwt.easyxf(num_format_str="yyyy-mm-dd")
+    for ws in wb:
+        sheet = out.add_sheet(ws.title)
+        for r, row in enumerate(ws.iter_rows(values_only=True)):
+            for c, value in enumerate(row):
+                if value is None:
+                    continue
+                if isinstance(value, datetime.datetime):
+                    sheet.write(r, c, value, date_style)
+                else:
+                    sheet.write(r, c, value)
+    out.save(target)
+
+
+def write_csv_bundle(source: str, target: str) -> None:
+    """把 xlsx 工作簿的每张工作表写成CSV，打包为CSV压缩包"""
+    wb = openpyxl.load_workbook(source, data_only=True, read_only=True)
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        for ws in wb:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in ws.iter_rows(values_only=True):
+                writer.writerow(["" if value is None else value for value in row])
+            archive.writestr(ws.title + ".csv", "\ufeff" + buffer.getvalue())
+    wb.close()
@@ -1,7 +1,9 @@
 import os
 import time
+from itertools import chain
 from django.shortcuts import render
-from django.http import FileResponse, Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.utils.http import content_disposition_header
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from rest_framework import viewsets, status
@@ -16,8 +18,31 @@ from .serializers import (
     FileUploadSerializer,
 )
 from .services.excel_processor import ExcelProcessor, ExcelProcessingError
+from .services.text_export import TEXT_FORMATS, format_for_path
 import logging
 
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ExportBody:
+    """
+    流式导出的响应体
+
+    StreamingHttpResponse 关闭时会调用响应体的 close()。响应还没开始发送就关闭时，
+    生成器的 close() 不会执行其中的任何代码，所以清理放在 on_close 中，总会执行。
+    """
+
+    def __init__(self, chunks, on_close):
+        self.chunks = chunks
+        self.on_close = on_close
+
+    def __iter__(self):
+        return self.chunks
+
+    def close(self):
+        self.chunks.close()
+        self.on_close()
+
 
 class FinanceRecordViewSet(viewsets.ModelViewSet):
     """财务记录视图集"""
@@ -53,6 +78,34 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
         # 按上传时间倒序排列
         return queryset.order_by("-upload_time")
 
+    def _save_job_logs(self, finance_record, processor):
+        """将处理器记录的任务日志写入处理日志"""
+        if processor is None:
+            return
+        for level, message in processor.job_logs:
+            ProcessingLog.objects.create(
+                record=finance_record, level=level, message=message
+            )
+
+    @staticmethod
+    def _content_type(output_format):
+        """输出格式对应的响应类型"""
+        if output_format in TEXT_FORMATS:
+            text_format = TEXT_FORMATS[output_format]
+            return f"{text_format.content_type}; charset={text_format.encoding}"
+        return XLSX_CONTENT_TYPE
+
+    def _mark_failed(self, finance_record, processor, error_message, log_message):
+        """记录处理失败"""
+        finance_record.status = "failed"
+        finance_record.error_message = error_message
+        finance_record.save()
+
+        self._save_job_logs(finance_record, processor)
+        ProcessingLog.objects.create(
+            record=finance_record, level="ERROR", message=log_message
+        )
+
     @action(
         detail=False, methods=["post"], parser_classes=[MultiPartParser, FormParser]
     )
@@ -66,6 +119,8 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
 
         uploaded_file = serializer.validated_data["file"]
         process_type = serializer.validated_data["process_type"]
+        reader_engine = serializer.validated_data.get("reader_engine")
+        output_format = serializer.validated_data["output_format"]
 
         # 创建财务记录
         finance_record = FinanceRecord.objects.create(
@@ -83,10 +138,11 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
             message=f"文件上传成功: {uploaded_file.name}",
         )
 
+        processor = None
         try:
             # 处理Excel文件
             start_time = time.time()
-            processor = ExcelProcessor()
+            processor = ExcelProcessor(engine=reader_engine)
 
             # 添加处理开始日志
             process_type_display = "排单" if process_type == "payment" else "报销"
@@ -97,9 +153,13 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
             )
 
             output_path, record_count = processor.process_excel_file(
-                finance_record.file_path.path, process_type
+                finance_record.file_path.path,
+                process_type,
+                request.user,
+                output_format,
             )
             processing_time = time.time() - start_time
+            self._save_job_logs(finance_record, processor)
 
             # 更新记录状态
             finance_record.status = "completed"
@@ -133,32 +193,109 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
 
         except ExcelProcessingError as e:
             # 处理业务逻辑错误
-            finance_record.status = "failed"
-            finance_record.error_message = str(e)
-            finance_record.save()
+            self._mark_failed(
+                finance_record, processor, str(e), f"Excel处理失败: {str(e)}"
+            )
 
-            ProcessingLog.objects.create(
-                record=finance_record, level="ERROR", message=f"Excel处理失败: {str(e)}"
+            response_data = {
+                "id": finance_record.id,
+                "status": "failed",
+                "error": str(e),
+            }
+            if e.errors:
+                response_data["errors"] = e.errors
+
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        except Exception as e:
+            # 处理系统错误
+            self._mark_failed(
+                finance_record, processor, f"系统错误: {str(e)}", f"系统错误: {str(e)}"
             )
 
+            logger = logging.getLogger("finance_app")
+            logger.error(f"处理Excel文件时发生系统错误: {str(e)}", exc_info=True)
+
             return Response(
-                {"id": finance_record.id, "status": "failed", "error": str(e)},
-                status=status.HTTP_400_BAD_REQUEST,
+                {
+                    "id": finance_record.id,
+                    "status": "failed",
+                    "error": "系统内部错误，请联系管理员",
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        except Exception as e:
-            # 处理系统错误
-            finance_record.status = "failed"
-            finance_record.error_message = f"系统错误: {str(e)}"
-            finance_record.save()
+    @action(
+        detail=False, methods=["post"], parser_classes=[MultiPartParser, FormParser]
+    )
+    def export(self, request):
+        """
+        上传Excel文件，处理结果直接作为响应流式下载
 
-            ProcessingLog.objects.create(
-                record=finance_record, level="ERROR", message=f"系统错误: {str(e)}"
+        输出工作簿由 native 写出引擎边生成边发送，不需要先写完临时文件；
+        开启 FINANCE_OUTPUT_RETENTION 时同时保留一份输出文件供历史记录下载。
+        预检、主数据等错误在开始发送之前返回，与 upload 的错误响应相同。
+        """
+        serializer = FileUploadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        uploaded_file = serializer.validated_data["file"]
+        process_type = serializer.validated_data["process_type"]
+        reader_engine = serializer.validated_data.get("reader_engine")
+        output_format = serializer.validated_data["output_format"]
+
+        finance_record = FinanceRecord.objects.create(
+            user=request.user,
+            filename=uploaded_file.name,
+            file_path=uploaded_file,
+            process_type=process_type,
+            status="processing",
+        )
+        ProcessingLog.objects.create(
+            record=finance_record,
+            level="INFO",
+            message=f"文件上传成功: {uploaded_file.name}",
+        )
+
+        processor = None
+        try:
+            start_time = time.time()
+            processor = ExcelProcessor(engine=reader_engine)
+            output_path = processor.new_output_path(process_type, output_format)
+            output_filename = os.path.basename(output_path)
+            if not getattr(settings, "FINANCE_OUTPUT_RETENTION", True):
+                output_path = None
+
+            stream = processor.stream_excel_file(
+                finance_record.file_path.path,
+                process_type,
+                request.user,
+                output_path,
+                output_format,
+            )
+            # 第一段产出前完成预检和主数据加载，错误仍可以正常返回
+            first_chunk = next(stream)
+
+        except ExcelProcessingError as e:
+            self._mark_failed(
+                finance_record, processor, str(e), f"Excel处理失败: {str(e)}"
             )
+            response_data = {
+                "id": finance_record.id,
+                "status": "failed",
+                "error": str(e),
+            }
+            if e.errors:
+                response_data["errors"] = e.errors
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
 
+        except Exception as e:
+            self._mark_failed(
+                finance_record, processor, f"系统错误: {str(e)}", f"系统错误: {str(e)}"
+            )
             logger = logging.getLogger("finance_app")
             logger.error(f"处理Excel文件时发生系统错误: {str(e)}", exc_info=True)
-
             return Response(
                 {
                     "id": finance_record.id,
@@ -168,14 +305,97 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        finance_record.output_filename = output_filename
+        finance_record.save()
+
+        response = StreamingHttpResponse(
+            ExportBody(
+                self._stream_export(
+                    finance_record,
+                    processor,
+                    first_chunk,
+                    stream,
+                    output_path,
+                    start_time,
+                ),
+                lambda: self._abort_export(finance_record, processor, stream),
+            ),
+            content_type=self._content_type(output_format),
+        )
+        response["Content-Disposition"] = content_disposition_header(
+            True, output_filename
+        )
+        response["X-Record-Id"] = str(finance_record.id)
+        return response
+
+    def _stream_export(
+        self, finance_record, processor, first_chunk, stream, output_path, start_time
+    ):
+        """
+        发送输出工作簿的各段字节，发送结束后更新记录状态
+
+        开始发送后才发现的错误无法再改变响应状态码，只能中断响应并把记录标记为失败。
+        客户端断开时由 _abort_export 处理。
+        """
+        try:
+            yield first_chunk
+            yield from stream
+        except Exception as e:
+            self._mark_failed(
+                finance_record, processor, str(e), f"Excel处理失败: {str(e)}"
+            )
+            logger = logging.getLogger("finance_app")
+            logger.error(f"流式导出Excel文件时发生错误: {str(e)}", exc_info=True)
+            raise
+
+        processing_time = time.time() - start_time
+        self._save_job_logs(finance_record, processor)
+
+        finance_record.status = "completed"
+        if output_path is not None:
+            finance_record.output_file_path.name = os.path.relpath(
+                output_path, settings.MEDIA_ROOT
+            )
+        finance_record.total_records = processor.record_count
+        finance_record.processing_time = processing_time
+        finance_record.save()
+
+        ProcessingLog.objects.create(
+            record=finance_record,
+            level="INFO",
+            message=f"Excel文件导出完成，共处理 {processor.record_count} 条记录，耗时 {processing_time:.2f} 秒",
+        )
+
+    def _abort_export(self, finance_record, processor, stream):
+        """
+        响应关闭时调用：导出未完成（客户端断开，包括尚未开始发送）时
+        关闭处理流并把记录标记为失败
+        """
+        # 关闭处理流与处理出错走同一清理：删除未写完的保留文件
+        stream.close()
+        if finance_record.status == "processing":
+            self._mark_failed(
+                finance_record, processor, "下载中断", "客户端在导出完成前断开连接"
+            )
+
     @action(detail=True, methods=["get"])
     def download(self, request, pk=None):
         """
         下载处理后的Excel文件
+
+        可用 output_format 参数（csv / txt）把已保存的输出转换为文本格式下载。
         """
         try:
             finance_record = self.get_object()
 
+            if finance_record.status == "completed" and not (
+                finance_record.output_file_path
+            ):
+                return Response(
+                    {"error": "输出文件未保留，请重新导出"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
             if (
                 finance_record.status != "completed"
                 or not finance_record.output_file_path
@@ -191,6 +411,12 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
                     {"error": "文件不存在"}, status=status.HTTP_404_NOT_FOUND
                 )
 
+            output_format = request.query_params.get("output_format")
+            if output_format and output_format != format_for_path(file_path):
+                return self._download_converted(
+                    finance_record, file_path, output_format
+                )
+
             # 记录下载日志
             ProcessingLog.objects.create(
                 record=finance_record,
@@ -211,6 +437,31 @@ class FinanceRecordViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def _download_converted(self, finance_record, file_path, output_format):
+        """把已保存的输出文件转换为指定的文本格式，边转换边发送"""
+        stream = ExcelProcessor().convert_output(file_path, output_format)
+        try:
+            first_chunk = next(stream)
+        except ExcelProcessingError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = (
+            os.path.splitext(finance_record.output_filename)[0]
+            + TEXT_FORMATS[output_format].extension
+        )
+        ProcessingLog.objects.create(
+            record=finance_record,
+            level="INFO",
+            message=f"文件下载: {filename}（由 {finance_record.output_filename} 转换）",
+        )
+
+        response = StreamingHttpResponse(
+            chain([first_chunk], stream),
+            content_type=self._content_type(output_format),
+        )
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+        return response
+
     @action(detail=True, methods=["get"])
     def logs(self, request, pk=None):
         """
@@ -206,3 +206,21 @@ LOGGING = {
         },
     },
 }
+
+# Excel处理配置
+# 以只读模式流式读取上传的工作簿，内存占用不随行数增长
+FINANCE_EXCEL_READ_ONLY = True
+# 读取引擎："openpyxl" 或 "native"（直接解析工作表XML，速度更快）
+FINANCE_EXCEL_READER_ENGINE = "openpyxl"
+# 连续空行达到该数量即视为数据结束（整列设置格式会让工作表虚增到上百万行）
+FINANCE_EMPTY_ROW_LIMIT = 500
+# 在进程池中并行解析排单文件的主数据工作表（费用代码、项目、供应商）
+FINANCE_PARALLEL_MASTER_SHEETS = False
+# 完整解析前预检每个工作表开头的数据行数（0 表示不预检）
+FINANCE_PREFLIGHT_ROWS = 20
+# 排单处理流水线每块的行数（解析、关联、生成、写出各阶段之间的缓冲量）
+FINANCE_PIPELINE_CHUNK_ROWS = 5000
+# 输出工作簿的写出引擎："xlsxwriter" 或 "native"（直接生成XML，可边处理边发送）
+FINANCE_EXCEL_WRITER_ENGINE = "xlsxwriter"
+# 流式导出时同时在 MEDIA_ROOT/outputs 保留一份输出文件，供历史记录再次下载
+FINANCE_OUTPUT_RETENTION = True
@@ -11,7 +11,10 @@ LOG_FILENAME = "自动导出日志.log"
 
 # Excel相关配置
 DEFAULT_SHEET_NAME = "付款(每日)"
-SCHEMA_FILENAME = "t_Schema.json"
+# 相对项目根目录解析，不依赖程序启动时的工作目录
+SCHEMA_FILENAME = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "t_Schema.json"
+)
 
 # 文件夹配置
 OUTPUT_FOLDER = "最新"
@@ -83,8 +83,8 @@ class FinanceApp:
 
     def _parse_auxiliary_data(self, base_data):
         """解析辅助数据"""
-        # 提取供应商列表
-        supplier_check_list = [item["supplier"] for item in base_data]
+        # 提取供应商集合
+        supplier_check_list = {item["supplier"] for item in base_data}
 
         # 解析费用类型数据
         fee_type_data = self.parser.parse_sheet(
@@ -41,6 +41,8 @@ class ReimbursementData:
     amount: Optional[float] = None
     summary: Optional[str] = None
     department_project: Optional[str] = None
+    # 金额（分），处理时由 amount 换算
+    amount_cents: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -96,9 +98,10 @@ class ReimbursementExcelRowData:
     f_account_name: Optional[str] = None
     f_currency_num: str = "RMB"
     f_currency_name: str = "人民币"
-    f_amount_for: Optional[float] = None
-    f_debit: Optional[float] = None
-    f_credit: Optional[float] = None
+    # 金额字段以分表示，写出文件时换算为元
+    f_amount_for: Optional[int] = None
+    f_debit: Optional[int] = None
+    f_credit: Optional[int] = None
     f_preparer_id: str = "陈丽玲"  # 默认制单人，实际使用时会被动态用户名替换
     f_checker_id: str = "NONE"
     f_approve_id: str = "NONE"
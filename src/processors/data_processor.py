@@ -2,6 +2,7 @@
 数据处理和转换功能
 """
 
+import logging
 import os
 import sys
 
@@ -9,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from config import BANK_ACCOUNT_MAPPING, DEFAULT_BANK_ACCOUNT, PAYMENT_TYPES
 from utils.helpers import exit_with_message, get_real_date
+from processors.fee_types import FeeTypeResolver
+from utils.money import to_cents
 
 
 class DataProcessor:
@@ -36,17 +39,8 @@ class DataProcessor:
 
     @staticmethod
     def get_fee_code(fee_type_data, fee_type):
-        """获取费用代码"""
-        for item in fee_type_data:
-            if item["name"] == fee_type:
-                return str(item["code"])
-            if fee_type == item["name"] + "费":
-                return str(item["code"])
-            if fee_type == item["alias"]:
-                return str(item["code"])
-            if fee_type == item["alias"] + "费":
-                return str(item["code"])
-        return None
+        """获取费用代码（批量处理请用 FeeTypeResolver 只建一次解析器）"""
+        return FeeTypeResolver(fee_type_data).resolve(fee_type)
 
     @staticmethod
     def get_fee_by_remark2(remark2):
@@ -62,31 +56,49 @@ class DataProcessor:
             fee = fee[0]
         return fee
 
+    @staticmethod
+    def index_by_short_name(master_data):
+        """按简称建立主数据索引，简称重复时保留第一条（与顺序查找结果一致）"""
+        index = {}
+        for item in master_data:
+            index.setdefault(item["shortName"], item)
+        return index
+
     @staticmethod
     def append_data(base_data, supplier_data, project_data, fee_type_data):
         """合并和处理数据"""
         cannot_find = []
 
+        # 按简称建立索引，每行数据直接查表
+        supplier_index = DataProcessor.index_by_short_name(supplier_data)
+        project_index = DataProcessor.index_by_short_name(project_data)
+        fee_resolver = FeeTypeResolver(fee_type_data)
+        for variant, codes in fee_resolver.ambiguous.items():
+            logging.warning(
+                "费用类型 '%s' 对应多个科目代码 %s，使用 %s",
+                variant,
+                ", ".join(codes),
+                codes[0],
+            )
+
         for i in range(len(base_data)):
             row = base_data[i]
             row["supplierStr"] = ""
             row["projectStr"] = ""
 
             # 查找供应商信息
-            for supplier in supplier_data:
-                if supplier["shortName"] == row["supplier"]:
-                    row["supplierStr"] = (
-                        "供应商---" + str(supplier["code"]) + "---" + supplier["name"]
-                    )
-                    break
+            supplier = supplier_index.get(row["supplier"])
+            if supplier is not None:
+                row["supplierStr"] = (
+                    "供应商---" + str(supplier["code"]) + "---" + supplier["name"]
+                )
 
             # 查找项目信息
-            for project in project_data:
-                if project["shortName"] == row["project"]:
-                    row["projectStr"] = (
-                        "项目---" + str(project["code"]) + "---" + project["name"]
-                    )
-                    break
+            project = project_index.get(row["project"])
+            if project is not None:
+                row["projectStr"] = (
+                    "项目---" + str(project["code"]) + "---" + project["name"]
+                )
 
             # 检查是否找到匹配项
             if not row["supplierStr"]:
@@ -113,7 +125,7 @@ class DataProcessor:
             )
 
             # 获取费用代码
-            row["feeCode"] = DataProcessor.get_fee_code(fee_type_data, row["feeType"])
+            row["feeCode"] = fee_resolver.resolve(row["feeType"])
 
             # 处理日期
             real_date = get_real_date(row["date"])
@@ -128,13 +140,16 @@ class DataProcessor:
             if "全款" in payment_type:
                 row["paymentType"] = PAYMENT_TYPES["FULL"]
 
-            # 计算税额和剩余金额
-            real_tax = DataProcessor.get_real_tax(row)
-            row["realTax"] = real_tax
-            row["remain"] = row["totalAmount"] - real_tax
+            # 计算税额和剩余金额（以分表示，剩余金额为整数差额）
+            row["totalCents"] = to_cents(row["totalAmount"])
+            row["realTaxCents"] = to_cents(DataProcessor.get_real_tax(row))
+            row["remainCents"] = row["totalCents"] - row["realTaxCents"]
 
         if len(cannot_find) > 0:
             print(cannot_find)
             exit_with_message("请检查项目或供应商：" + str(cannot_find) + "是否正确")
 
+        for fee_type, count in fee_resolver.miss_summary():
+            logging.warning("费用类型 '%s' 未找到科目代码（%d 行）", fee_type, count)
+
         return base_data
@@ -10,6 +10,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from utils.helpers import exit_with_message
+from processors.sheet_specs import SheetSpec
 
 
 class ExcelParser:
@@ -27,42 +28,43 @@ class ExcelParser:
         except Exception as e:
             exit_with_message(f"加载Excel文件失败: {str(e)}")
 
-    def parse_sheet(self, sheet_name, key_map, max_col=4, start_row=2, header_row=1):
-        """解析Excel工作表"""
-        try:
-            result = []
+    def parse_spec(self, spec, check_list=None):
+        """按工作表规格解析，表头只读取并编译一次"""
+        if not self.workbook:
+            self.load_workbook()
+
+        sheet = self.workbook[spec.sheet_name]
 
-            if not self.workbook:
-                self.load_workbook()
+        header_cells = [cell.value for cell in sheet[spec.header_row]]
+        map_row = spec.compile(header_cells)
 
-            # 获取工作表
-            sheet = self.workbook[sheet_name]
+        # 逐行判断是否在列表中，转成集合避免 O(行数×列表长度) 的查找
+        if check_list is not None and not isinstance(check_list, (set, frozenset)):
+            check_list = set(check_list)
 
-            # 读取数据行
-            for row in sheet.iter_rows(
-                min_row=start_row, values_only=True, max_col=max_col
-            ):
-                if row[0] is None:
-                    continue
-                result.append(row)
+        mapped_result = []
+        for row in sheet.iter_rows(
+            min_row=spec.start_row, values_only=True, max_col=spec.max_col
+        ):
+            item = row[0]
+            if item is None:
+                continue
+            if check_list is not None and item not in check_list:
+                continue
+            mapped_result.append(map_row(row))
+
+        return mapped_result
+
+    def parse_sheet(self, sheet_name, key_map, max_col=4, start_row=2, header_row=1):
+        """解析Excel工作表"""
+        try:
+            spec = SheetSpec(sheet_name, key_map, max_col, start_row, header_row)
+            mapped_result = self.parse_spec(spec)
 
-            if len(result) == 0:
+            if len(mapped_result) == 0:
                 logging.error("未找到数据")
                 return []
 
-            # 映射字段名
-            mapped_result = []
-            for i in range(len(result)):
-                row = result[i]
-                new_row = {}
-                for j in range(len(row)):
-                    if j >= len(sheet[header_row]):
-                        break
-                    header_value = sheet[header_row][j].value
-                    if header_value in key_map:
-                        new_row[key_map[header_value]] = row[j]
-                mapped_result.append(new_row)
-
             return mapped_result
 
         except Exception as e:
@@ -73,39 +75,13 @@ class ExcelParser:
     ):
         """供应商数据解析辅助函数"""
         try:
-            max_col = 4
-            result = []
-
-            if not self.workbook:
-                self.load_workbook()
+            spec = SheetSpec(sheet_name, key_map, 4, start_row, header_row)
+            mapped_result = self.parse_spec(spec, check_list)
 
-            sheet = self.workbook[sheet_name]
-
-            for row in sheet.iter_rows(
-                min_row=start_row, values_only=True, max_col=max_col
-            ):
-                item = row[0]
-                if item is None or item not in check_list:
-                    continue
-                result.append(row)
-
-            if len(result) == 0:
+            if len(mapped_result) == 0:
                 logging.error("未找到供应商数据")
                 return []
 
-            # 映射字段名
-            mapped_result = []
-            for i in range(len(result)):
-                row = result[i]
-                new_row = {}
-                for j in range(len(row)):
-                    if j >= len(sheet[header_row]):
-                        break
-                    header_value = sheet[header_row][j].value
-                    if header_value in key_map:
-                        new_row[key_map[header_value]] = row[j]
-                mapped_result.append(new_row)
-
             return mapped_result
 
         except Exception as e:
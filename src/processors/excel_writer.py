@@ -2,7 +2,6 @@
 统一Excel文件写入功能 - 支持排单和报销双模式
 """
 
-import json
 import sys
 import xlsxwriter
 import os
@@ -12,6 +11,19 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from tkinter import messagebox
 from unified_config import PaymentConfig, ReimbursementConfig
+from utils.money import MONEY_FIELDS, cents_to_amount
+from utils.schema import SchemaCache
+
+# 按 schema 文件路径缓存的 t_Schema 内容，文件修改后自动重新加载
+_schema_caches: Dict[str, SchemaCache] = {}
+
+
+def get_schema_cache(path: str, headers: List[str]) -> SchemaCache:
+    """同一个 schema 文件在进程内只加载、校验一次"""
+    cache = _schema_caches.get(path)
+    if cache is None:
+        cache = _schema_caches[path] = SchemaCache(path, headers)
+    return cache
 
 
 class UnifiedExcelWriter:
@@ -28,10 +40,18 @@ class UnifiedExcelWriter:
         else:
             self.config = PaymentConfig()
 
+        # 按 EXCEL_HEADERS 预先算好的行布局：金额列、公式列的位置
+        headers = self.config.EXCEL_HEADERS
+        self.money_columns = [j for j, h in enumerate(headers) if h in MONEY_FIELDS]
+        self.amount_for_column = headers.index("FAmountFor")
+
     def write_excel(self, data: List[Dict[str, Any]]) -> bool:
         """写入Excel文件"""
         try:
-            self.workbook = xlsxwriter.Workbook(self.file_path)
+            # constant_memory 模式逐行刷到临时文件，要求按行号递增写入
+            self.workbook = xlsxwriter.Workbook(
+                self.file_path, {"constant_memory": True}
+            )
 
             # 写入schema工作表
             self._write_schema_sheet()
@@ -54,30 +74,23 @@ class UnifiedExcelWriter:
         """写入schema工作表"""
         worksheet = self.workbook.add_worksheet("t_Schema")
 
-        # 读取JSON schema数据
-        try:
-            with open(self.config.SCHEMA_FILENAME, "r", encoding="utf-8") as f:
-                schema = json.load(f)
-        except FileNotFoundError:
-            schema = []
+        # schema 各行已按 SCHEMA_HEADERS 列顺序排好
+        headers = self.config.SCHEMA_HEADERS
+        schema = get_schema_cache(self.config.SCHEMA_FILENAME, headers).get()
 
         # 写入表头
-        for i, header in enumerate(self.config.SCHEMA_HEADERS):
-            worksheet.write(0, i, header)
+        worksheet.write_row(0, 0, headers)
 
         # 写入schema数据
-        for i, schema_item in enumerate(schema):
-            for j, header in enumerate(self.config.SCHEMA_HEADERS):
-                value = schema_item.get(header, "")
-                worksheet.write(i + 1, j, value)
+        for i, values in enumerate(schema, start=1):
+            worksheet.write_row(i, 0, values)
 
     def _write_data_sheet(self, data: List[Dict[str, Any]]):
         """写入数据工作表"""
         worksheet = self.workbook.add_worksheet("Page1")
 
         # 写入表头
-        for i, header in enumerate(self.config.EXCEL_HEADERS):
-            worksheet.write(0, i, header)
+        worksheet.write_row(0, 0, self.config.EXCEL_HEADERS)
 
         # 写入数据
         if self.file_type == "reimbursement":
@@ -85,24 +98,28 @@ class UnifiedExcelWriter:
         else:
             self._write_payment_data(worksheet, data)
 
+    def _output_row(self, row_data: Dict[str, Any]) -> List[Any]:
+        """按列顺序取出一行的值（金额列由分换算为元）"""
+        values = [row_data.get(header, "") for header in self.config.EXCEL_HEADERS]
+        for j in self.money_columns:
+            if values[j] is not None and values[j] != "":
+                values[j] = cents_to_amount(values[j])
+        return values
+
     def _write_reimbursement_data(self, worksheet, data: List[Dict[str, Any]]):
-        """写入报销数据"""
-        for i, row_data in enumerate(data):
-            for j, header in enumerate(self.config.EXCEL_HEADERS):
-                if j == 9 and header == "FAmountFor":  # FAmountFor列使用公式
-                    worksheet.write(i + 1, j, f"=SUM(K{i + 2}+L{i + 2})")
-                else:
-                    worksheet.write(i + 1, j, row_data.get(header, ""))
-
-    def _write_payment_data(self, worksheet, data: List[Dict[str, Any]]):
-        """写入排单数据"""
+        """写入报销数据（FAmountFor列使用公式）"""
+        for i, row_data in enumerate(data, start=1):
+            values = self._output_row(row_data)
+            values[self.amount_for_column] = f"=SUM(K{i + 1}+L{i + 1})"
+            worksheet.write_row(i, 0, values)
+
+    def _write_payment_data(self, worksheet, data: List[List[Dict[str, Any]]]):
+        """写入排单数据：每张凭证的分录依次整行写出"""
         sum_row = 0
-        for i in range(len(data)):
-            for j in range(len(data[i])):
+        for entries in data:
+            for entry in entries:
                 sum_row = sum_row + 1
-                for k, header in enumerate(self.config.EXCEL_HEADERS):
-                    if header in data[i][j]:
-                        worksheet.write(sum_row, k, data[i][j][header])
+                worksheet.write_row(sum_row, 0, self._output_row(entry))
 
     def create_output_file_path(self, output_folder: str, filename: str) -> str:
         """创建输出文件路径"""
@@ -0,0 +1,62 @@
+"""
+费用类型解析 - 把费用类型名称解析为科目代码
+
+按任务一次性把每个科目的 名称、名称+"费"、别称、别称+"费" 展开成
+{写法: 科目代码} 的字典，逐行查找时只需一次字典查询。
+
+桌面版副本：以 finance_app/services/fee_types.py 为准，两处内容相同，修改时同步。
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 科目的两个名称字段，按顺序与“费”后缀组合成四种写法
+FEE_NAME_FIELDS = ("name", "alias")
+FEE_SUFFIX = "费"
+
+
+def _variants(item: Dict[str, Any]) -> Iterator[Any]:
+    """按原有匹配顺序产出一个科目的所有写法（空字段跳过）"""
+    for field in FEE_NAME_FIELDS:
+        value = item.get(field)
+        if value is None:
+            continue
+        yield value
+        if isinstance(value, str):
+            yield value + FEE_SUFFIX
+
+
+class FeeTypeResolver:
+    """
+    费用类型解析器
+
+    同一写法对应多个科目时，保留在科目表中最先出现的一个（与逐条查找的
+    结果一致），并记录到 ambiguous 中；解析不到的费用类型计入 misses。
+    """
+
+    def __init__(self, fee_type_data: Iterable[Dict[str, Any]]):
+        self.codes: Dict[Any, str] = {}
+        # {写法: [各科目代码]}，只记录对应不同代码的写法
+        self.ambiguous: Dict[Any, List[str]] = {}
+        self.misses: Counter = Counter()
+
+        for item in fee_type_data:
+            code = str(item.get("code", ""))
+            for variant in _variants(item):
+                existing = self.codes.setdefault(variant, code)
+                if existing == code:
+                    continue
+                codes = self.ambiguous.setdefault(variant, [existing])
+                if code not in codes:
+                    codes.append(code)
+
+    def resolve(self, fee_type: Any) -> Optional[str]:
+        """解析费用类型，找不到时返回 None"""
+        code = self.codes.get(fee_type)
+        if code is None:
+            self.misses[fee_type] += 1
+        return code
+
+    def miss_summary(self) -> List[Tuple[Any, int]]:
+        """未解析的费用类型及次数，按次数从多到少排列"""
+        return self.misses.most_common()
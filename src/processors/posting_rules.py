@@ -0,0 +1,135 @@
+"""
+记账规则 - 以规则表描述排单凭证的分录形态，导入时编译为分录生成器
+
+每种凭证形态是一组分录规则：科目代码、科目名称、金额来源、借贷方向和核算项目。
+规则中的 RowField 表示取排单行中的字段，其他值为常量。
+
+规则表以 finance_app/services/posting_rules.py 为准，修改记账规则时两处同步；
+桌面版按字典生成分录，科目代码和付款方式取自 config。
+"""
+
+import os
+import sys
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from config import ACCOUNTS, PAYMENT_TYPES
+
+DEBIT = "debit"
+CREDIT = "credit"
+
+
+class RowField(NamedTuple):
+    """取排单行中的字段"""
+
+    name: str
+
+
+class PostingLine(NamedTuple):
+    """一条分录的规则"""
+
+    account: Any  # 科目代码
+    account_name: Any  # 科目名称
+    amount: str  # 金额字段（分）
+    side: str  # DEBIT / CREDIT
+    item: Any = ""  # 核算项目（FItem）
+
+
+FEE_ACCOUNT = RowField("feeCode")
+FEE_NAME = RowField("feeType")
+BANK_ACCOUNT = RowField("FAccountNum_Bank")
+DEP_PROJECT = RowField("depProjectStr")
+SUPPLIER_PROJECT = RowField("supplierProjectStr")
+
+SUPPLIER = (ACCOUNTS["SUPPLIER"], "应付供应商")
+
+# 凭证形态 → 分录规则（顺序即 FEntryID）
+POSTING_RULES: Dict[str, Tuple[PostingLine, ...]] = {
+    # 定金
+    "partial": (
+        PostingLine(FEE_ACCOUNT, FEE_NAME, "realTaxCents", DEBIT, DEP_PROJECT),
+        PostingLine(ACCOUNTS["TRANSIT"], "在途物资", "remainCents", DEBIT),
+        PostingLine(*SUPPLIER, "totalCents", CREDIT, SUPPLIER_PROJECT),
+        PostingLine(*SUPPLIER, "realTaxCents", DEBIT, SUPPLIER_PROJECT),
+        PostingLine(BANK_ACCOUNT, "银行", "realTaxCents", CREDIT),
+    ),
+    # 全款不含税
+    "full_without_tax": (
+        PostingLine(FEE_ACCOUNT, FEE_NAME, "remainCents", DEBIT, DEP_PROJECT),
+        PostingLine(*SUPPLIER, "totalCents", CREDIT, SUPPLIER_PROJECT),
+        PostingLine(*SUPPLIER, "totalCents", DEBIT, SUPPLIER_PROJECT),
+        PostingLine(BANK_ACCOUNT, "银行", "totalCents", CREDIT),
+    ),
+    # 全款含税
+    "full_with_tax": (
+        PostingLine(FEE_ACCOUNT, FEE_NAME, "remainCents", DEBIT, DEP_PROJECT),
+        PostingLine(ACCOUNTS["TAX"], "进项税额", "realTaxCents", DEBIT),
+        PostingLine(*SUPPLIER, "totalCents", CREDIT, SUPPLIER_PROJECT),
+        PostingLine(*SUPPLIER, "totalCents", DEBIT, SUPPLIER_PROJECT),
+        PostingLine(BANK_ACCOUNT, "银行", "totalCents", CREDIT),
+    ),
+}
+
+# 付款方式 → (税额为 0 时的形态, 税额不为 0 时的形态)
+PAYMENT_SHAPES: Dict[str, Tuple[str, str]] = {
+    PAYMENT_TYPES["PARTIAL"]: ("partial", "partial"),
+    PAYMENT_TYPES["FULL"]: ("full_without_tax", "full_with_tax"),
+}
+
+
+class PostingEmitter:
+    """由规则编译的分录生成器"""
+
+    def __init__(self, lines: Iterable[PostingLine]):
+        # 每条分录: (常量字段, [(字段, 行字段名)])
+        self.lines: List[Tuple[Dict[str, Any], List[Tuple[str, str]]]] = []
+        for entry_id, line in enumerate(lines):
+            constants = {"FEntryID": entry_id}
+            row_fields = []
+            for name, source in (
+                ("FAccountNum", line.account),
+                ("FAccountName", line.account_name),
+                ("FItem", line.item),
+            ):
+                if isinstance(source, RowField):
+                    row_fields.append((name, source.name))
+                else:
+                    constants[name] = source
+
+            side, opposite = ("FDebit", "FCredit")
+            if line.side == CREDIT:
+                side, opposite = opposite, side
+            row_fields.append(("FAmountFor", line.amount))
+            row_fields.append((side, line.amount))
+            constants[opposite] = 0
+
+            self.lines.append((constants, row_fields))
+
+    def emit(self, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """生成一张凭证的分录字段（不含通用字段）"""
+        entries = []
+        for constants, row_fields in self.lines:
+            entry = dict(constants)
+            for name, key in row_fields:
+                entry[name] = row[key]
+            entries.append(entry)
+        return entries
+
+
+def compile_posting_rules(
+    rules: Dict[str, Iterable[PostingLine]],
+) -> Dict[str, PostingEmitter]:
+    """把规则表编译为 {形态: 生成器}"""
+    return {shape: PostingEmitter(lines) for shape, lines in rules.items()}
+
+
+PAYMENT_EMITTERS = compile_posting_rules(POSTING_RULES)
+
+
+def select_shape(payment_type: Any, real_tax_cents: int) -> Optional[str]:
+    """按付款方式和税额选择凭证形态，不支持的付款方式返回 None"""
+    shapes = PAYMENT_SHAPES.get(payment_type)
+    if shapes is None:
+        return None
+    return shapes[1] if real_tax_cents else shapes[0]
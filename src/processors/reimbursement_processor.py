@@ -4,7 +4,7 @@
 
 import openpyxl
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import datetime
 import sys
 import os
@@ -19,6 +19,7 @@ from models.reimbursement_models import (
 )
 from unified_config import REIMBURSEMENT_CONFIG
 from config import DEFAULT_USERS
+from utils.money import cents_to_amount, to_cents
 
 
 class ReimbursementProcessor:
@@ -31,9 +32,8 @@ class ReimbursementProcessor:
     def process_file(self, file_path: str) -> List[Dict[str, Any]]:
         """处理报销文件的统一接口"""
         try:
-            # 解析Excel数据
-            top_infos = self.parser.get_top_infos(file_path)
-            base_data = self.parser.get_base_data(file_path)
+            # 解析Excel数据（一次遍历同时得到顶部信息和基础数据）
+            top_infos, base_data = self.parser.parse_sheet(file_path)
 
             if not top_infos:
                 raise Exception("未找到顶部信息数据")
@@ -71,14 +71,6 @@ def get_real_date(month_day):
     return datetime.datetime.strptime(result, "%Y-%m-%d")
 
 
-def round_amount(amount, decimals=2):
-    """金额四舍五入到指定小数位"""
-    try:
-        return round(float(amount), decimals)
-    except (ValueError, TypeError):
-        return 0.0
-
-
 class ReimbursementExcelParser:
     """报销Excel文件解析器"""
 
@@ -103,19 +95,10 @@ class ReimbursementExcelParser:
             return []
 
         result = []
-        TOP_INFO_COLUMNS = REIMBURSEMENT_CONFIG["TOP_INFO_COLUMNS"]
-
         for row in self.sheet.iter_rows(min_row=0, values_only=True, max_col=16):
             if row[0] == "日期":
-                top_info = ReimbursementTopInfo(
-                    date=row[TOP_INFO_COLUMNS["date"]],
-                    person=row[TOP_INFO_COLUMNS["person"]],
-                    bank=row[TOP_INFO_COLUMNS["bank"]],
-                    bank_code=row[TOP_INFO_COLUMNS["bankCode"]],
-                    summary=row[TOP_INFO_COLUMNS["summary"]],
-                )
                 self.top_index += 1
-                result.append(top_info)
+                result.append(self._build_top_info(row))
             else:
                 break
 
@@ -127,43 +110,96 @@ class ReimbursementExcelParser:
             return []
 
         result = []
-        REIMBURSEMENT_COLUMNS = REIMBURSEMENT_CONFIG["REIMBURSEMENT_COLUMNS"]
 
         # 从第3+topIndex行开始读取数据
         for row in self.sheet.iter_rows(
             min_row=3 + self.top_index, values_only=True, max_col=16
         ):
-            # 创建报销数据对象
-            reimbursement_data = ReimbursementData(
-                person=row[REIMBURSEMENT_COLUMNS["person"]],
-                department=row[REIMBURSEMENT_COLUMNS["department"]],
-                project=row[REIMBURSEMENT_COLUMNS["project"]],
-                remark=row[REIMBURSEMENT_COLUMNS["remark"]],
-                fee_type=row[REIMBURSEMENT_COLUMNS["feeType"]],
-                fee_code=row[REIMBURSEMENT_COLUMNS["feeCode"]],
-                amount=row[REIMBURSEMENT_COLUMNS["amount"]],
-                summary=row[REIMBURSEMENT_COLUMNS["summary"]],
-                department_project=row[REIMBURSEMENT_COLUMNS["departmentProject"]],
-            )
+            reimbursement_data = self._build_base_data(row)
+            if reimbursement_data is not None:
+                result.append(reimbursement_data)
 
-            # 跳过空行
-            if reimbursement_data.is_empty():
-                continue
+        return result
+
+    def parse_sheet(
+        self, file_path: str
+    ) -> Tuple[List[ReimbursementTopInfo], List[ReimbursementData]]:
+        """
+        加载一次工作簿，一次遍历同时解析顶部信息和基础数据
 
-            # 处理项目为空的情况
-            if reimbursement_data.project is None or reimbursement_data.project == "":
-                reimbursement_data.department_project = ""
+        顶部信息状态收集开头以"日期"开头的行，遇到第一个非"日期"行后切换到
+        明细状态；与 get_base_data 一样，明细从第3+topIndex行开始。
+        """
+        self.load_workbook(file_path)
 
-            # 验证部门+项目字段
-            if (
-                reimbursement_data.department_project is None
-                or reimbursement_data.department_project == ""
-            ):
+        top_infos = []
+        base_data = []
+        self.top_index = 0
+        in_top_block = True
+
+        rows = self.sheet.iter_rows(min_row=1, values_only=True, max_col=16)
+        for row_index, row in enumerate(rows, start=1):
+            if in_top_block:
+                if row[0] == "日期":
+                    self.top_index += 1
+                    top_infos.append(self._build_top_info(row))
+                    continue
+                in_top_block = False
+
+            # 跳过顶部信息与明细之间的空行和表头
+            if row_index < 3 + self.top_index:
                 continue
 
-            result.append(reimbursement_data)
+            reimbursement_data = self._build_base_data(row)
+            if reimbursement_data is not None:
+                base_data.append(reimbursement_data)
 
-        return result
+        return top_infos, base_data
+
+    def _build_top_info(self, row) -> ReimbursementTopInfo:
+        """由一行数据创建顶部信息"""
+        TOP_INFO_COLUMNS = REIMBURSEMENT_CONFIG["TOP_INFO_COLUMNS"]
+        return ReimbursementTopInfo(
+            date=row[TOP_INFO_COLUMNS["date"]],
+            person=row[TOP_INFO_COLUMNS["person"]],
+            bank=row[TOP_INFO_COLUMNS["bank"]],
+            bank_code=row[TOP_INFO_COLUMNS["bankCode"]],
+            summary=row[TOP_INFO_COLUMNS["summary"]],
+        )
+
+    def _build_base_data(self, row) -> Optional[ReimbursementData]:
+        """由一行数据创建报销数据，空行或缺少部门+项目时返回None"""
+        REIMBURSEMENT_COLUMNS = REIMBURSEMENT_CONFIG["REIMBURSEMENT_COLUMNS"]
+
+        # 创建报销数据对象
+        reimbursement_data = ReimbursementData(
+            person=row[REIMBURSEMENT_COLUMNS["person"]],
+            department=row[REIMBURSEMENT_COLUMNS["department"]],
+            project=row[REIMBURSEMENT_COLUMNS["project"]],
+            remark=row[REIMBURSEMENT_COLUMNS["remark"]],
+            fee_type=row[REIMBURSEMENT_COLUMNS["feeType"]],
+            fee_code=row[REIMBURSEMENT_COLUMNS["feeCode"]],
+            amount=row[REIMBURSEMENT_COLUMNS["amount"]],
+            summary=row[REIMBURSEMENT_COLUMNS["summary"]],
+            department_project=row[REIMBURSEMENT_COLUMNS["departmentProject"]],
+        )
+
+        # 跳过空行
+        if reimbursement_data.is_empty():
+            return None
+
+        # 处理项目为空的情况
+        if reimbursement_data.project is None or reimbursement_data.project == "":
+            reimbursement_data.department_project = ""
+
+        # 验证部门+项目字段
+        if (
+            reimbursement_data.department_project is None
+            or reimbursement_data.department_project == ""
+        ):
+            return None
+
+        return reimbursement_data
 
 
 class ReimbursementDataProcessor:
@@ -197,8 +233,8 @@ class ReimbursementDataProcessor:
             f_account_name=reimbursement_data.fee_type,
             f_currency_num="RMB",
             f_currency_name="人民币",
-            f_amount_for=reimbursement_data.amount,
-            f_debit=reimbursement_data.amount,
+            f_amount_for=reimbursement_data.amount_cents,
+            f_debit=reimbursement_data.amount_cents,
             f_credit=0,
             f_preparer_id=DEFAULT_USERS["PREPARER"],
             f_checker_id="NONE",
@@ -254,9 +290,9 @@ class ReimbursementDataProcessor:
             f_account_name=reimbursement_data.fee_type,
             f_currency_num="RMB",
             f_currency_name="人民币",
-            f_amount_for=reimbursement_data.amount,
+            f_amount_for=reimbursement_data.amount_cents,
             f_debit=0,
-            f_credit=reimbursement_data.amount,
+            f_credit=reimbursement_data.amount_cents,
             f_preparer_id=DEFAULT_USERS["PREPARER"],
             f_checker_id="NONE",
             f_approve_id="NONE",
@@ -291,11 +327,11 @@ class ReimbursementDataProcessor:
         top_info: ReimbursementTopInfo,
         base_data_item: ReimbursementData,
         index: int,
-        total_amount: float,
+        total_cents: int,
         person_index: int,
         date: str,
     ) -> List[Dict[str, Any]]:
-        """生成最后一行记录"""
+        """生成最后一行记录（total_cents 为合计金额，单位分）"""
         # 创建最后一行的报销数据，复制base_data_item的内容
         last_row_info = ReimbursementData(
             person=base_data_item.person,
@@ -304,13 +340,25 @@ class ReimbursementDataProcessor:
             remark=base_data_item.remark,
             fee_type=top_info.bank,  # 使用top_info的bank作为fee_type
             fee_code=top_info.bank_code,  # 使用top_info的bank_code作为fee_code
-            amount=total_amount,
+            amount=cents_to_amount(total_cents),
             summary=top_info.summary,  # 使用top_info的summary
             department_project="",  # 部门+项目设为空
+            amount_cents=total_cents,
         )
 
         return self.generate_last_data(last_row_info, index, date, person_index)
 
+    def group_by_person(
+        self, base_data: List[ReimbursementData]
+    ) -> Dict[str, List[ReimbursementData]]:
+        """按报销人分组明细（一次遍历，组内保持原顺序），报销人为空的明细不参与"""
+        items_by_person: Dict[str, List[ReimbursementData]] = {}
+        for reimbursement in base_data:
+            if reimbursement.person is None or reimbursement.person == "":
+                continue
+            items_by_person.setdefault(reimbursement.person, []).append(reimbursement)
+        return items_by_person
+
     def process_reimbursement_data(
         self, top_infos: List[ReimbursementTopInfo], base_data: List[ReimbursementData]
     ) -> List[Dict[str, Any]]:
@@ -322,27 +370,22 @@ class ReimbursementDataProcessor:
 
         date = top_infos[0].date
         person_index = 1
+        items_by_person = self.group_by_person(base_data)
 
         for top_info in top_infos:
             index = 0
-            total_amount = 0.0
+            # 以分累计，合计与各明细之和严格相等
+            total_cents = 0
             person = top_info.person
 
             # 处理每个人的报销数据
-            for reimbursement in base_data:
-                # 跳过不属于当前人员或空数据的记录
-                if (
-                    reimbursement.person is None
-                    or reimbursement.person == ""
-                    or person != reimbursement.person
-                ):
-                    continue
-
-                # 处理金额
-                amount = reimbursement.amount or 0
-                reimbursement.amount = round_amount(amount, 2)
-                total_amount += reimbursement.amount
-                total_amount = round_amount(total_amount, 2)
+            for reimbursement in items_by_person.get(person, ()):
+                # 处理金额（无法识别的金额按 0 处理）
+                try:
+                    reimbursement.amount_cents = to_cents(reimbursement.amount)
+                except ValueError:
+                    reimbursement.amount_cents = 0
+                total_cents += reimbursement.amount_cents
 
                 # 生成单条数据
                 single_data = self.generate_excel_single_data(
@@ -357,7 +400,7 @@ class ReimbursementDataProcessor:
                     top_info,
                     base_data[person_index - 1],
                     index,
-                    total_amount,
+                    total_cents,
                     person_index,
                     date,
                 )
@@ -0,0 +1,60 @@
+"""
+工作表规格 - 声明式描述工作表的位置与字段映射
+
+每个工作表只解析一次表头，得到各字段所在的列位置，再编译成按位置取值的
+行映射函数，逐行处理时不再查找表头和 key_map。
+
+桌面版副本：以 finance_app/services/sheet_specs.py 为准，修改时同步；
+此处不含按工作簿会话读取的 iter_mapped_rows。
+"""
+
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+RowMapper = Callable[[Tuple[Any, ...]], Dict[str, Any]]
+
+
+def compile_row_mapper(
+    header_cells: Sequence[Any], key_map: Dict[str, str]
+) -> RowMapper:
+    """
+    根据表头编译行映射函数
+
+    表头中不在 key_map 里的列会被忽略；同一字段出现在多列时取最后一列，
+    与逐格映射的结果一致。
+
+    Returns:
+        把行元组转换为 {字段名: 值} 字典的函数
+    """
+    positions: Dict[str, int] = {}
+    for index, header_value in enumerate(header_cells):
+        if header_value in key_map:
+            positions[key_map[header_value]] = index
+
+    fields = tuple(positions)
+    if not fields:
+        return lambda row: {}
+
+    if len(fields) == 1:
+        # itemgetter 只取一个位置时返回单个值而不是元组
+        field, index = fields[0], positions[fields[0]]
+        return lambda row: {field: row[index]}
+
+    getter = itemgetter(*positions.values())
+    return lambda row: dict(zip(fields, getter(row)))
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """工作表规格"""
+
+    sheet_name: str
+    key_map: Dict[str, str]
+    max_col: int = 4
+    start_row: int = 2
+    header_row: int = 1
+
+    def compile(self, header_cells: Sequence[Any]) -> RowMapper:
+        """按实际表头编译行映射函数（只取前 max_col 列）"""
+        return compile_row_mapper(header_cells[: self.max_col], self.key_map)
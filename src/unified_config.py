@@ -11,7 +11,10 @@ LOG_FILENAME = "自动导出日志.log"
 
 # 通用配置
 OUTPUT_FOLDER = "最新"
-SCHEMA_FILENAME = "t_Schema.json"
+# 相对项目根目录解析，不依赖程序启动时的工作目录
+SCHEMA_FILENAME = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "t_Schema.json"
+)
 
 
 # 文件类型枚举
@@ -157,3 +160,21 @@ REIMBURSEMENT_CONFIG = {
         "FGroupID": "记",
     },
 }
+
+
+class PaymentConfig:
+    """排单导出配置"""
+
+    DEFAULT_SHEET_NAME = PAYMENT_CONFIG["DEFAULT_SHEET_NAME"]
+    SCHEMA_FILENAME = SCHEMA_FILENAME
+    SCHEMA_HEADERS = REIMBURSEMENT_CONFIG["SCHEMA_HEADERS"]
+    EXCEL_HEADERS = REIMBURSEMENT_CONFIG["EXCEL_HEADERS"]
+
+
+class ReimbursementConfig:
+    """报销导出配置"""
+
+    DEFAULT_SHEET_NAME = REIMBURSEMENT_CONFIG["DEFAULT_SHEET_NAME"]
+    SCHEMA_FILENAME = SCHEMA_FILENAME
+    SCHEMA_HEADERS = REIMBURSEMENT_CONFIG["SCHEMA_HEADERS"]
+    EXCEL_HEADERS = REIMBURSEMENT_CONFIG["EXCEL_HEADERS"]
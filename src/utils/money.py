@@ -0,0 +1,32 @@
+"""
+金额定点表示 - 以整数“分”参与计算，只在写出文件时格式化为元
+
+桌面版副本：以 finance_app/services/money.py 为准，修改时同步；
+桌面版不依赖 numpy，不含 to_cents_array。
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+# 凭证分录中以分表示的金额字段
+MONEY_FIELDS = ("FAmountFor", "FDebit", "FCredit")
+
+CENTS_PER_YUAN = 100
+_CENT = Decimal("0.01")
+
+
+def to_cents(value):
+    """金额转换为分，四舍五入到分；空值（None、空字符串）为 0"""
+    if value is None or value == "":
+        return 0
+    try:
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"金额格式错误: {value}")
+    if not amount.is_finite():
+        raise ValueError(f"金额格式错误: {value}")
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP) * CENTS_PER_YUAN)
+
+
+def cents_to_amount(cents):
+    """分转换为写入单元格的金额（元）"""
+    return cents / CENTS_PER_YUAN
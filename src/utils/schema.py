@@ -0,0 +1,136 @@
+"""
+t_Schema 缓存 - 凭证导入文件中 t_Schema 工作表的内容只加载、校验一次
+
+t_Schema.json 在任务之间不会变化：首次使用时读取并校验，按 SCHEMA_HEADERS 的
+列顺序预先排好每一行，之后每个任务直接整行写出。文件修改时间变化时自动重新加载；
+新文件无效时继续使用上一次有效的内容。
+
+桌面版副本：以 finance_app/services/schema.py 为准，两处内容相同，修改时同步。
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+SCHEMA_HEADERS = [
+    "FType",
+    "FKey",
+    "FFieldName",
+    "FCaption",
+    "FValueType",
+    "FNeedSave",
+    "FColIndex",
+    "FSrcTableName",
+    "FSrcFieldName",
+    "FExpFieldName",
+    "FImpFieldName",
+    "FDefaultVal",
+    "FSearch",
+    "FItemPageName",
+    "FTrueType",
+    "FPrecision",
+    "FSearchName",
+    "FIsShownList",
+    "FViewMask",
+    "FPage",
+]
+
+# 单元格允许的取值类型
+SCHEMA_VALUE_TYPES = (str, int, float, bool, type(None))
+
+SchemaRows = Tuple[Tuple[Any, ...], ...]
+
+
+def render_schema(schema: Any, headers: Sequence[str] = SCHEMA_HEADERS) -> SchemaRows:
+    """
+    校验 schema 并按列顺序排好各行（缺少的列为 None，未知的列忽略）
+
+    Raises:
+        ValueError: 不是对象列表或取值不是简单类型
+    """
+    if not isinstance(schema, list):
+        raise ValueError("t_Schema 应为对象列表")
+
+    rows = []
+    for index, item in enumerate(schema, start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"t_Schema 第 {index} 项不是对象")
+        for key, value in item.items():
+            if not isinstance(value, SCHEMA_VALUE_TYPES):
+                raise ValueError(f"t_Schema 第 {index} 项 {key} 的取值类型无效")
+        rows.append(tuple(item.get(header) for header in headers))
+    return tuple(rows)
+
+
+def unknown_columns(schema: Any, headers: Sequence[str] = SCHEMA_HEADERS) -> List[str]:
+    """schema 中不在 headers 内、写出时被忽略的列（去重，保持首次出现顺序）"""
+    known = set(headers)
+    unknown: Dict[str, None] = {}
+    for item in schema:
+        for key in item:
+            if key not in known:
+                unknown[key] = None
+    return list(unknown)
+
+
+class SchemaCache:
+    """按文件修改时间自动重新加载的 t_Schema 缓存，可在多个线程间共用"""
+
+    def __init__(self, path: str, headers: Iterable[str] = SCHEMA_HEADERS):
+        self.path = os.path.abspath(path)
+        self.headers: List[str] = list(headers)
+        # 上一次有效的内容及对应的文件修改时间（None 表示文件不存在）
+        self.rows: Optional[SchemaRows] = None
+        self.mtime: Optional[int] = None
+        # 最近一次重新加载失败的原因，成功加载后清空
+        self.error: Optional[str] = None
+        # 当前内容中被忽略的未知列
+        self.ignored: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def missing(self) -> bool:
+        """schema 文件不存在（此时使用空schema）"""
+        return self.rows is not None and self.mtime is None
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def get(self) -> SchemaRows:
+        """
+        当前的 schema 各行
+
+        文件修改时间未变化时直接返回缓存；首次加载的文件无效时抛出 ValueError，
+        之后重新加载失败则保留上一次有效的内容，原因记录在 error 中。
+        """
+        mtime = self._stat_mtime()
+        if self.rows is not None and mtime == self.mtime:
+            return self.rows
+
+        with self._lock:
+            if self.rows is not None and mtime == self.mtime:
+                return self.rows
+
+            try:
+                rows, ignored = self._load() if mtime is not None else ((), [])
+            except (OSError, ValueError) as e:
+                if self.rows is None:
+                    raise ValueError(f"t_Schema 文件无效: {self.path}, {e}")
+                # 同一个无效文件不再反复解析
+                self.mtime = mtime
+                self.error = str(e)
+                return self.rows
+
+            self.rows, self.mtime, self.error = rows, mtime, None
+            self.ignored = ignored
+            return rows
+
+    def _load(self) -> Tuple[SchemaRows, List[str]]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        rows = render_schema(schema, self.headers)
+        return rows, unknown_columns(schema, self.headers)